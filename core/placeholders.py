@@ -0,0 +1,73 @@
+"""
+Low-quality image placeholders: a BlurHash (https://blurha.sh) of ~30
+characters plus the original width/height, so clients can paint a blurred
+box of the right aspect ratio before the image itself arrives.
+
+The encoder works on a 32px thumbnail, so computing one costs about as much
+as opening the image.
+"""
+
+import numpy as np
+from PIL import Image, ImageOps
+
+BLURHASH_COMPONENTS = (4, 3)  # x, y: a 28-character hash
+BLURHASH_SAMPLE_SIZE = (32, 32)
+BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def _base83(value, length):
+    return "".join(BASE83[(value // 83 ** (length - i)) % 83] for i in range(1, length + 1))
+
+
+def _srgb_to_linear(values):
+    values = values / 255.0
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+
+def _linear_to_srgb(value):
+    value = min(max(value, 0.0), 1.0)
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def blurhash_encode(image, components=BLURHASH_COMPONENTS):
+    """BlurHash string for a PIL image."""
+    x_components, y_components = components
+    image = image.convert("RGB")
+    image.thumbnail(BLURHASH_SAMPLE_SIZE)
+    pixels = _srgb_to_linear(np.asarray(image, dtype=np.float64))  # (h, w, 3)
+    height, width = pixels.shape[:2]
+
+    # factors[j, i] = mean of pixels * cos(pi*i*x/w) * cos(pi*j*y/h), AC terms doubled
+    cos_x = np.cos(np.pi * np.outer(np.arange(x_components), np.arange(width)) / width)  # (cx, w)
+    cos_y = np.cos(np.pi * np.outer(np.arange(y_components), np.arange(height)) / height)  # (cy, h)
+    factors = np.einsum("jy,ix,yxc->jic", cos_y, cos_x, pixels) / (width * height)
+    factors[1:, :] *= 2
+    factors[0, 1:] *= 2
+    factors = factors.reshape(-1, 3)
+    dc, ac = factors[0], factors[1:]
+
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+    if len(ac):
+        quantised_max = int(min(max(np.abs(ac).max() * 166 - 0.5, 0), 82))
+        maximum = (quantised_max + 1) / 166
+    else:
+        quantised_max, maximum = 0, 1.0
+    result += _base83(quantised_max, 1)
+    result += _base83((_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4)
+
+    quantised = np.clip(
+        np.floor(np.sign(ac / maximum) * np.abs(ac / maximum) ** 0.5 * 9 + 9.5), 0, 18,
+    ).astype(int)
+    for r, g, b in quantised:
+        result += _base83(r * 19 * 19 + g * 19 + b, 2)
+    return result
+
+
+def image_placeholder(field_file):
+    """{"width", "height", "blurhash"} for an image FieldFile (raises OSError if unreadable)."""
+    with field_file.storage.open(field_file.name, "rb") as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+    return {"width": image.width, "height": image.height, "blurhash": blurhash_encode(image)}
@@ -0,0 +1,142 @@
+"""
+Fixed-size renditions (thumb/card/hero, WebP and JPEG) of uploaded images.
+
+On Cloudinary a rendition is a URL transformation of the original upload;
+on any other storage (FileSystemStorage in development and tests) the
+rendition files are resized with Pillow and saved under `renditions/`.
+Either way the URLs are recorded on the row's `renditions` JSONField, so
+serializers never build them per request:
+
+    {"source": "<file name>", "thumb": {"width": 320, "height": 240, "webp": url, "jpeg": url}, ...}
+
+Local renditions also list their storage names under "files", so they can be
+deleted when the image is replaced or its row is deleted.
+"""
+
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .storage import is_staged, resolve_storage
+
+try:
+    from cloudinary.utils import cloudinary_url
+    from cloudinary_storage.storage import MediaCloudinaryStorage
+except ImportError:  # pragma: no cover - local storage only
+    cloudinary_url = MediaCloudinaryStorage = None
+
+logger = logging.getLogger(__name__)
+
+# Photos are cropped to fill the box, logos are fitted inside it
+PRESETS = {
+    "photo": {"thumb": (320, 240), "card": (640, 480), "hero": (1600, 900)},
+    "logo": {"thumb": (96, 96), "card": (240, 240)},
+}
+# Models with renditions: "app_label.Model" -> (image field, preset)
+RENDITION_FIELDS = {
+    "properties.PropertyMedia": ("file", "photo"),
+    "properties.UnitPlan": ("floor_plan_image", "photo"),
+    "properties.Developer": ("logo", "logo"),
+    "locations.City": ("image", "photo"),
+}
+FORMATS = {"webp": {"quality": 78, "method": 4}, "jpeg": {"quality": 80, "optimize": True, "progressive": True}}
+RENDITIONS_DIR = "renditions"
+
+
+def build_renditions(field_file, preset="photo"):
+    """Rendition URLs for an image FieldFile ({} for an empty field)."""
+    if not field_file:
+        return {}
+    if MediaCloudinaryStorage is not None and isinstance(resolve_storage(field_file), MediaCloudinaryStorage):
+        sizes = _cloudinary_renditions(field_file.name, preset)
+    else:
+        sizes = _local_renditions(field_file, preset)
+    return {"source": field_file.name, **sizes}
+
+
+def _cloudinary_renditions(public_id, preset):
+    crop = {"crop": "fill", "gravity": "auto"} if preset == "photo" else {"crop": "fit"}
+    return {
+        size: {
+            "width": width,
+            "height": height,
+            **{
+                fmt: cloudinary_url(public_id, width=width, height=height, format=fmt, quality="auto", secure=True,
+                                    **crop)[0]
+                for fmt in FORMATS
+            },
+        }
+        for size, (width, height) in PRESETS[preset].items()
+    }
+
+
+def _local_renditions(field_file, preset):
+    storage = resolve_storage(field_file)
+    with field_file.storage.open(field_file.name, "rb") as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+
+    stem, _ = os.path.splitext(field_file.name)
+    renditions, files = {}, []
+    for size, box in PRESETS[preset].items():
+        image = ImageOps.fit(original, box) if preset == "photo" else ImageOps.contain(original, box)
+        rendition = {"width": image.width, "height": image.height}
+        for fmt, options in FORMATS.items():
+            buffer = BytesIO()
+            _for_format(image, fmt).save(buffer, format=fmt.upper(), **options)
+            name = storage.save(f"{RENDITIONS_DIR}/{stem}-{size}.{'jpg' if fmt == 'jpeg' else fmt}",
+                                ContentFile(buffer.getvalue()))
+            rendition[fmt] = storage.url(name)
+            files.append(name)
+        renditions[size] = rendition
+    renditions["files"] = files
+    return renditions
+
+
+def _for_format(image, fmt):
+    if fmt == "jpeg" and image.mode != "RGB":
+        # JPEG has no alpha: flatten transparent logos onto white
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.convert("RGBA").getchannel("A"))
+        return background
+    if image.mode not in ("RGB", "RGBA"):
+        return image.convert("RGBA")
+    return image
+
+
+def refresh_renditions(instance, force=False):
+    """
+    Rebuild `instance.renditions` when its image changed since they were built.
+    Saved with update(), so no save signals fire. Returns True if rebuilt.
+    Staged uploads are skipped: the media queue builds them once promoted.
+    """
+    field_name, preset = RENDITION_FIELDS[instance._meta.label]
+    field_file = getattr(instance, field_name)
+    current = instance.renditions or {}
+    if is_staged(field_file.name) or (not force and (field_file.name or None) == current.get("source")):
+        return False
+    try:
+        instance.renditions = build_renditions(field_file, preset)
+    except OSError:
+        logger.warning("Could not build renditions for %s %s", type(instance).__name__, instance.pk, exc_info=True)
+        instance.renditions = {}
+    type(instance).objects.filter(pk=instance.pk).update(renditions=instance.renditions)
+    discard_renditions(instance, current)
+    return True
+
+
+def discard_renditions(instance, renditions=None):
+    """
+    Delete the rendition files listed in `renditions` (by default the
+    instance's own) once the transaction commits, so a rollback keeps them.
+    """
+    field_name, _ = RENDITION_FIELDS[instance._meta.label]
+    # The field's storage: a staged one hands promoted names to the default storage
+    storage = instance._meta.get_field(field_name).storage
+    renditions = instance.renditions if renditions is None else renditions
+    for name in (renditions or {}).get("files", []):
+        transaction.on_commit(lambda name=name: storage.delete(name))
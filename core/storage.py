@@ -0,0 +1,86 @@
+"""
+Upload staging: a storage that writes new files to local disk and reads
+everything else from the default (Cloudinary) storage.
+
+Fields using `staged_storage` keep request workers off the network: the
+upload is saved under `staging/` on MEDIA_STAGING_ROOT and the media queue
+later moves it to the default storage (see `promote`), rewriting the name
+stored on the row. Nothing serves MEDIA_STAGING_URL, so API payloads show no
+URL for a staged file (properties.serializers.StagedFileMixin).
+"""
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, Storage, default_storage
+
+STAGING_PREFIX = "staging/"
+
+
+def is_staged(name):
+    return bool(name) and name.startswith(STAGING_PREFIX)
+
+
+class StagedUploadStorage(Storage):
+    @property
+    def staging(self):
+        # Built per access so MEDIA_STAGING_ROOT can change (tests)
+        return FileSystemStorage(location=settings.MEDIA_STAGING_ROOT, base_url=settings.MEDIA_STAGING_URL)
+
+    def backend(self, name):
+        """(storage, name within it) that actually holds `name`."""
+        if is_staged(name):
+            return self.staging, name[len(STAGING_PREFIX):]
+        return default_storage, name
+
+    def save(self, name, content, max_length=None):
+        limit = max_length - len(STAGING_PREFIX) if max_length else None
+        return STAGING_PREFIX + self.staging.save(name, content, max_length=limit)
+
+    def _open(self, name, mode="rb"):
+        storage, name = self.backend(name)
+        return storage.open(name, mode)
+
+    def delete(self, name):
+        storage, name = self.backend(name)
+        storage.delete(name)
+
+    def exists(self, name):
+        storage, name = self.backend(name)
+        return storage.exists(name)
+
+    def size(self, name):
+        storage, name = self.backend(name)
+        return storage.size(name)
+
+    def url(self, name):
+        storage, name = self.backend(name)
+        return storage.url(name)
+
+    def path(self, name):
+        storage, name = self.backend(name)
+        return storage.path(name)
+
+
+_staged_storage = StagedUploadStorage()
+
+
+def staged_storage():
+    """Callable `storage=` for FileFields, so migrations don't serialize the instance."""
+    return _staged_storage
+
+
+def promote(field_file):
+    """
+    Copy a staged upload to the default storage and return its new name. The
+    caller writes the name to the row, then deletes the staged copy.
+    """
+    storage, staged_name = field_file.storage.backend(field_file.name)
+    with storage.open(staged_name, "rb") as content:
+        return default_storage.save(staged_name, content)
+
+
+def resolve_storage(field_file):
+    """The storage that really holds the file behind `field_file`."""
+    storage = field_file.storage
+    if isinstance(storage, StagedUploadStorage):
+        return storage.backend(field_file.name)[0]
+    return storage
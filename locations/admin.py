@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Area, City, State
+from .models import Area, City, PriceStat, State
 
 # @admin.register(Location)
 # class LocationAdmin(admin.ModelAdmin):
@@ -23,4 +23,11 @@ class CityAdmin(admin.ModelAdmin):
 class AreaAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "city")
     list_filter = ("city", "city__state")
-    search_fields = ("name", "city__name", "city__state__name")
\ No newline at end of file
+    search_fields = ("name", "city__name", "city__state__name")
+
+
+@admin.register(PriceStat)
+class PriceStatAdmin(admin.ModelAdmin):
+    list_display = ("period", "city", "area", "property_type", "units_count", "avg_ppsf", "median_ppsf")
+    list_filter = ("period", "property_type", "city")
+    search_fields = ("area__name", "city__name")
@@ -0,0 +1,106 @@
+"""
+Price-per-sqft rollups per area and per city (overall and per property type).
+
+One streamed pass over the priced units computes every statistic; the
+results are stored as a dated PriceStat snapshot so the API and the sales
+team read the rollup table instead of aggregating UnitPlan on demand.
+"""
+
+import statistics
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from properties.models import UnitPlan
+from .models import PriceStat
+from .serializers import PriceStatSerializer
+
+PRICE_STATS_CACHE_TTL = 24 * 60 * 60
+PRICE_STATS_VERSION_KEY = "locations:price-stats:version"
+PRICE_STATS_CACHE_KEY = "locations:price-stats:{version}:area:{pk}"
+PRICE_STATS_HISTORY = 12  # snapshots returned by the endpoint
+ALL_TYPES = ""
+
+CENTS = Decimal("0.01")
+
+
+def _money(value):
+    return Decimal(value).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def compute_price_stats(period):
+    """Unsaved PriceStat rows for every area and city that has priced units."""
+    groups = defaultdict(lambda: {"values": [], "properties": set()})
+    units = (
+        UnitPlan.objects.filter(price_per_sqft__isnull=False, property__area__isnull=False)
+        .values_list("property_id", "property__property_type", "property__area_id", "property__area__city_id",
+                     "price_per_sqft")
+    )
+    for property_id, property_type, area_id, city_id, ppsf in units.iterator(chunk_size=2000):
+        for key in (
+            (city_id, area_id, property_type),
+            (city_id, area_id, ALL_TYPES),
+            (city_id, None, property_type),
+            (city_id, None, ALL_TYPES),
+        ):
+            groups[key]["values"].append(ppsf)
+            groups[key]["properties"].add(property_id)
+
+    stats = []
+    for (city_id, area_id, property_type), group in groups.items():
+        values = group["values"]
+        stats.append(PriceStat(
+            period=period,
+            city_id=city_id,
+            area_id=area_id,
+            property_type=property_type,
+            properties_count=len(group["properties"]),
+            units_count=len(values),
+            avg_ppsf=_money(sum(values) / len(values)),
+            median_ppsf=_money(statistics.median(values)),
+            min_ppsf=min(values),
+            max_ppsf=max(values),
+        ))
+    return stats
+
+
+def refresh_price_stats(period=None):
+    """(Re)write the snapshot for `period` (default today). Returns the number of rows."""
+    period = period or timezone.localdate()
+    stats = compute_price_stats(period)
+    with transaction.atomic():
+        PriceStat.objects.filter(period=period).delete()
+        PriceStat.objects.bulk_create(stats, batch_size=1000)
+    bump_price_stats_version()
+    return len(stats)
+
+
+def bump_price_stats_version():
+    try:
+        cache.incr(PRICE_STATS_VERSION_KEY)
+    except ValueError:
+        cache.set(PRICE_STATS_VERSION_KEY, 1, None)
+
+
+def price_stats_cache_key(area_pk):
+    version = cache.get(PRICE_STATS_VERSION_KEY, 0)
+    return PRICE_STATS_CACHE_KEY.format(version=version, pk=area_pk)
+
+
+def area_price_stats(area):
+    """Endpoint payload: latest snapshot for the area and its city, plus the area's trend."""
+    latest = PriceStat.objects.filter(area=area).order_by("-period").values_list("period", flat=True).first()
+    area_stats = PriceStat.objects.filter(area=area, period=latest)
+    city_stats = PriceStat.objects.filter(city_id=area.city_id, area__isnull=True, period=latest)
+    history = PriceStat.objects.filter(area=area, property_type=ALL_TYPES).order_by("-period")[:PRICE_STATS_HISTORY]
+    return {
+        "area": {"id": area.pk, "name": area.name},
+        "city": {"id": area.city_id, "name": area.city.name},
+        "period": latest,
+        "area_stats": PriceStatSerializer(area_stats, many=True).data,
+        "city_stats": PriceStatSerializer(city_stats, many=True).data,
+        "history": PriceStatSerializer(reversed(list(history)), many=True).data,
+    }
@@ -0,0 +1,20 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+
+from locations.analytics import refresh_price_stats
+
+
+class Command(BaseCommand):
+    help = "Write today's (or --date's) price-per-sqft rollup per area and city. Schedule daily."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", type=datetime.date.fromisoformat, help="Snapshot date, YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = refresh_price_stats(options["date"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {rows} price stats rows in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:30
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0005_city_image'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='city',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='housingwalaa/cities/', validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png'])]),
+        ),
+        migrations.CreateModel(
+            name='PriceStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField()),
+                ('property_type', models.CharField(blank=True, max_length=30)),
+                ('properties_count', models.PositiveIntegerField()),
+                ('units_count', models.PositiveIntegerField()),
+                ('avg_ppsf', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('median_ppsf', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('min_ppsf', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('max_ppsf', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('area', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='price_stats', to='locations.area')),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_stats', to='locations.city')),
+            ],
+            options={
+                'ordering': ['-period', 'property_type'],
+                'indexes': [models.Index(fields=['area', '-period'], name='price_stat_area_idx'), models.Index(fields=['city', '-period'], name='price_stat_city_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('area__isnull', False)), fields=('period', 'area', 'property_type'), name='price_stat_area_unique'), models.UniqueConstraint(condition=models.Q(('area__isnull', True)), fields=('period', 'city', 'property_type'), name='price_stat_city_unique')],
+            },
+        ),
+    ]
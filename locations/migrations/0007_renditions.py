@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0006_pricestat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
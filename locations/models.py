@@ -22,6 +22,7 @@ class State(models.Model):
 class City(models.Model):
     name = models.CharField(max_length=100)
     image = models.ImageField(upload_to="housingwalaa/cities/", null=True, blank=True, validators=[FileExtensionValidator(allowed_extensions=['jpg','jpeg','png'])])
+    renditions = models.JSONField(default=dict, blank=True, editable=False)  # see core.renditions
     state = models.ForeignKey(State, on_delete=models.CASCADE, related_name="cities")
 
     class Meta:
@@ -39,4 +40,44 @@ class Area(models.Model):  # Sub-locality / Neighborhood
         unique_together = ("name", "city")
 
     def __str__(self):
-        return f"{self.name}, {self.city.name}"
\ No newline at end of file
+        return f"{self.name}, {self.city.name}"
+
+class PriceStat(models.Model):
+    """
+    Price-per-sqft rollup (from UnitPlan.price_per_sqft) for one area or one
+    whole city, one property type ("" = all types) and one snapshot date.
+    Written by `manage.py refresh_price_stats`; see locations.analytics.
+    """
+    period = models.DateField()
+    city = models.ForeignKey(City, on_delete=models.CASCADE, related_name="price_stats")
+    area = models.ForeignKey(Area, on_delete=models.CASCADE, null=True, blank=True, related_name="price_stats")  # null: city-wide
+    property_type = models.CharField(max_length=30, blank=True)  # "": all types
+    properties_count = models.PositiveIntegerField()
+    units_count = models.PositiveIntegerField()
+    avg_ppsf = models.DecimalField(max_digits=10, decimal_places=2)
+    median_ppsf = models.DecimalField(max_digits=10, decimal_places=2)
+    min_ppsf = models.DecimalField(max_digits=10, decimal_places=2)
+    max_ppsf = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        ordering = ["-period", "property_type"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period", "area", "property_type"],
+                condition=models.Q(area__isnull=False),
+                name="price_stat_area_unique",
+            ),
+            models.UniqueConstraint(
+                fields=["period", "city", "property_type"],
+                condition=models.Q(area__isnull=True),
+                name="price_stat_city_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["area", "-period"], name="price_stat_area_idx"),
+            models.Index(fields=["city", "-period"], name="price_stat_city_idx"),
+        ]
+
+    def __str__(self):
+        scope = self.area.name if self.area_id else self.city.name
+        return f"{scope} {self.property_type or 'all'} @ {self.period}"
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import State, City, Area
+from .models import State, City, Area, PriceStat
 
 
 class StateSerializer(serializers.ModelSerializer):
@@ -16,7 +16,7 @@ class CitySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = City
-        fields = ["id", "name", "image", "state", "state_id"]
+        fields = ["id", "name", "image", "renditions", "state", "state_id"]
 
 
 class AreaSerializer(serializers.ModelSerializer):
@@ -28,3 +28,12 @@ class AreaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Area
         fields = ["id", "name", "city", "city_id"]
+
+
+class PriceStatSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PriceStat
+        fields = [
+            "period", "property_type", "properties_count", "units_count",
+            "avg_ppsf", "median_ppsf", "min_ppsf", "max_ppsf",
+        ]
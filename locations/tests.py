@@ -1,3 +1,70 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from properties.models import Property, UnitPlan
+from properties.tests import make_catalog
+from .analytics import refresh_price_stats
+from .models import Area, PriceStat
+
+
+class AreaPriceStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        apartment, villa = make_catalog(2)
+        villa.property_type = "VILLA"
+        villa.save()
+        UnitPlan.objects.all().delete()
+        for prop, ppsf in ((apartment, "5000"), (apartment, "6000"), (villa, "9000")):
+            UnitPlan.objects.create(property=prop, unit_type="2BHK", price=Decimal("5000000"),
+                                    price_per_sqft=Decimal(ppsf))
+        UnitPlan.objects.create(property=villa, unit_type="3BHK", price=Decimal("9000000"))  # unpriced
+        self.area = Area.objects.get()
+        self.url = f"/api/locations/areas/{self.area.pk}/price-stats/"
+
+    def test_rollup_per_area_city_and_type(self):
+        call_command("refresh_price_stats", date=datetime.date(2026, 10, 1), stdout=StringIO())
+        overall = PriceStat.objects.get(area=self.area, property_type="")
+        self.assertEqual((overall.units_count, overall.properties_count), (3, 2))
+        self.assertEqual(overall.median_ppsf, Decimal("6000.00"))
+        self.assertEqual(overall.avg_ppsf, Decimal("6666.67"))
+        villas = PriceStat.objects.get(area=self.area, property_type="VILLA")
+        self.assertEqual((villas.min_ppsf, villas.max_ppsf), (Decimal("9000.00"), Decimal("9000.00")))
+        self.assertEqual(PriceStat.objects.filter(area__isnull=True, city=self.area.city).count(), 3)
+
+    def test_refresh_replaces_the_snapshot(self):
+        period = datetime.date(2026, 10, 1)
+        rows = refresh_price_stats(period)
+        self.assertEqual(refresh_price_stats(period), rows)
+        self.assertEqual(PriceStat.objects.filter(period=period).count(), rows)
+
+    def test_endpoint_serves_latest_snapshot_and_history_from_cache(self):
+        refresh_price_stats(datetime.date(2026, 9, 1))
+        UnitPlan.objects.filter(price_per_sqft=Decimal("9000")).update(price_per_sqft=Decimal("12000"))
+        refresh_price_stats(datetime.date(2026, 10, 1))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        data = response.data["data"]
+        self.assertEqual(data["period"], datetime.date(2026, 10, 1))
+        self.assertEqual({row["property_type"] for row in data["area_stats"]}, {"", "APARTMENT", "VILLA"})
+        self.assertEqual(len(data["city_stats"]), 3)
+        self.assertEqual([row["max_ppsf"] for row in data["history"]], ["9000.00", "12000.00"])
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        self.assertEqual(len(ctx.captured_queries), 0)
 
-# Create your tests here.
+        # A new snapshot invalidates the cached payload
+        Property.objects.update(property_type="APARTMENT")
+        refresh_price_stats(datetime.date(2026, 11, 1))
+        data = self.client.get(self.url).data["data"]
+        self.assertEqual({row["property_type"] for row in data["area_stats"]}, {"", "APARTMENT"})
@@ -1,6 +1,10 @@
+from django.core.cache import cache
 from rest_framework import viewsets
+from rest_framework.decorators import action
 
 from core.permissions import IsAuthenticatedOrReadOnly
+from core.response_utils import success_response
+from .analytics import PRICE_STATS_CACHE_TTL, area_price_stats, price_stats_cache_key
 from .models import State, City, Area
 from .serializers import StateSerializer, CitySerializer, AreaSerializer
 
@@ -22,4 +26,16 @@ class AreaViewSet(viewsets.ModelViewSet):
     queryset = Area.objects.select_related("city", "city__state").all().order_by("name")
     serializer_class = AreaSerializer
     # permission_classes = [permissions.AllowAny]
-    permission_classes = [IsAuthenticatedOrReadOnly]
\ No newline at end of file
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @action(detail=True, methods=["get"], url_path="price-stats")
+    def price_stats(self, request, pk=None):
+        # Served from the PriceStat rollup (manage.py refresh_price_stats), cached until the next refresh
+        cache_key = price_stats_cache_key(pk)
+        data = cache.get(cache_key)
+        if data is None:
+            data = area_price_stats(self.get_object())
+            cache.set(cache_key, data, PRICE_STATS_CACHE_TTL)
+        response = success_response(data=data)
+        response["Cache-Control"] = "public, max-age=3600"
+        return response
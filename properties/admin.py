@@ -2,13 +2,14 @@ from django import forms
 from django.contrib import admin
 from django.db import models
 from django.utils.safestring import mark_safe
-from .models import Developer, NearbyPlace, Property, PropertyDetails, PropertyMedia, RateCard, UnitPlan, Amenity, Specification
+from .models import Developer, MediaTask, NearbyPlace, Property, PropertyDetails, PropertyMedia, RateCard, UnitPlan, Amenity, Specification
 
 # Inlines for related models
 class PropertyMediaInline(admin.TabularInline):
     model = PropertyMedia
     extra = 1
-    fields = ("media_type", "file", "video_url", "virtual_tour_url", "is_primary")
+    fields = ("media_type", "file", "video_url", "virtual_tour_url", "is_primary", "processing_state")
+    readonly_fields = ("processing_state",)
 
 class UnitPlanInline(admin.TabularInline):
     model = UnitPlan
@@ -128,7 +129,8 @@ class AmenityAdmin(admin.ModelAdmin):
 # ===== Optional: Other related models separately =====
 @admin.register(PropertyMedia)
 class PropertyMediaAdmin(admin.ModelAdmin):
-    list_display = ("property", "media_type", "is_primary")
+    list_display = ("property", "media_type", "is_primary", "processing_state")
+    list_filter = ("processing_state",)
 
 @admin.register(UnitPlan)
 class UnitPlanAdmin(admin.ModelAdmin):
@@ -154,4 +156,11 @@ class RateCardAdmin(admin.ModelAdmin):
 # ========= NearbyPlace Admin =========
 @admin.register(NearbyPlace)
 class NearbyPlaceAdmin(admin.ModelAdmin):
-    list_display = ("property", "name", "distance_km", "travel_time_min")
\ No newline at end of file
+    list_display = ("property", "name", "distance_km", "travel_time_min")
+
+
+# ========= MediaTask Admin =========
+@admin.register(MediaTask)
+class MediaTaskAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "attempts", "locked_at", "next_attempt_at", "created_at")
+    readonly_fields = ("last_error",)
@@ -0,0 +1,161 @@
+from django.db.models import Count
+
+from core.storage import is_staged
+from .models import Property, PropertyCard, PropertyMedia
+
+CARD_BATCH_SIZE = 500
+
+
+def _file_url(field):
+    # Staged uploads sit on the web worker's disk, which nothing serves
+    return field.url if field and not is_staged(field.name) else None
+
+
+def refresh_primary_images(property_ids):
+    """
+    Set Property.primary_image and image_count from the properties' IMAGE
+    media: the one flagged is_primary (the first, if several are), otherwise
+    the first uploaded. One read and one bulk update per call.
+    """
+    summary = {pk: [None, 0] for pk in set(property_ids)}
+    images = (
+        PropertyMedia.objects.filter(property_id__in=list(summary), media_type="IMAGE")
+        .order_by("-is_primary", "pk")
+        .values_list("property_id", "pk")
+    )
+    for property_id, media_id in images:
+        entry = summary[property_id]
+        if entry[0] is None:
+            entry[0] = media_id
+        entry[1] += 1
+    Property.objects.bulk_update(
+        [Property(pk=pk, primary_image_id=primary, image_count=count) for pk, (primary, count) in summary.items()],
+        ["primary_image", "image_count"],
+        batch_size=CARD_BATCH_SIZE,
+    )
+
+
+def primary_media_payload(media):
+    return {
+        "id": media.pk,
+        "file": _file_url(media.file),
+        "renditions": media.renditions,
+        "processing_state": media.processing_state,
+        "width": media.width,
+        "height": media.height,
+        "blurhash": media.blurhash,
+    }
+
+
+def build_card(prop):
+    """
+    PropertyCard row for a property loaded through `card_source_queryset`.
+    """
+    area = prop.area
+    city = area.city if area else None
+    developer = prop.developer
+    units = list(prop.units.all())
+    unit_prices = [u.price for u in units if u.price is not None]
+    rooms = [u.rooms for u in units if u.rooms is not None]
+    carpets = [u.carpet_area_sqft for u in units if u.carpet_area_sqft is not None]
+    ppsfs = [u.price_per_sqft for u in units if u.price_per_sqft is not None]
+    details = prop.details if hasattr(prop, "details") else None
+
+    return PropertyCard(
+        property=prop,
+        title=prop.title,
+        slug=prop.slug,
+        property_type=prop.property_type,
+        status=prop.status,
+        price_min=prop.price_min,
+        price_max=prop.price_max,
+        is_featured=prop.is_featured,
+        possession_date=prop.possession_date,
+        address_line1=prop.address_line1,
+        address_line2=prop.address_line2,
+        pincode=prop.pincode,
+        latitude=prop.latitude,
+        longitude=prop.longitude,
+        area_id=area.pk if area else None,
+        area_name=area.name if area else None,
+        city_name=city.name if city else None,
+        state_name=city.state.name if city else None,
+        developer={
+            "id": developer.pk,
+            "name": developer.name,
+            "about": developer.about,
+            "logo": _file_url(developer.logo),
+            "renditions": developer.renditions,
+            "website": developer.website,
+            "contact_number": developer.contact_number,
+        } if developer else None,
+        primary_media=primary_media_payload(prop.primary_image) if prop.primary_image else None,
+        image_count=prop.image_count,
+        units=[{"id": u.pk, "unit_type": u.unit_type} for u in units],
+        unit_types=list(dict.fromkeys(u.unit_type for u in units)),
+        unit_price_min=min(unit_prices) if unit_prices else None,
+        unit_price_max=max(unit_prices) if unit_prices else None,
+        rooms_min=min(rooms) if rooms else None,
+        rooms_max=max(rooms) if rooms else None,
+        carpet_min=min(carpets) if carpets else None,
+        carpet_max=max(carpets) if carpets else None,
+        ppsf_min=min(ppsfs) if ppsfs else None,
+        ppsf_max=max(ppsfs) if ppsfs else None,
+        details={
+            "total_towers": details.total_towers,
+            "total_units": details.total_units,
+            "floors": details.floors,
+            "current_status": details.current_status,
+        } if details else None,
+        amenities_count=prop.amenities_total,
+    )
+
+
+def card_source_queryset():
+    return (
+        Property.objects.select_related("area__city__state", "developer", "details", "primary_image")
+        .prefetch_related("units")
+        .annotate(amenities_total=Count("amenities", distinct=True))
+        .order_by("pk")
+    )
+
+
+CARD_UPDATE_FIELDS = [f.name for f in PropertyCard._meta.concrete_fields if not f.primary_key]
+
+
+def refresh_property_cards(property_ids):
+    """
+    Rebuild the cards of the given properties with one upsert per batch.
+    """
+    property_ids = sorted(set(property_ids))
+    refreshed = 0
+    for start in range(0, len(property_ids), CARD_BATCH_SIZE):
+        batch = property_ids[start:start + CARD_BATCH_SIZE]
+        cards = [build_card(prop) for prop in card_source_queryset().filter(pk__in=batch)]
+        PropertyCard.objects.bulk_create(
+            cards,
+            update_conflicts=True,
+            unique_fields=["property"],
+            update_fields=CARD_UPDATE_FIELDS,
+        )
+        refreshed += len(cards)
+    return refreshed
+
+
+def cards_for_page(properties):
+    """
+    Cards for a page of Property rows (selected with `select_related("card")`),
+    building any that are missing, with the `distance` annotation (and
+    `matched_units`, when set) carried over.
+    """
+    missing = [prop.pk for prop in properties if not hasattr(prop, "card")]
+    if missing:
+        refresh_property_cards(missing)
+        rebuilt = PropertyCard.objects.in_bulk(missing)
+    cards = []
+    for prop in properties:
+        card = prop.card if hasattr(prop, "card") else rebuilt[prop.pk]
+        card.distance = getattr(prop, "distance", None)
+        card.matched_units = getattr(prop, "matched_units", None)
+        cards.append(card)
+    return cards
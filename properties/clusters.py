@@ -0,0 +1,76 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, Min
+from django.db.models.functions import Substr
+
+from .filters import normalized_filter_key
+from .response_cache import catalog_version
+from .geo import GEOHASH_PRECISION, geohash_cell_size
+
+CLUSTERS_CACHE_TTL = 120
+CLUSTERS_CACHE_PREFIX = "properties:clusters"
+MARKER_THRESHOLD = 200
+MAX_ZOOM = 22
+
+
+def precision_for_zoom(zoom):
+    """
+    Geohash precision giving roughly 8x8 cells per map tile at `zoom`.
+    """
+    target_width = 360.0 / 2 ** zoom / 8
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        if geohash_cell_size(precision)[1] <= target_width:
+            return precision
+    return GEOHASH_PRECISION
+
+
+def clusters_cache_key(query_params, zoom):
+    key = f"c={catalog_version()}&z={zoom}&{normalized_filter_key(query_params)}"
+    return f"{CLUSTERS_CACHE_PREFIX}:{hashlib.md5(key.encode('utf-8')).hexdigest()}"
+
+
+def compute_clusters(queryset, zoom):
+    """
+    Map pins for an already filtered (bbox) queryset.
+
+    Up to MARKER_THRESHOLD properties come back as individual markers;
+    beyond that they are grouped by geohash prefix in SQL.
+    """
+    queryset = queryset.filter(geohash__isnull=False).order_by()
+
+    markers = list(queryset.values("id", "slug", "latitude", "longitude", "price_min")[: MARKER_THRESHOLD + 1])
+    if len(markers) <= MARKER_THRESHOLD:
+        return {"mode": "markers", "zoom": zoom, "markers": markers}
+
+    precision = precision_for_zoom(zoom)
+    cells = (
+        queryset.annotate(cell=Substr("geohash", 1, precision))
+        .values("cell")
+        .annotate(count=Count("id"), lat=Avg("latitude"), lng=Avg("longitude"), lowest_price=Min("price_min"))
+        .order_by("-count", "cell")
+    )
+    return {
+        "mode": "clusters",
+        "zoom": zoom,
+        "precision": precision,
+        "clusters": [
+            {
+                "geohash": cell["cell"],
+                "count": cell["count"],
+                "latitude": cell["lat"],
+                "longitude": cell["lng"],
+                "price_min": cell["lowest_price"],
+            }
+            for cell in cells
+        ],
+    }
+
+
+def cached_clusters(queryset, query_params, zoom):
+    key = clusters_cache_key(query_params, zoom)
+    payload = cache.get(key)
+    if payload is None:
+        payload = compute_clusters(queryset, zoom)
+        cache.set(key, payload, CLUSTERS_CACHE_TTL)
+    return payload
@@ -0,0 +1,83 @@
+"""
+Side-by-side comparison of a few properties (/properties/compare/?ids=).
+
+The properties are pivoted into rows with one value per property, in request
+order, so the client renders a table without matching anything up: details
+by field, units by unit type and rate cards by charge name.
+"""
+
+from .models import PropertyDetails
+from .serializers import PropertyDetailsSerializer, RateCardSerializer, UnitPlanSerializer
+
+BATCH_MAX_IDS = 50
+COMPARE_MAX_IDS = 5
+
+# Relations the table is built from, loaded whatever `?fields=` asks for
+COMPARE_RELATIONS = ("details", "units", "rate_cards")
+
+# Details rows, in display order
+DETAIL_FIELDS = [
+    field.name for field in PropertyDetails._meta.concrete_fields if field.name not in ("id", "property")
+]
+# Unit columns shown per unit type
+UNIT_FIELDS = (
+    "rooms", "bathrooms", "balconies", "carpet_area_sqft", "builtup_area_sqft", "super_builtup_area_sqft",
+    "price", "price_per_sqft",
+)
+
+
+def parse_ids(raw, limit):
+    """Distinct lookup values from `?ids=a,b,c` in the given order, or an error message."""
+    values = list(dict.fromkeys(value.strip() for value in (raw or "").split(",") if value.strip()))
+    if not values:
+        return None, "This parameter is required."
+    if len(values) > limit:
+        return None, f"At most {limit} properties at a time."
+    return values, None
+
+
+def _row(label, values):
+    return {"label": label, "values": values, "same": len({repr(value) for value in values}) <= 1}
+
+
+def compare_table(properties):
+    """
+    Column-aligned view of Property instances with COMPARE_RELATIONS loaded.
+    Built from the instances, not the response payload, which `?fields=` may
+    have pruned.
+    """
+    details = [PropertyDetailsSerializer(prop.details).data if hasattr(prop, "details") else {} for prop in properties]
+    detail_rows = [
+        _row(name, [item.get(name) for item in details])
+        for name in DETAIL_FIELDS
+        if any(item.get(name) is not None for item in details)
+    ]
+
+    units = [UnitPlanSerializer(prop.units.all(), many=True).data for prop in properties]
+    unit_types = list(dict.fromkeys(unit["unit_type"] for prop_units in units for unit in prop_units))
+    unit_rows = []
+    for unit_type in unit_types:
+        values = []
+        for prop_units in units:
+            # Several plans of one type in a property: show the cheapest
+            matching = [unit for unit in prop_units if unit["unit_type"] == unit_type]
+            unit = min(matching, key=lambda u: float(u["price"]), default=None)
+            values.append({name: unit[name] for name in UNIT_FIELDS} if unit else None)
+        unit_rows.append(_row(unit_type, values))
+
+    rate_cards = [RateCardSerializer(prop.rate_cards.all(), many=True).data for prop in properties]
+    charge_names = list(dict.fromkeys(card["name"] for prop_cards in rate_cards for card in prop_cards))
+    rate_card_rows = []
+    for name in charge_names:
+        values = []
+        for prop_cards in rate_cards:
+            card = next((card for card in prop_cards if card["name"] == name), None)
+            values.append({"amount": card["amount"], "unit": card["unit"]} if card else None)
+        rate_card_rows.append(_row(name, values))
+
+    return {
+        "columns": [{"id": prop.pk, "slug": prop.slug, "title": prop.title} for prop in properties],
+        "details": detail_rows,
+        "units": unit_rows,
+        "rate_cards": rate_card_rows,
+    }
@@ -0,0 +1,63 @@
+"""
+Conditional GET (ETag / Last-Modified) for the property endpoints.
+
+Validators come from the same version counters (and their bump times) as
+the response cache, so a revalidation never touches the database or the
+serializers and a match is answered with an empty 304. A property with no
+bump time in the cache (flushed, evicted, or a worker with its own local
+cache) is seeded from `Property.updated_at`, so every worker agrees on it.
+"""
+
+import time
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .models import Property
+from .response_cache import (
+    CATALOG_MODIFIED_KEY,
+    PROPERTY_MODIFIED_KEY,
+    REFERENCE_MODIFIED_KEY,
+    detail_cache_key,
+    get_modified,
+    list_cache_key,
+)
+
+
+def _etag(cache_key):
+    # The cache key already digests the normalized request and its versions
+    return quote_etag(cache_key.rsplit(":", 1)[-1])
+
+
+def list_validators(request):
+    last_modified = max(get_modified(CATALOG_MODIFIED_KEY), get_modified(REFERENCE_MODIFIED_KEY))
+    return _etag(list_cache_key(request)), int(last_modified)
+
+
+def property_modified(pk):
+    """Unix time a property last changed: its bump time, else its `updated_at`."""
+    def updated_at():
+        value = Property.objects.filter(pk=pk).values_list("updated_at", flat=True).first()
+        return value.timestamp() if value else time.time()
+
+    # resolve_property_pk seeds the key on a lookup miss, so this query is rare
+    return get_modified(PROPERTY_MODIFIED_KEY.format(pk=pk), default=updated_at)
+
+
+def detail_validators(request, pk):
+    last_modified = max(property_modified(pk), get_modified(REFERENCE_MODIFIED_KEY))
+    return _etag(detail_cache_key(request, pk)), int(last_modified)
+
+
+def not_modified_response(request, etag, last_modified):
+    """A 304 (or 412) response if the client's copy is current, else None."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
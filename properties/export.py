@@ -0,0 +1,94 @@
+"""
+Streaming bulk export of the property catalog (NDJSON or CSV).
+
+Rows are read in chunks off a server-side `iterator()` and rendered from the
+PropertyCard read model, so memory stays flat whatever the catalog size.
+"""
+
+import csv
+from itertools import islice
+
+from core.renderers import ORJSONRenderer
+from .cards import cards_for_page
+from .serializers import PropertyCardSerializer
+
+EXPORT_CHUNK_SIZE = 500
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "properties.ndjson"),
+    "csv": ("text/csv; charset=utf-8", "properties.csv"),
+}
+
+# Flat columns for CSV; nested card fields are summarised
+CSV_COLUMNS = (
+    "id",
+    "title",
+    "slug",
+    "property_type",
+    "status",
+    "price_min",
+    "price_max",
+    "is_featured",
+    "possession_date",
+    "area",
+    "area_name",
+    "city_name",
+    "state_name",
+    "address_line1",
+    "address_line2",
+    "pincode",
+    "latitude",
+    "longitude",
+    "developer",
+    "unit_types",
+    "unit_price_min",
+    "unit_price_max",
+    "primary_image",
+    "image_count",
+    "amenities_count",
+    "distance_km",
+)
+
+
+def export_rows(queryset, chunk_size=None):
+    """
+    Card payloads for every property in `queryset` (selected with
+    `select_related("card")`), one chunk of Property rows in memory at a time.
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    properties = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(properties, chunk_size))
+        if not chunk:
+            return
+        yield from PropertyCardSerializer(cards_for_page(chunk), many=True).data
+
+
+def ndjson_lines(rows):
+    renderer = ORJSONRenderer()
+    for row in rows:
+        yield renderer.render(row) + b"\n"
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_record(row):
+    record = {column: row.get(column) for column in CSV_COLUMNS}
+    record.update(
+        developer=row["developer"]["name"] if row["developer"] else None,
+        unit_types="|".join(row["unit_types"] or []),
+        primary_image=row["primary_image"]["file"] if row["primary_image"] else None,
+    )
+    return [record[column] for column in CSV_COLUMNS]
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        yield writer.writerow(_csv_record(row))
@@ -0,0 +1,112 @@
+import hashlib
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from .filters import normalized_filter_key
+from .response_cache import catalog_version
+from .models import Property
+
+FACETS_CACHE_TTL = 300
+FACETS_CACHE_PREFIX = "properties:facets"
+
+# Histogram edges (INR). The last bucket is open-ended.
+PRICE_BUCKET_EDGES = [
+    0,
+    2_500_000,
+    5_000_000,
+    7_500_000,
+    10_000_000,
+    15_000_000,
+    20_000_000,
+    30_000_000,
+    50_000_000,
+]
+
+
+def facets_cache_key(query_params):
+    # Catalog version: any property change invalidates every facet entry
+    key = f"c={catalog_version()}&{normalized_filter_key(query_params)}"
+    digest = hashlib.md5(key.encode("utf-8")).hexdigest()
+    return f"{FACETS_CACHE_PREFIX}:{digest}"
+
+
+def _bucket(field):
+    whens = [
+        When(**{f"{field}__lt": upper}, then=Value(index))
+        for index, upper in enumerate(PRICE_BUCKET_EDGES[1:])
+    ]
+    return Case(*whens, default=Value(len(PRICE_BUCKET_EDGES) - 1), output_field=IntegerField())
+
+
+def compute_facets(queryset):
+    """
+    Every sidebar facet from a single grouped aggregate over the filtered queryset.
+
+    A property counts towards every price bucket its [price_min, price_max]
+    range overlaps.
+    """
+    rows = (
+        queryset.order_by()
+        .values("property_type", "status", "area_id", "area__name", "developer_id", "developer__name")
+        .annotate(low=_bucket("price_min"), high=_bucket("price_max"), total=Count("id"))
+    )
+
+    total = 0
+    property_types = defaultdict(int)
+    statuses = defaultdict(int)
+    areas = {}
+    developers = {}
+    histogram = [0] * len(PRICE_BUCKET_EDGES)
+
+    for row in rows:
+        n = row["total"]
+        total += n
+        property_types[row["property_type"]] += n
+        statuses[row["status"]] += n
+        if row["area_id"] is not None:
+            areas.setdefault(row["area_id"], {"id": row["area_id"], "name": row["area__name"], "count": 0})
+            areas[row["area_id"]]["count"] += n
+        if row["developer_id"] is not None:
+            developers.setdefault(
+                row["developer_id"], {"id": row["developer_id"], "name": row["developer__name"], "count": 0}
+            )
+            developers[row["developer_id"]]["count"] += n
+        for index in range(row["low"], max(row["low"], row["high"]) + 1):
+            histogram[index] += n
+
+    type_labels = dict(Property.PROPERTY_TYPES)
+    status_labels = dict(Property.STATUS_CHOICES)
+
+    def by_count(items):
+        return sorted(items, key=lambda item: (-item["count"], str(item.get("name") or item.get("value"))))
+
+    return {
+        "total": total,
+        "property_type": by_count(
+            {"value": key, "label": type_labels.get(key, key), "count": n} for key, n in property_types.items()
+        ),
+        "status": by_count(
+            {"value": key, "label": status_labels.get(key, key), "count": n} for key, n in statuses.items()
+        ),
+        "area": by_count(areas.values()),
+        "developer": by_count(developers.values()),
+        "price": [
+            {
+                "min": PRICE_BUCKET_EDGES[index],
+                "max": PRICE_BUCKET_EDGES[index + 1] if index + 1 < len(PRICE_BUCKET_EDGES) else None,
+                "count": n,
+            }
+            for index, n in enumerate(histogram)
+        ],
+    }
+
+
+def cached_facets(queryset, query_params):
+    key = facets_cache_key(query_params)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset)
+        cache.set(key, facets, FACETS_CACHE_TTL)
+    return facets
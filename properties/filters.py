@@ -1,10 +1,65 @@
 import django_filters
-from .models import Property
+from django.db.models import Exists, F, FloatField, OuterRef, Q, Value
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+from .geo import distance_km, radius_bbox, within_bbox
+from .models import Property, UnitPlan
+
+DEFAULT_RADIUS_KM = 5
+MAX_RADIUS_KM = 100
+
+
+def parse_floats(value, count, param):
+    try:
+        numbers = [float(part) for part in value.split(",")]
+    except (TypeError, ValueError):
+        numbers = []
+    if len(numbers) != count:
+        raise ValidationError({param: [f"Expected {count} comma-separated numbers."]})
+    return numbers
+
+
+# Unit-level filter -> (UnitPlan lookup, PropertyCard aggregate it can prefilter on)
+UNIT_RANGE_FILTERS = {
+    "carpet_min": ("carpet_area_sqft__gte", "card__carpet_max__gte"),
+    "carpet_max": ("carpet_area_sqft__lte", "card__carpet_min__lte"),
+    "ppsf_min": ("price_per_sqft__gte", "card__ppsf_max__gte"),
+    "ppsf_max": ("price_per_sqft__lte", "card__ppsf_min__lte"),
+}
+
+# Unit-level ordering (?ordering=bhk,-carpet_area): smallest unit of each property
+UNIT_ORDERING_ANNOTATIONS = {
+    "bhk": "card__rooms_min",
+    "carpet_area": "card__carpet_min",
+    "price_per_sqft": "card__ppsf_min",
+}
+
+
+def matched_units(property_ids, unit_q):
+    """{property id: [units matching `unit_q`]} for one page of results."""
+    matches = {pk: [] for pk in property_ids}
+    units = UnitPlan.objects.filter(unit_q, property_id__in=list(property_ids)).order_by("property_id", "price", "pk")
+    for unit in units.values("id", "property_id", "unit_type", "rooms", "carpet_area_sqft", "price", "price_per_sqft"):
+        matches[unit.pop("property_id")].append(unit)
+    return matches
+
+
+class ChoiceCodeFilter(django_filters.CharFilter):
+    """
+    Case-insensitive match on an upper-case choice code (`?status=ready`),
+    done as an exact match on the upper-cased value so the column's
+    indexes stay usable (`iexact` compiles to UPPER(col)/LIKE, which can't).
+    """
+
+    def filter(self, qs, value):
+        return super().filter(qs, value.upper() if value else value)
+
 
 class PropertyFilter(django_filters.FilterSet):
     # Exact matches
-    property_type = django_filters.CharFilter(field_name="property_type", lookup_expr="iexact")
-    status = django_filters.CharFilter(field_name="status", lookup_expr="iexact")
+    property_type = ChoiceCodeFilter(field_name="property_type")
+    status = ChoiceCodeFilter(field_name="status")
     # Slug support
     slug = django_filters.CharFilter(field_name="slug", lookup_expr="iexact")
     # Area/Location support (alias to avoid breaking clients)
@@ -22,6 +77,18 @@ class PropertyFilter(django_filters.FilterSet):
     is_featured = django_filters.BooleanFilter(field_name="is_featured")
     status_in = django_filters.BaseInFilter(field_name="status", lookup_expr="in")
 
+    # Geo: ?near=lat,lng&radius_km=5 and ?bbox=min_lng,min_lat,max_lng,max_lat
+    near = django_filters.CharFilter(method="filter_near")
+    radius_km = django_filters.NumberFilter(method="filter_radius_km")
+    bbox = django_filters.CharFilter(method="filter_bbox")
+
+    # Unit level: a property matches when one of its units meets every given condition
+    rooms_in = django_filters.BaseInFilter(method="filter_units")
+    carpet_min = django_filters.NumberFilter(method="filter_units")
+    carpet_max = django_filters.NumberFilter(method="filter_units")
+    ppsf_min = django_filters.NumberFilter(method="filter_units")
+    ppsf_max = django_filters.NumberFilter(method="filter_units")
+
     class Meta:
         model = Property
         fields = [
@@ -37,4 +104,103 @@ class PropertyFilter(django_filters.FilterSet):
             "price_min",
             "price_max",
             "is_featured",
+            "near",
+            "radius_km",
+            "bbox",
+            "rooms_in",
+            "carpet_min",
+            "carpet_max",
+            "ppsf_min",
+            "ppsf_max",
         ]
+
+    def filter_near(self, queryset, name, value):
+        lat, lng = parse_floats(value, 2, name)
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValidationError({name: ["Coordinates out of range."]})
+        radius = self.form.cleaned_data.get("radius_km") or DEFAULT_RADIUS_KM
+        if not 0 < radius <= MAX_RADIUS_KM:
+            raise ValidationError({"radius_km": [f"Must be between 0 and {MAX_RADIUS_KM}."]})
+        radius = float(radius)
+        return (
+            queryset.filter(within_bbox(*radius_bbox(lat, lng, radius)))
+            .annotate(distance=distance_km(lat, lng))
+            .filter(distance__lte=radius)
+        )
+
+    def filter_radius_km(self, queryset, name, value):
+        # Consumed by filter_near
+        return queryset
+
+    def filter_bbox(self, queryset, name, value):
+        min_lng, min_lat, max_lng, max_lat = parse_floats(value, 4, name)
+        if min_lat > max_lat or min_lng > max_lng:
+            raise ValidationError({name: ["Expected min_lng,min_lat,max_lng,max_lat."]})
+        return queryset.filter(within_bbox(min_lat, min_lng, max_lat, max_lng))
+
+    def filter_units(self, queryset, name, value):
+        # Applied together by filter_queryset, so all conditions hit the same unit
+        return queryset
+
+    def selected_rooms(self):
+        try:
+            return [int(rooms) for rooms in self.form.cleaned_data.get("rooms_in") or []]
+        except ValueError:
+            raise ValidationError({"rooms_in": ["Expected comma-separated integers."]})
+
+    def unit_q(self):
+        """Q over UnitPlan for the unit-level filters in this request, or None."""
+        data = self.form.cleaned_data
+        condition = Q()
+        if self.selected_rooms():
+            condition &= Q(rooms__in=self.selected_rooms())
+        for name, (lookup, _) in UNIT_RANGE_FILTERS.items():
+            if data.get(name) is not None:
+                condition &= Q(**{lookup: data[name]})
+        return condition or None
+
+    def filter_units_queryset(self, queryset):
+        unit_q = self.unit_q()
+        if unit_q is None:
+            return queryset
+        # Indexed range overlap on the card aggregates first, then an exact
+        # semi-join on the units (EXISTS, so no fan-out or DISTINCT)
+        data = self.form.cleaned_data
+        prefilter = Q()
+        rooms = self.selected_rooms()
+        if rooms:
+            prefilter &= Q(card__rooms_min__lte=max(rooms), card__rooms_max__gte=min(rooms))
+        for name, (_, aggregate) in UNIT_RANGE_FILTERS.items():
+            if data.get(name) is not None:
+                prefilter &= Q(**{aggregate: data[name]})
+        return queryset.filter(prefilter).filter(
+            Exists(UnitPlan.objects.filter(unit_q, property_id=OuterRef("pk")))
+        )
+
+    def unit_ordering(self):
+        """The UNIT_ORDERING_ANNOTATIONS keys named in `?ordering=`."""
+        terms = (self.data.get(api_settings.ORDERING_PARAM) or "").split(",")
+        return {term.strip().lstrip("-") for term in terms} & set(UNIT_ORDERING_ANNOTATIONS)
+
+    def filter_queryset(self, queryset):
+        queryset = self.filter_units_queryset(super().filter_queryset(queryset))
+        # ?ordering=distance is only meaningful with ?near=; keep it valid without
+        if "distance" not in queryset.query.annotations:
+            queryset = queryset.annotate(distance=Value(None, output_field=FloatField()))
+        # Each one joins the card, so only when the request orders by it (facets,
+        # clusters, export and counts go without)
+        return queryset.annotate(**{name: F(UNIT_ORDERING_ANNOTATIONS[name]) for name in self.unit_ordering()})
+
+
+def normalized_filter_key(query_params, extra_params=("search",)):
+    """
+    Canonical string of the PropertyFilter (and search) parameters in a request,
+    so equivalent queries (param order, case, paging/ordering params) share cache keys.
+    """
+    allowed = set(PropertyFilter.base_filters) | set(extra_params)
+    parts = []
+    for name in sorted(allowed & set(query_params)):
+        values = sorted(v.strip().lower() for v in query_params.getlist(name) if v.strip())
+        if values:
+            parts.append(f"{name}={','.join(values)}")
+    return "&".join(parts)
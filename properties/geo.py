@@ -0,0 +1,98 @@
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def geohash_encode(lat, lng, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision):
+    """(height, width) in degrees of a geohash cell."""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def covering_geohashes(min_lat, min_lng, max_lat, max_lng, max_cells=32):
+    """
+    The smallest set of geohash prefixes (at one precision) covering a box.
+
+    Picks the finest precision that needs at most `max_cells` cells, so the
+    lookup is a handful of indexed prefix range scans.
+    """
+    precision = GEOHASH_PRECISION
+    while precision > 1:
+        height, width = geohash_cell_size(precision)
+        rows = math.floor(max_lat / height) - math.floor(min_lat / height) + 1
+        cols = math.floor(max_lng / width) - math.floor(min_lng / width) + 1
+        if rows * cols <= max_cells:
+            break
+        precision -= 1
+
+    height, width = geohash_cell_size(precision)
+    cells = set()
+    lat = min_lat
+    while True:
+        lng = min_lng
+        while True:
+            cells.add(geohash_encode(lat, lng, precision))
+            if lng >= max_lng:
+                break
+            lng = min(lng + width, max_lng)
+        if lat >= max_lat:
+            break
+        lat = min(lat + height, max_lat)
+    return sorted(cells)
+
+
+def radius_bbox(lat, lng, radius_km):
+    """(min_lat, min_lng, max_lat, max_lng) of the box around a circle."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    dlng = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+    return (
+        max(lat - dlat, -90.0), max(lng - dlng, -180.0),
+        min(lat + dlat, 90.0), min(lng + dlng, 180.0),
+    )
+
+
+def within_bbox(min_lat, min_lng, max_lat, max_lng):
+    """Indexed geohash prefix filter narrowed by the exact coordinate box."""
+    prefixes = Q()
+    for prefix in covering_geohashes(min_lat, min_lng, max_lat, max_lng):
+        prefixes |= Q(geohash__startswith=prefix)
+    return prefixes & Q(
+        latitude__gte=min_lat, latitude__lte=max_lat,
+        longitude__gte=min_lng, longitude__lte=max_lng,
+    )
+
+
+def distance_km(lat, lng):
+    """Haversine distance expression (km) from a point to Property.latitude/longitude."""
+    lat1 = math.radians(lat)
+    dlat = Radians(F("latitude")) - Value(lat1)
+    dlng = Radians(F("longitude")) - Value(math.radians(lng))
+    a = Power(Sin(dlat / 2), 2) + Value(math.cos(lat1)) * Cos(Radians(F("latitude"))) * Power(Sin(dlng / 2), 2)
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a), output_field=FloatField())
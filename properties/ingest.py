@@ -0,0 +1,233 @@
+"""
+Bulk ingestion of nested property documents (one JSON object per NDJSON line).
+
+Documents are validated a batch at a time (reference ids and slugs are
+checked with one query per table for the whole batch) and every table is
+written with `bulk_create` inside one transaction per batch. Bulk writes skip
+model signals, so the search index, cards, lookup map and cache versions are
+refreshed explicitly once the batch commits.
+"""
+
+import heapq
+import json
+import time
+
+from django.db import transaction
+from django.utils.text import slugify
+from rest_framework import serializers
+
+from locations.models import Area
+from .cards import refresh_primary_images, refresh_property_cards
+from .geo import geohash_encode
+from .lookup import remember_lookups
+from .models import (
+    Amenity, Developer, NearbyPlace, Property, PropertyDetails, PropertyMedia, RateCard, Specification, UnitPlan,
+)
+from .response_cache import bump_catalog
+from .search import update_search_index
+from .suggest import prefix_cache
+
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 500
+SLUG_MAX_LENGTH = Property._meta.get_field("slug").max_length
+
+
+def _child_serializer(model, exclude=("id", "property")):
+    meta = type("Meta", (), {"model": model, "exclude": exclude})
+    return type(f"{model.__name__}DocumentSerializer", (serializers.ModelSerializer,), {"Meta": meta})
+
+
+# Uploaded files can't travel in NDJSON; attach them through the media endpoints
+MediaDocumentSerializer = _child_serializer(PropertyMedia, exclude=("id", "property", "file"))
+UnitDocumentSerializer = _child_serializer(UnitPlan, exclude=("id", "property", "floor_plan_image"))
+SpecificationDocumentSerializer = _child_serializer(Specification)
+DetailsDocumentSerializer = _child_serializer(PropertyDetails)
+RateCardDocumentSerializer = _child_serializer(RateCard)
+NearbyPlaceDocumentSerializer = _child_serializer(NearbyPlace)
+
+# Nested document key -> (model, serializer)
+CHILD_TABLES = {
+    "media": (PropertyMedia, MediaDocumentSerializer),
+    "units": (UnitPlan, UnitDocumentSerializer),
+    "specifications": (Specification, SpecificationDocumentSerializer),
+    "rate_cards": (RateCard, RateCardDocumentSerializer),
+    "nearby_places": (NearbyPlace, NearbyPlaceDocumentSerializer),
+}
+
+# Document keys that aren't Property columns
+NESTED_KEYS = {*CHILD_TABLES, "details", "amenities", "area", "developer"}
+
+
+class PropertyDocumentSerializer(serializers.ModelSerializer):
+    """
+    One import document. References are plain ids and the slug is checked per
+    batch (see PropertyImporter), so validating a document runs no queries.
+    """
+    slug = serializers.SlugField(max_length=SLUG_MAX_LENGTH, required=False, allow_blank=True)
+    area = serializers.IntegerField(required=False, allow_null=True)
+    developer = serializers.IntegerField(required=False, allow_null=True)
+    amenities = serializers.ListField(child=serializers.IntegerField(), required=False)
+    media = MediaDocumentSerializer(many=True, required=False)
+    units = UnitDocumentSerializer(many=True, required=False)
+    specifications = SpecificationDocumentSerializer(many=True, required=False)
+    rate_cards = RateCardDocumentSerializer(many=True, required=False)
+    nearby_places = NearbyPlaceDocumentSerializer(many=True, required=False)
+    details = DetailsDocumentSerializer(required=False)
+
+    class Meta:
+        model = Property
+        fields = (
+            "title", "slug", "description", "developer", "area", "address_line1", "address_line2", "pincode",
+            "latitude", "longitude", "property_type", "status", "amenities", "possession_date", "rera_number",
+            "price_min", "price_max", "is_featured", "highlights",
+            "media", "units", "specifications", "rate_cards", "nearby_places", "details",
+        )
+
+
+class PropertyImporter:
+    """
+    Import NDJSON lines as properties listed by `user`.
+
+        report = PropertyImporter(user).run(lines)
+    """
+
+    def __init__(self, user, batch_size=IMPORT_BATCH_SIZE, on_batch=None):
+        self.user = user
+        self.batch_size = batch_size
+        self.on_batch = on_batch  # progress callback, called with the importer after every batch
+        self.created = 0
+        self.failed = 0
+        self._errors = []  # heap of (-line, errors): the earliest failing lines are kept
+
+    def run(self, lines):
+        started = time.perf_counter()
+        batch = []
+        for line_number, line in enumerate(lines, 1):
+            if isinstance(line, bytes):
+                line = line.decode("utf-8")
+            if not line.strip():
+                continue
+            try:
+                batch.append((line_number, json.loads(line)))
+            except ValueError as exc:
+                self.fail(line_number, {"non_field_errors": [f"Invalid JSON: {exc}"]})
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+
+        elapsed = time.perf_counter() - started
+        return {
+            "created": self.created,
+            "failed": self.failed,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(self.created / elapsed, 1) if elapsed else None,
+            "errors": self.errors,
+        }
+
+    @property
+    def errors(self):
+        """Reported row errors in input line order (failures are found per batch, not per line)."""
+        return [{"line": -line, "errors": errors} for line, errors in sorted(self._errors, reverse=True)]
+
+    def fail(self, line_number, errors):
+        self.failed += 1
+        # A line fails at most once, so the tuples never compare their dicts
+        heapq.heappush(self._errors, (-line_number, errors))
+        if len(self._errors) > MAX_REPORTED_ERRORS:
+            heapq.heappop(self._errors)
+
+    def validate(self, batch):
+        valid = []
+        for line_number, document in batch:
+            serializer = PropertyDocumentSerializer(data=document)
+            if serializer.is_valid():
+                data = serializer.validated_data
+                data["slug"] = data.get("slug") or slugify(data["title"])[:SLUG_MAX_LENGTH]
+                valid.append((line_number, data))
+            else:
+                self.fail(line_number, serializer.errors)
+
+        # One query per referenced table for the whole batch
+        area_ids = set(Area.objects.filter(pk__in={d["area"] for _, d in valid if d.get("area")}).values_list("pk", flat=True))
+        developer_ids = set(Developer.objects.filter(
+            pk__in={d["developer"] for _, d in valid if d.get("developer")}
+        ).values_list("pk", flat=True))
+        amenity_ids = set(Amenity.objects.filter(
+            pk__in={pk for _, d in valid for pk in d.get("amenities", [])}
+        ).values_list("pk", flat=True))
+        taken_slugs = set(Property.objects.filter(slug__in=[d["slug"] for _, d in valid]).values_list("slug", flat=True))
+
+        checked = []
+        for line_number, data in valid:
+            errors = {}
+            if not data["slug"]:
+                errors["slug"] = ["Could not derive a slug from the title."]
+            elif data["slug"] in taken_slugs:
+                errors["slug"] = [f"A property with slug '{data['slug']}' already exists."]
+            if data.get("area") and data["area"] not in area_ids:
+                errors["area"] = [f"Unknown area id {data['area']}."]
+            if data.get("developer") and data["developer"] not in developer_ids:
+                errors["developer"] = [f"Unknown developer id {data['developer']}."]
+            unknown = sorted(set(data.get("amenities", [])) - amenity_ids)
+            if unknown:
+                errors["amenities"] = [f"Unknown amenity ids {unknown}."]
+            if errors:
+                self.fail(line_number, errors)
+                continue
+            taken_slugs.add(data["slug"])  # later duplicates in the same batch fail
+            checked.append(data)
+        return checked
+
+    def import_batch(self, batch):
+        documents = self.validate(batch)
+        if documents:
+            with transaction.atomic():
+                properties = self.write(documents)
+            self.after_write(properties)
+            self.created += len(properties)
+        if self.on_batch:
+            self.on_batch(self)
+
+    def write(self, documents):
+        properties = []
+        for data in documents:
+            fields = {name: value for name, value in data.items() if name not in NESTED_KEYS}
+            prop = Property(
+                listed_by=self.user, area_id=data.get("area"), developer_id=data.get("developer"), **fields
+            )
+            # bulk_create skips Property.save(): derive what it would have
+            if prop.latitude is not None and prop.longitude is not None:
+                prop.geohash = geohash_encode(prop.latitude, prop.longitude)
+            properties.append(prop)
+        Property.objects.bulk_create(properties, batch_size=self.batch_size)
+
+        for key, (model, _) in CHILD_TABLES.items():
+            rows = [model(property=prop, **row) for prop, data in zip(properties, documents) for row in data.get(key, [])]
+            model.objects.bulk_create(rows, batch_size=self.batch_size)
+        PropertyDetails.objects.bulk_create(
+            [PropertyDetails(property=prop, **data["details"]) for prop, data in zip(properties, documents) if data.get("details")],
+            batch_size=self.batch_size,
+        )
+        Through = Property.amenities.through
+        Through.objects.bulk_create(
+            [
+                Through(property_id=prop.pk, amenity_id=amenity_id)
+                for prop, data in zip(properties, documents)
+                for amenity_id in dict.fromkeys(data.get("amenities", []))
+            ],
+            batch_size=self.batch_size,
+        )
+        return properties
+
+    def after_write(self, properties):
+        # What properties.signals would have done for row-by-row saves
+        ids = [prop.pk for prop in properties]
+        update_search_index(ids)
+        refresh_primary_images(ids)
+        refresh_property_cards(ids)
+        for prop in properties:
+            remember_lookups(prop)
+        prefix_cache.clear()
+        bump_catalog()
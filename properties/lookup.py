@@ -0,0 +1,80 @@
+from django.core.cache import cache
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .models import Property
+from .response_cache import seed_property_modified
+
+LOOKUP_CACHE_KEY = "properties:lookup:{value}"
+LOOKUP_CACHE_TTL = 24 * 60 * 60
+
+
+def resolve_property_pk(lookup_value):
+    """
+    Map a `/properties/{slug}/` or `/properties/{id}/` lookup to a pk.
+
+    A slug wins over an id even when it looks numeric. Hits are served from a
+    cached slug/id -> pk map that properties.signals keeps current on save and
+    delete; a miss costs one small indexed query, which also seeds the
+    property's Last-Modified time (see properties.conditional).
+    """
+    lookup_value = str(lookup_value)
+    key = LOOKUP_CACHE_KEY.format(value=lookup_value)
+    pk = cache.get(key)
+    if pk is not None:
+        return pk
+
+    condition = Q(slug=lookup_value)
+    if lookup_value.isdigit():
+        condition |= Q(pk=int(lookup_value))
+    row = (
+        Property.objects.filter(condition)
+        .annotate(slug_match=Case(When(slug=lookup_value, then=Value(0)), default=Value(1), output_field=IntegerField()))
+        .order_by("slug_match")
+        .values_list("pk", "updated_at")
+        .first()
+    )
+    if row is None:
+        return None
+    pk, updated_at = row
+    cache.set(key, pk, LOOKUP_CACHE_TTL)
+    seed_property_modified(pk, updated_at)
+    return pk
+
+
+def resolve_property_pks(lookup_values):
+    """
+    Batch form of resolve_property_pk: {lookup value: pk} for the values that
+    match a property, from one cache read and at most one query for the misses.
+    """
+    lookup_values = [str(value) for value in lookup_values]
+    keys = {LOOKUP_CACHE_KEY.format(value=value): value for value in lookup_values}
+    resolved = {keys[key]: pk for key, pk in cache.get_many(list(keys)).items()}
+
+    missing = [value for value in lookup_values if value not in resolved]
+    if missing:
+        ids = [int(value) for value in missing if value.isdigit()]
+        rows = Property.objects.filter(Q(slug__in=missing) | Q(pk__in=ids)).values_list("pk", "slug")
+        by_slug, by_id = {}, set()
+        for pk, slug in rows:
+            by_slug[slug] = pk
+            by_id.add(pk)
+        found = {}
+        for value in missing:
+            # A slug wins over an id, as in resolve_property_pk
+            if value in by_slug:
+                found[value] = by_slug[value]
+            elif value.isdigit() and int(value) in by_id:
+                found[value] = int(value)
+        cache.set_many({LOOKUP_CACHE_KEY.format(value=value): pk for value, pk in found.items()}, LOOKUP_CACHE_TTL)
+        resolved.update(found)
+    return resolved
+
+
+def remember_lookups(prop, old_slug=None):
+    if old_slug and old_slug != prop.slug:
+        cache.delete(LOOKUP_CACHE_KEY.format(value=old_slug))
+    cache.set(LOOKUP_CACHE_KEY.format(value=prop.slug), prop.pk, LOOKUP_CACHE_TTL)
+
+
+def forget_lookups(prop):
+    cache.delete_many([LOOKUP_CACHE_KEY.format(value=prop.slug), LOOKUP_CACHE_KEY.format(value=prop.pk)])
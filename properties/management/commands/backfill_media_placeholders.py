@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+
+from core.storage import STAGING_PREFIX
+from properties.cards import CARD_BATCH_SIZE, refresh_property_cards
+from properties.media_queue import placeholder_fields
+from properties.models import PropertyMedia
+from properties.response_cache import bump_catalog
+
+PLACEHOLDER_COLUMNS = ("width", "height", "blurhash")
+
+
+class Command(BaseCommand):
+    help = "Compute width/height/blurhash for property images uploaded before placeholders existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Recompute images that already have one")
+        parser.add_argument("--batch-size", type=int, default=CARD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        media = (
+            PropertyMedia.objects.exclude(file="").exclude(file__isnull=True)
+            .exclude(file__startswith=STAGING_PREFIX)  # the media queue fills these in
+            .only("pk", "property_id", "file", *PLACEHOLDER_COLUMNS)
+            .order_by("pk")
+        )
+        if not options["force"]:
+            media = media.filter(blurhash="")
+
+        batch, property_ids, done, skipped = [], set(), 0, 0
+        for item in media.iterator(chunk_size=options["batch_size"]):
+            placeholder = placeholder_fields(item.file)
+            if not placeholder:
+                skipped += 1
+                continue
+            for column, value in placeholder.items():
+                setattr(item, column, value)
+            batch.append(item)
+            property_ids.add(item.property_id)
+            if len(batch) >= options["batch_size"]:
+                done += self.save(batch)
+                batch = []
+        done += self.save(batch)
+
+        # Cards carry the placeholders inline
+        property_ids = sorted(property_ids)
+        for start in range(0, len(property_ids), CARD_BATCH_SIZE):
+            refresh_property_cards(property_ids[start:start + CARD_BATCH_SIZE])
+        if property_ids:
+            bump_catalog()
+        self.stdout.write(self.style.SUCCESS(f"Stored placeholders for {done} images ({skipped} unreadable)"))
+
+    def save(self, batch):
+        PropertyMedia.objects.bulk_update(batch, PLACEHOLDER_COLUMNS)
+        if batch:
+            self.stdout.write(f"  {len(batch)} images")
+        return len(batch)
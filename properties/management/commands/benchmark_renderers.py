@@ -0,0 +1,102 @@
+import datetime
+import time
+import tracemalloc
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import ORJSONRenderer
+from core.response_utils import success_response
+from properties.cards import cards_for_page
+from properties.models import Property
+from properties.serializers import PropertyCardSerializer, PropertySerializer
+
+
+def synthetic_card(i):
+    return {
+        "id": i, "title": f"Project {i}", "slug": f"project-{i}", "property_type": "APARTMENT",
+        "status": "READY", "price_min": Decimal("4500000.00") + i, "price_max": Decimal("9000000.00") + i,
+        "is_featured": i % 5 == 0, "area": 12, "area_name": "Satellite", "city_name": "Ahmedabad",
+        "state_name": "Gujarat", "units": [{"id": i * 10 + u, "unit_type": f"{u + 2}BHK"} for u in range(3)],
+        "unit_types": ["2BHK", "3BHK", "4BHK"], "unit_price_min": Decimal("4500000.00"),
+        "unit_price_max": Decimal("9500000.00"),
+        "primary_image": {
+            "id": i * 10, "file": f"https://res.cloudinary.com/x/{i}/0.jpg", "renditions": {},
+            "processing_state": "READY", "width": 1600, "height": 1200, "blurhash": "LEHV6nWB2yk8pyo0adR*.7kCMdnj",
+        },
+        "image_count": 6,
+        "property_details": {"total_towers": 4, "total_units": 320, "floors": 14, "current_status": "On time"},
+        "amenities_count": 24, "address_line1": "Near Iscon Cross Road", "address_line2": None,
+        "pincode": "380015", "possession_date": datetime.date(2027, 3, 31),
+        "developer": {"id": 3, "name": "Shivalik Group", "about": "Builder since 1998. " * 20, "logo": None,
+                      "website": "https://example.com", "contact_number": "+919999999999"},
+        "latitude": 23.03, "longitude": 72.51, "distance_km": None,
+    }
+
+
+def synthetic_detail(i):
+    detail = synthetic_card(i)
+    detail.update({
+        "description": "Spacious 2, 3 and 4 BHK homes with a clubhouse. " * 40,
+        "created_at": datetime.datetime(2025, 9, 1, 10, 30, tzinfo=datetime.timezone.utc),
+        "updated_at": datetime.datetime(2025, 10, 1, 10, 30, tzinfo=datetime.timezone.utc),
+        "amenities": [{"id": a, "name": f"Amenity {a}", "icon": "pool", "category": "Leisure"} for a in range(24)],
+        "specifications": [{"id": s, "category": f"Spec {s}", "detail": "Vitrified tiles " * 5} for s in range(12)],
+        "rate_cards": [{"id": r, "name": f"Charge {r}", "amount": Decimal("1250.50"), "unit": "per sq.ft"}
+                       for r in range(8)],
+        "nearby_places": [{"id": n, "name": f"Place {n}", "distance_km": Decimal("1.25"), "travel_time_min": 5}
+                          for n in range(10)],
+    })
+    return detail
+
+
+class Command(BaseCommand):
+    help = "Compare DRF's JSONRenderer with core.renderers.ORJSONRenderer on property payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--from-db", action="store_true", help="Serialize real properties instead of synthetic ones")
+
+    def payloads(self, page_size, from_db):
+        if from_db:
+            page = list(Property.objects.select_related("card")[:page_size])
+            cards = PropertyCardSerializer(cards_for_page(page), many=True).data
+            first = Property.objects.order_by("pk").first()
+            detail = PropertySerializer(first).data if first else {}
+        else:
+            cards = [synthetic_card(i) for i in range(page_size)]
+            detail = synthetic_detail(1)
+        pagination = {"count": 5000, "page": 1, "page_size": page_size, "total_pages": 100, "next": None,
+                      "previous": None}
+        return {
+            f"list ({len(cards)} cards)": success_response(data=cards, pagination=pagination).data,
+            "detail": success_response(data=detail).data,
+        }
+
+    def measure(self, renderer, payload, iterations):
+        renderer.render(payload)  # warm up
+        start = time.perf_counter()
+        for _ in range(iterations):
+            body = renderer.render(payload)
+        elapsed = (time.perf_counter() - start) / iterations
+
+        tracemalloc.start()
+        renderer.render(payload)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed, peak, len(body)
+
+    def handle(self, *args, **options):
+        renderers = [("JSONRenderer", JSONRenderer()), ("ORJSONRenderer", ORJSONRenderer())]
+        for name, payload in self.payloads(options["page_size"], options["from_db"]).items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            baseline = None
+            for renderer_name, renderer in renderers:
+                elapsed, peak, size = self.measure(renderer, payload, options["iterations"])
+                baseline = baseline or elapsed
+                self.stdout.write(
+                    f"  {renderer_name:<15} {elapsed * 1e6:10.1f} us/render  "
+                    f"peak {peak / 1024:8.1f} KiB  body {size / 1024:7.1f} KiB  x{baseline / elapsed:.1f}"
+                )
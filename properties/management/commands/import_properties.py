@@ -0,0 +1,39 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from properties.ingest import IMPORT_BATCH_SIZE, PropertyImporter
+
+
+class Command(BaseCommand):
+    help = "Import nested property documents from an NDJSON file (one property per line)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON file, or - for stdin")
+        parser.add_argument("--user", required=True, help="Username the properties are listed by")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named '{options['user']}'")
+
+        def progress(importer):
+            self.stdout.write(f"  {importer.created} created, {importer.failed} failed")
+
+        importer = PropertyImporter(user, batch_size=options["batch_size"], on_batch=progress)
+        if options["path"] == "-":
+            report = importer.run(sys.stdin)
+        else:
+            with open(options["path"], encoding="utf-8") as lines:
+                report = importer.run(lines)
+
+        for error in report["errors"]:
+            self.stderr.write(f"  line {error['line']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} properties ({report['failed']} failed) "
+            f"in {report['seconds']}s, {report['rows_per_second']} rows/s"
+        ))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from properties.media_queue import pending_task_ids, run_task
+
+
+class Command(BaseCommand):
+    help = "Move staged uploads to the default storage and build their renditions (MEDIA_QUEUE=db worker)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Process the tasks that are due and exit instead of polling")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds between polls of an empty queue")
+        parser.add_argument("--batch-size", type=int, default=50)
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            task_ids = pending_task_ids(options["batch_size"])
+            for task_id in task_ids:
+                processed += run_task(task_id)
+            if task_ids:
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} uploads"))
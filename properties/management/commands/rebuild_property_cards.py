@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from properties.cards import CARD_BATCH_SIZE, refresh_property_cards
+from properties.models import Property
+from properties.response_cache import bump_catalog
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized PropertyCard rows behind the property list endpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument("ids", nargs="*", type=int, help="Only rebuild these property ids")
+        parser.add_argument("--batch-size", type=int, default=CARD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        ids = options["ids"] or list(Property.objects.order_by("pk").values_list("pk", flat=True))
+        batch_size = options["batch_size"]
+
+        total = 0
+        for start in range(0, len(ids), batch_size):
+            total += refresh_property_cards(ids[start:start + batch_size])
+            self.stdout.write(f"  {total}/{len(ids)} cards rebuilt")
+        if total:
+            # Cached list pages were built from the old cards
+            bump_catalog()
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} property cards"))
@@ -0,0 +1,32 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core.renditions import RENDITION_FIELDS, refresh_renditions
+from properties.cards import CARD_BATCH_SIZE, refresh_property_cards
+from properties.models import Property
+from properties.response_cache import bump_catalog
+
+
+class Command(BaseCommand):
+    help = "Build missing or outdated image renditions (thumb/card/hero) for every image field that has them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Rebuild even when the image is unchanged")
+
+    def handle(self, *args, **options):
+        rebuilt = 0
+        for label, (field_name, _) in RENDITION_FIELDS.items():
+            model = apps.get_model(label)
+            count = 0
+            for obj in model.objects.exclude(**{field_name: ""}).exclude(**{f"{field_name}__isnull": True}).iterator():
+                count += refresh_renditions(obj, force=options["force"])
+            self.stdout.write(f"  {label}: {count} rebuilt")
+            rebuilt += count
+
+        # Cards embed media and developer renditions
+        if rebuilt:
+            ids = list(Property.objects.order_by("pk").values_list("pk", flat=True))
+            for start in range(0, len(ids), CARD_BATCH_SIZE):
+                refresh_property_cards(ids[start:start + CARD_BATCH_SIZE])
+            bump_catalog()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt renditions for {rebuilt} images"))
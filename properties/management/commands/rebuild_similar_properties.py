@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from properties.similarity import SIMILAR_TOP_K, rebuild_similar_properties
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored top-k similar properties behind /properties/{id}/similar/ (run periodically)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=SIMILAR_TOP_K)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        links = rebuild_similar_properties(options["top_k"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {links} similar-property links in {time.perf_counter() - started:.2f}s"
+        ))
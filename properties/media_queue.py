@@ -0,0 +1,239 @@
+"""
+Background processing of staged uploads.
+
+A request only writes the upload to local staging (core.storage) and queues
+a MediaTask in the same transaction, so the response goes out right away.
+A worker then moves the file to the default storage, builds its renditions
+and flips the row's processing state from PENDING to READY (or FAILED).
+
+Where the worker runs is set by settings.MEDIA_QUEUE: an in-process thread
+pool ("thread"), `manage.py process_media` ("db") or the request itself
+("inline"). Tasks are rows either way, so nothing is lost if the process
+dies: `process_media` picks up whatever is left. The thread pool resubmits a
+failed task itself once its retry delay is up.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.placeholders import image_placeholder
+from core.renditions import RENDITION_FIELDS, refresh_renditions
+from core.storage import is_staged, promote
+from .cards import refresh_property_cards
+from .models import MediaTask, Property
+from .response_cache import bump_property
+
+logger = logging.getLogger(__name__)
+
+# "app_label.Model" -> (staged file field, processing state field)
+STAGED_FIELDS = {
+    "properties.PropertyMedia": ("file", "processing_state"),
+    "properties.Property": ("brochure_pdf", "brochure_state"),
+}
+
+# Models whose rows also store width/height/blurhash of the upload
+PLACEHOLDER_MODELS = {"properties.PropertyMedia"}
+
+MEDIA_TASK_MAX_ATTEMPTS = 3
+MEDIA_TASK_LOCK_TIMEOUT = timedelta(minutes=10)  # a claim older than this belongs to a dead worker
+MEDIA_TASK_RETRY_DELAY = timedelta(seconds=30)  # doubled after every failed attempt
+
+_executor = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.MEDIA_QUEUE_WORKERS, thread_name_prefix="media")
+    return _executor
+
+
+def mark_pending(instance):
+    """Flag an upload that the next save will stage as PENDING. True if there is one."""
+    field_name, state_field = STAGED_FIELDS[instance._meta.label]
+    field_file = getattr(instance, field_name)
+    if field_file and not field_file._committed:
+        setattr(instance, state_field, "PENDING")
+        return True
+    return False
+
+
+def enqueue(instance):
+    """Queue the instance's staged upload, if it has one. Returns the task or None."""
+    field_name, _ = STAGED_FIELDS[instance._meta.label]
+    staged_name = getattr(instance, field_name).name
+    if not is_staged(staged_name):
+        return None
+
+    task = MediaTask.objects.create(
+        model_label=instance._meta.label, object_id=instance.pk, field_name=field_name, staged_name=staged_name,
+    )
+    if settings.MEDIA_QUEUE == "inline":
+        run_task(task.pk, instance=instance)
+    elif settings.MEDIA_QUEUE == "thread":
+        transaction.on_commit(lambda: submit(task.pk))
+    return task
+
+
+def submit(task_id, delay=None):
+    """Hand a task to the thread pool, right away or once `delay` has passed."""
+    if delay is None:
+        executor().submit(_run_in_thread, task_id)
+        return
+    timer = threading.Timer(delay.total_seconds(), submit, args=(task_id,))
+    timer.daemon = True  # a lost timer is only a delay: process_media still sees the row
+    timer.start()
+
+
+def cancel(instance):
+    """
+    Drop the queued uploads of a deleted row and, once the delete commits,
+    their staged files. Tasks a worker has claimed are left to it: it
+    notices the row is gone and cleans up the same way.
+    """
+    tasks = MediaTask.objects.filter(model_label=instance._meta.label, object_id=instance.pk, locked_at__isnull=True)
+    staged = list(tasks.values_list("field_name", "staged_name"))
+    if not staged:
+        return
+    tasks.delete()
+    model = type(instance)
+    for field_name, staged_name in staged:
+        storage = model._meta.get_field(field_name).storage
+        transaction.on_commit(lambda storage=storage, name=staged_name: storage.delete(name))
+
+
+def _run_in_thread(task_id):
+    close_old_connections()
+    retry_at = None
+    try:
+        run_task(task_id)
+        # Still queued after a failed attempt: come back when its delay is up
+        retry_at = (
+            MediaTask.objects.filter(pk=task_id, attempts__lt=MEDIA_TASK_MAX_ATTEMPTS, locked_at__isnull=True)
+            .values_list("next_attempt_at", flat=True)
+            .first()
+        )
+    except Exception:
+        logger.exception("Media task %s crashed", task_id)
+    finally:
+        close_old_connections()
+    if retry_at is not None:
+        submit(task_id, delay=max(retry_at - timezone.now(), timedelta(0)))
+
+
+def _claimable(now):
+    return (
+        Q(attempts__lt=MEDIA_TASK_MAX_ATTEMPTS)
+        & (Q(locked_at__isnull=True) | Q(locked_at__lt=now - MEDIA_TASK_LOCK_TIMEOUT))
+        & (Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+    )
+
+
+def claim(task_id):
+    """
+    Lock a task for this worker; False if someone else holds it, it is
+    waiting out a retry delay or it has failed for good.
+    """
+    now = timezone.now()
+    return bool(
+        MediaTask.objects.filter(_claimable(now), pk=task_id)
+        .update(locked_at=now, attempts=F("attempts") + 1)
+    )
+
+
+def retry_delay(attempts):
+    """Wait before the next attempt once `attempts` have failed: 30s, 60s, 120s..."""
+    return MEDIA_TASK_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def run_task(task_id, instance=None):
+    """
+    Process one task. `instance` is the in-memory row when running inline; it
+    is updated in place so the request's response shows the promoted file.
+    Returns True when the upload was promoted.
+    """
+    inline = instance is not None
+    if not claim(task_id):
+        return False
+    task = MediaTask.objects.get(pk=task_id)
+    model = apps.get_model(task.model_label)
+    _, state_field = STAGED_FIELDS[task.model_label]
+    if instance is None:
+        instance = model.objects.filter(pk=task.object_id).first()
+    field_file = getattr(instance, task.field_name) if instance is not None else None
+
+    if field_file is None or field_file.name != task.staged_name:
+        # Row deleted, or a newer upload replaced this one (and has its own task)
+        model._meta.get_field(task.field_name).storage.delete(task.staged_name)
+        task.delete()
+        return False
+
+    model.objects.filter(pk=instance.pk).update(**{state_field: "PROCESSING"})
+    # Read while the file is still on local disk
+    placeholder = placeholder_fields(field_file) if task.model_label in PLACEHOLDER_MODELS else {}
+    try:
+        name = promote(field_file)
+    except Exception as exc:
+        logger.warning("Could not promote %s", task, exc_info=True)
+        task.last_error = repr(exc)
+        task.locked_at = None
+        # Back off, so a short storage outage doesn't use up every attempt at once
+        task.next_attempt_at = timezone.now() + retry_delay(task.attempts)
+        task.save(update_fields=["last_error", "locked_at", "next_attempt_at"])
+        state = "FAILED" if task.attempts >= MEDIA_TASK_MAX_ATTEMPTS else "PENDING"
+        model.objects.filter(pk=instance.pk).update(**{state_field: state})
+        setattr(instance, state_field, state)
+        return False
+
+    promoted = model.objects.filter(pk=instance.pk, **{task.field_name: task.staged_name}).update(
+        **{task.field_name: name, state_field: "READY"}, **placeholder
+    )
+    if not promoted:
+        # Replaced while we were copying: keep the row's newer file, drop ours
+        default_storage.delete(name)
+    field_file.storage.delete(task.staged_name)
+    task.delete()
+    if not promoted:
+        return False
+
+    field_file.name = name
+    setattr(instance, state_field, "READY")
+    for attr, value in placeholder.items():
+        setattr(instance, attr, value)
+    if task.model_label in RENDITION_FIELDS:
+        refresh_renditions(instance)
+    if not inline:
+        # Inline, the request's own save signals refresh the card and caches next
+        media_changed(instance)
+    return True
+
+
+def placeholder_fields(field_file):
+    """width/height/blurhash column values for an image ({} when it can't be read)."""
+    try:
+        return image_placeholder(field_file)
+    except OSError:
+        logger.warning("Could not read %s for a placeholder", field_file.name, exc_info=True)
+        return {}
+
+
+def media_changed(instance):
+    property_id = instance.pk if isinstance(instance, Property) else instance.property_id
+    Property.objects.filter(pk=property_id).update(updated_at=timezone.now())
+    refresh_property_cards([property_id])
+    bump_property(property_id)
+
+
+def pending_task_ids(limit=None):
+    """Ids of tasks a worker could claim now, oldest first (retries only once their delay is up)."""
+    tasks = MediaTask.objects.filter(_claimable(timezone.now())).values_list("pk", flat=True)
+    return list(tasks[:limit] if limit else tasks)
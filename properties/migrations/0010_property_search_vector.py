@@ -0,0 +1,66 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:29
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX properties_property_search_gin ON properties_property USING gin (search_vector)"
+        )
+        schema_editor.execute("""
+            UPDATE properties_property p SET search_vector =
+                setweight(to_tsvector('english', concat_ws(' ', p.title, p.slug)), 'A')
+                || setweight(to_tsvector('english', concat_ws(' ',
+                    (SELECT a.name FROM locations_area a WHERE a.id = p.area_id),
+                    (SELECT d.name FROM properties_developer d WHERE d.id = p.developer_id))), 'B')
+                || setweight(to_tsvector('english', concat_ws(' ',
+                    p.description, p.address_line1, p.address_line2, p.pincode)), 'C')
+        """)
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE properties_property_fts USING fts5(title, places, body)"
+        )
+        schema_editor.execute("""
+            INSERT INTO properties_property_fts (rowid, title, places, body)
+            SELECT p.id,
+                   trim(p.title || ' ' || coalesce(p.slug, '')),
+                   trim(coalesce(a.name, '') || ' ' || coalesce(d.name, '')),
+                   trim(p.description || ' ' || coalesce(p.address_line1, '') || ' '
+                        || coalesce(p.address_line2, '') || ' ' || coalesce(p.pincode, ''))
+            FROM properties_property p
+            LEFT JOIN locations_area a ON a.id = p.area_id
+            LEFT JOIN properties_developer d ON d.id = p.developer_id
+        """)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS properties_property_search_gin")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS properties_property_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0005_city_image'),
+        ('properties', '0009_developer_remove_unitplan_size_sqft_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='property',
+            name='property_type',
+            field=models.CharField(choices=[('APARTMENT', 'Apartment'), ('VILLA', 'Villa'), ('RESIDENTIAL', 'Residential'), ('COMMERCIAL', 'Commercial'), ('PLOT', 'Plot')], max_length=30),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:05
+
+from django.db import migrations
+
+TRIGRAM_INDEXES = [
+    ("properties_property_title_trgm", "properties_property", "title"),
+    ("properties_developer_name_trgm", "properties_developer", "name"),
+    ("locations_area_name_trgm", "locations_area", "name"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f"CREATE INDEX {name} ON {table} USING gin ({column} gin_trgm_ops)")
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0005_city_image'),
+        ('properties', '0010_property_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+from properties.geo import geohash_encode
+
+
+def backfill_geohash(apps, schema_editor):
+    Property = apps.get_model("properties", "Property")
+    located = Property.objects.filter(latitude__isnull=False, longitude__isnull=False).only("latitude", "longitude")
+    batch = []
+    for prop in located.iterator(chunk_size=1000):
+        prop.geohash = geohash_encode(prop.latitude, prop.longitude)
+        batch.append(prop)
+        if len(batch) >= 1000:
+            Property.objects.bulk_update(batch, ["geohash"])
+            batch = []
+    Property.objects.bulk_update(batch, ["geohash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0011_suggest_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
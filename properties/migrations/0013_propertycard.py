@@ -0,0 +1,126 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+CARD_BATCH_SIZE = 500
+
+
+def _file_url(field):
+    return field.url if field else None
+
+
+def build_cards(apps, schema_editor):
+    # Same payload as properties.cards.build_card at this point in the schema
+    Property = apps.get_model("properties", "Property")
+    PropertyCard = apps.get_model("properties", "PropertyCard")
+    properties = (
+        Property.objects.select_related("area__city__state", "developer", "details")
+        .prefetch_related("media", "units")
+        .annotate(amenities_total=Count("amenities", distinct=True))
+        .order_by("pk")
+    )
+
+    cards = []
+    for prop in properties.iterator(chunk_size=CARD_BATCH_SIZE):
+        area = prop.area
+        city = area.city if area else None
+        developer = prop.developer
+        images = [m for m in prop.media.all() if m.media_type == "IMAGE"]
+        primary = next((m for m in images if m.is_primary), images[0] if images else None)
+        units = list(prop.units.all())
+        unit_prices = [u.price for u in units if u.price is not None]
+        details = getattr(prop, "details", None)
+        cards.append(PropertyCard(
+            property_id=prop.pk,
+            title=prop.title,
+            slug=prop.slug,
+            property_type=prop.property_type,
+            status=prop.status,
+            price_min=prop.price_min,
+            price_max=prop.price_max,
+            is_featured=prop.is_featured,
+            possession_date=prop.possession_date,
+            address_line1=prop.address_line1,
+            address_line2=prop.address_line2,
+            pincode=prop.pincode,
+            latitude=prop.latitude,
+            longitude=prop.longitude,
+            area_id=area.pk if area else None,
+            area_name=area.name if area else None,
+            city_name=city.name if city else None,
+            state_name=city.state.name if city else None,
+            developer={
+                "id": developer.pk,
+                "name": developer.name,
+                "about": developer.about,
+                "logo": _file_url(developer.logo),
+                "website": developer.website,
+                "contact_number": developer.contact_number,
+            } if developer else None,
+            primary_image=_file_url(primary.file) if primary else None,
+            images=[
+                {"id": m.pk, "media_type": m.media_type, "file": _file_url(m.file), "is_primary": m.is_primary}
+                for m in images
+            ],
+            units=[{"id": u.pk, "unit_type": u.unit_type} for u in units],
+            unit_types=list(dict.fromkeys(u.unit_type for u in units)),
+            unit_price_min=min(unit_prices) if unit_prices else None,
+            unit_price_max=max(unit_prices) if unit_prices else None,
+            details={
+                "total_towers": details.total_towers,
+                "total_units": details.total_units,
+                "floors": details.floors,
+                "current_status": details.current_status,
+            } if details else None,
+            amenities_count=prop.amenities_total,
+        ))
+        if len(cards) >= CARD_BATCH_SIZE:
+            PropertyCard.objects.bulk_create(cards)
+            cards = []
+    PropertyCard.objects.bulk_create(cards)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0012_property_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyCard',
+            fields=[
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='properties.property')),
+                ('title', models.CharField(max_length=200)),
+                ('slug', models.SlugField()),
+                ('property_type', models.CharField(max_length=30)),
+                ('status', models.CharField(max_length=30)),
+                ('price_min', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('price_max', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('possession_date', models.DateField(blank=True, null=True)),
+                ('address_line1', models.CharField(blank=True, max_length=255, null=True)),
+                ('address_line2', models.CharField(blank=True, max_length=255, null=True)),
+                ('pincode', models.CharField(blank=True, max_length=10, null=True)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('area_id', models.BigIntegerField(blank=True, null=True)),
+                ('area_name', models.CharField(blank=True, max_length=150, null=True)),
+                ('city_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('state_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('developer', models.JSONField(blank=True, null=True)),
+                ('primary_image', models.CharField(blank=True, max_length=500, null=True)),
+                ('images', models.JSONField(blank=True, default=list)),
+                ('units', models.JSONField(blank=True, default=list)),
+                ('unit_types', models.JSONField(blank=True, default=list)),
+                ('unit_price_min', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('unit_price_max', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('details', models.JSONField(blank=True, null=True)),
+                ('amenities_count', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(build_cards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:10
+
+from django.db import migrations, models
+from django.db.models import Max, Min
+
+AGGREGATE_FIELDS = ["rooms_min", "rooms_max", "carpet_min", "carpet_max", "ppsf_min", "ppsf_max"]
+
+
+def backfill_unit_aggregates(apps, schema_editor):
+    PropertyCard = apps.get_model("properties", "PropertyCard")
+    UnitPlan = apps.get_model("properties", "UnitPlan")
+    aggregates = {
+        row.pop("property_id"): row
+        for row in UnitPlan.objects.values("property_id").annotate(
+            rooms_min=Min("rooms"), rooms_max=Max("rooms"),
+            carpet_min=Min("carpet_area_sqft"), carpet_max=Max("carpet_area_sqft"),
+            ppsf_min=Min("price_per_sqft"), ppsf_max=Max("price_per_sqft"),
+        )
+    }
+    cards = list(PropertyCard.objects.filter(property_id__in=list(aggregates)))
+    for card in cards:
+        for name, value in aggregates[card.property_id].items():
+            setattr(card, name, value)
+    PropertyCard.objects.bulk_update(cards, AGGREGATE_FIELDS, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0014_property_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertycard',
+            name='carpet_max',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertycard',
+            name='carpet_min',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertycard',
+            name='ppsf_max',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertycard',
+            name='ppsf_min',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertycard',
+            name='rooms_max',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertycard',
+            name='rooms_min',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_unit_aggregates, migrations.RunPython.noop),
+    ]
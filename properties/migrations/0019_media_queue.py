@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:05
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0018_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=100)),
+                ('object_id', models.BigIntegerField()),
+                ('field_name', models.CharField(max_length=50)),
+                ('staged_name', models.CharField(max_length=255)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='brochure_state',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('PROCESSING', 'Processing'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='READY', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='propertymedia',
+            name='processing_state',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('PROCESSING', 'Processing'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='READY', editable=False, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='property',
+            name='brochure_pdf',
+            field=models.FileField(blank=True, null=True, storage=core.storage.staged_storage, upload_to='brochures/'),
+        ),
+        migrations.AlterField(
+            model_name='propertymedia',
+            name='file',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.staged_storage, upload_to='housingwalaa/property/media/'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_primary_images(apps, schema_editor):
+    Property = apps.get_model("properties", "Property")
+    PropertyCard = apps.get_model("properties", "PropertyCard")
+    PropertyMedia = apps.get_model("properties", "PropertyMedia")
+
+    # Flagged image first, else the first uploaded
+    summary = {}
+    images = PropertyMedia.objects.filter(media_type="IMAGE").order_by("-is_primary", "pk")
+    for property_id, media_id in images.values_list("property_id", "pk"):
+        entry = summary.setdefault(property_id, [media_id, 0])
+        entry[1] += 1
+    Property.objects.bulk_update(
+        [Property(pk=pk, primary_image_id=primary, image_count=count) for pk, (primary, count) in summary.items()],
+        ["primary_image", "image_count"],
+        batch_size=1000,
+    )
+
+    # Cards get the same pick, read from the media rows: cards built by the
+    # 0013 backfill predate renditions and placeholders
+    media = PropertyMedia.objects.in_bulk([primary for primary, _ in summary.values()])
+    cards = list(PropertyCard.objects.filter(pk__in=list(summary)).only("pk"))
+    for card in cards:
+        primary_id, card.image_count = summary[card.pk]
+        primary = media[primary_id]
+        card.primary_media = {
+            "id": primary.pk,
+            "file": primary.file.url if primary.file else None,
+            "renditions": primary.renditions,
+            "processing_state": primary.processing_state,
+            "width": primary.width,
+            "height": primary.height,
+            "blurhash": primary.blurhash,
+        }
+    PropertyCard.objects.bulk_update(cards, ["primary_media", "image_count"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0020_media_placeholders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='image_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='primary_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='properties.propertymedia'),
+        ),
+        migrations.AddField(
+            model_name='propertycard',
+            name='image_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='propertycard',
+            name='primary_media',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_primary_images, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='propertycard',
+            name='images',
+        ),
+        migrations.RemoveField(
+            model_name='propertycard',
+            name='primary_image',
+        ),
+    ]
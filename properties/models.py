@@ -1,13 +1,27 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.text import slugify
 from accounts.models import User
 from locations.models import Area
+from core.storage import staged_storage
+from properties.geo import geohash_encode
+
+
+# Upload lifecycle of staged files (see properties.media_queue)
+PROCESSING_STATES = [
+    ("PENDING", "Pending"),
+    ("PROCESSING", "Processing"),
+    ("READY", "Ready"),
+    ("FAILED", "Failed"),
+]
 
 
 class Developer(models.Model):
     name = models.CharField(max_length=200)
     about = models.TextField(null=True, blank=True)
     logo = models.ImageField(upload_to="housingwalaa/developers/logos/", null=True, blank=True)
+    # Resized copies of the logo, see core.renditions
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     website = models.URLField(null=True, blank=True)
     contact_number = models.CharField(max_length=20, null=True, blank=True)
 
@@ -42,6 +56,8 @@ class Property(models.Model):
     pincode = models.CharField(max_length=10, null=True, blank=True)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    # Derived from latitude/longitude on save; prefix-indexed for radius/bbox lookups
+    geohash = models.CharField(max_length=12, null=True, blank=True, editable=False, db_index=True)
 
     PROPERTY_TYPES = [
         ("APARTMENT", "Apartment"),
@@ -68,17 +84,73 @@ class Property(models.Model):
     
     is_featured = models.BooleanField(default=False)
     highlights = models.TextField(null=True, blank=True)  # "Why this project points"
-    brochure_pdf = models.FileField(upload_to="brochures/", null=True, blank=True)
+    brochure_pdf = models.FileField(upload_to="brochures/", storage=staged_storage, null=True, blank=True)
+    brochure_state = models.CharField(max_length=20, choices=PROCESSING_STATES, default="READY", editable=False)
+    # Listing picture and how many images there are, kept in step with the media rows (properties.cards)
+    primary_image = models.ForeignKey(
+        "PropertyMedia", on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name="+",
+    )
+    image_count = models.PositiveIntegerField(default=0, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also touched when child rows (media, units, details, ...) change; see properties.signals
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Weighted full-text document, maintained by properties.signals (Postgres only)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geohash_encode(self.latitude, self.longitude)
+        else:
+            self.geohash = None
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None and not self._state.adding and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = update_fields = self.saved_fields()
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geohash"}
         super().save(*args, **kwargs)
 
+    def saved_fields(self):
+        """
+        Fields a plain save() of an existing row writes: all loaded ones except
+        those the media pipeline keeps current through queryset updates
+        (properties.cards, properties.media_queue), so saving a copy loaded
+        earlier can't put their old values back. The brochure is written
+        only when it is a new upload or was cleared. Pass `update_fields` to
+        write them anyway.
+        """
+        deferred = self.get_deferred_fields()
+        skip = {"primary_image", "image_count"}
+        if "brochure_pdf" in deferred:
+            skip.add("brochure_state")
+        elif not self.brochure_pdf:
+            self.brochure_state = "READY"  # cleared: nothing left to process
+        elif self.brochure_pdf._committed:
+            # Not a new upload; the queue may have promoted it since we loaded it
+            skip |= {"brochure_pdf", "brochure_state"}
+        return [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname not in deferred and field.name not in skip
+        ]
+
     class Meta:
         ordering = ["-created_at", "id"]
+        # Access paths of the list endpoint (PropertyFilter + ordering); the
+        # plans are pinned by PropertyQueryPlanTests
+        indexes = [
+            models.Index(fields=["-created_at", "id"], name="property_recent_idx"),
+            models.Index(fields=["property_type", "status", "-created_at", "id"], name="property_type_status_idx"),
+            models.Index(fields=["status", "-created_at", "id"], name="property_status_idx"),
+            models.Index(fields=["area", "-created_at", "id"], name="property_area_recent_idx"),
+            models.Index(fields=["price_min", "id"], name="property_price_min_idx"),
+            models.Index(fields=["price_max", "id"], name="property_price_max_idx"),
+            models.Index(
+                fields=["-created_at", "id"], condition=models.Q(is_featured=True), name="property_featured_idx"
+            ),
+        ]
         
     def __str__(self):
         return self.title
@@ -116,10 +188,16 @@ class PropertyMedia(models.Model):
 
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name="media")
     media_type = models.CharField(max_length=20, choices=MEDIA_TYPES)
-    file = models.ImageField(upload_to="housingwalaa/property/media/", null=True, blank=True)
+    file = models.ImageField(upload_to="housingwalaa/property/media/", storage=staged_storage, null=True, blank=True)
     video_url = models.URLField(null=True, blank=True)
     virtual_tour_url = models.URLField(null=True, blank=True)
     is_primary = models.BooleanField(default=False)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
+    processing_state = models.CharField(max_length=20, choices=PROCESSING_STATES, default="READY", editable=False)
+    # Placeholder shown until the image loads (core.placeholders), set with the file
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    blurhash = models.CharField(max_length=64, blank=True, editable=False)
 
     def __str__(self):
         return f"{self.property.title} - {self.media_type}"
@@ -140,6 +218,7 @@ class UnitPlan(models.Model):
     price_per_sqft = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     
     floor_plan_image = models.ImageField(upload_to="housingwalaa/unit_plans/", null=True, blank=True)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return f"{self.unit_type} - {self.property.title}"
@@ -171,4 +250,97 @@ class NearbyPlace(models.Model):
     travel_time_min = models.IntegerField(null=True, blank=True)
 
     def __str__(self):
-        return f"{self.property.title} - {self.name}"
\ No newline at end of file
+        return f"{self.property.title} - {self.name}"
+
+class PropertyCard(models.Model):
+    """
+    Flat, denormalized listing row for one property (the read model behind
+    PropertyViewSet.list). Maintained by properties.signals; rebuild with
+    `manage.py rebuild_property_cards`.
+    """
+    property = models.OneToOneField(Property, on_delete=models.CASCADE, primary_key=True, related_name="card")
+
+    title = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=50)
+    property_type = models.CharField(max_length=30)
+    status = models.CharField(max_length=30)
+    price_min = models.DecimalField(max_digits=15, decimal_places=2)
+    price_max = models.DecimalField(max_digits=15, decimal_places=2)
+    is_featured = models.BooleanField(default=False)
+    possession_date = models.DateField(null=True, blank=True)
+    address_line1 = models.CharField(max_length=255, null=True, blank=True)
+    address_line2 = models.CharField(max_length=255, null=True, blank=True)
+    pincode = models.CharField(max_length=10, null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+
+    area_id = models.BigIntegerField(null=True, blank=True)
+    area_name = models.CharField(max_length=150, null=True, blank=True)
+    city_name = models.CharField(max_length=100, null=True, blank=True)
+    state_name = models.CharField(max_length=100, null=True, blank=True)
+    developer = models.JSONField(null=True, blank=True)  # id, name, about, logo, website, contact_number
+
+    primary_media = models.JSONField(null=True, blank=True)  # {id, file, renditions, processing_state, width, height, blurhash}
+    image_count = models.PositiveIntegerField(default=0)
+    units = models.JSONField(default=list, blank=True)  # [{id, unit_type}]
+    unit_types = models.JSONField(default=list, blank=True)  # distinct unit_type values
+    unit_price_min = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    unit_price_max = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    # Unit aggregates: indexed range prefilter for the unit-level filters/ordering (PropertyFilter)
+    rooms_min = models.IntegerField(null=True, blank=True, db_index=True)
+    rooms_max = models.IntegerField(null=True, blank=True, db_index=True)
+    carpet_min = models.IntegerField(null=True, blank=True, db_index=True)
+    carpet_max = models.IntegerField(null=True, blank=True, db_index=True)
+    ppsf_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, db_index=True)
+    ppsf_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, db_index=True)
+    details = models.JSONField(null=True, blank=True)  # total_towers, total_units, floors, current_status
+    amenities_count = models.PositiveIntegerField(default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Card of {self.title}"
+
+
+class SimilarProperty(models.Model):
+    """
+    Precomputed "similar properties" neighbour list (top-k by cosine
+    similarity of feature vectors); rebuilt by properties.similarity.
+    """
+    TOP_K = 12  # neighbours stored per property
+
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name="similar_links")
+    similar = models.ForeignKey(Property, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ["property", "rank"]
+        constraints = [
+            models.UniqueConstraint(fields=["property", "rank"], name="similar_property_rank_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.property_id} -> {self.similar_id} (#{self.rank})"
+
+
+class MediaTask(models.Model):
+    """
+    A staged upload waiting to be moved to the default storage: the DB-backed
+    queue behind properties.media_queue.
+    """
+    model_label = models.CharField(max_length=100)  # "app_label.Model"
+    object_id = models.BigIntegerField()
+    field_name = models.CharField(max_length=50)
+    staged_name = models.CharField(max_length=255)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)  # retry backoff after a failed attempt
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+
+    def __str__(self):
+        return f"{self.model_label}#{self.object_id}.{self.field_name}"
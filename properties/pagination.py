@@ -0,0 +1,192 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from django.utils.encoding import force_str
+from rest_framework import filters
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from core.response_utils import success_response
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Opt-in keyset pagination: `?pagination=cursor` or any `?cursor=` switches to it.
+
+    Pages are addressed by the ordering values of the last (or first) row seen,
+    encoded in an opaque cursor, so every page is a single indexed range scan
+    with no COUNT(*) and no OFFSET. The ordering comes from `?ordering=` (limited
+    to the view's `ordering_fields`) or the view's default, and `id` is always
+    appended as a tiebreaker so cursors are stable.
+
+    Nullable keys (the unit aggregates, `distance`) sort NULLs last in either
+    direction, and a NULL is kept as null in the cursor. Under `?search=` with
+    no explicit ordering, pages follow the search rank like the page-number
+    listing does.
+    """
+
+    mode_query_param = "pagination"
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    invalid_cursor_message = "Invalid cursor"
+
+    @classmethod
+    def requested(cls, request):
+        return (
+            request.query_params.get(cls.mode_query_param) == "cursor"
+            or cls.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.nullable = {field.lstrip("-") for field in self.ordering if self._is_nullable(queryset, field.lstrip("-"))}
+        self.has_next = self.has_previous = False
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = bool(cursor and cursor["r"])
+        queryset = queryset.order_by(*(self._order_by(f, reverse) for f in self.ordering))
+        if cursor is not None:
+            queryset = queryset.filter(self._after(cursor["v"], reverse))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(filters.OrderingFilter().get_ordering(request, queryset, view) or ["-id"])
+        if "search_rank" in queryset.query.annotations and not request.query_params.get(api_settings.ORDERING_PARAM):
+            # Same order PropertySearchFilter gives the page-number listing
+            ordering.insert(0, "-search_rank")
+        if not {"id", "-id"} & set(ordering):
+            ordering.append("id")
+        return ordering
+
+    # Cursors
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_pagination_meta(self):
+        return {
+            "mode": "cursor",
+            "page_size": self.page_size,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+        }
+
+    def get_paginated_response(self, data):
+        return success_response(data=data, pagination=self.get_pagination_meta())
+
+    def encode_cursor(self, obj, reverse):
+        values = [self._dump(getattr(obj, field.lstrip("-"))) for field in self.ordering]
+        token = json.dumps({"o": self.ordering, "v": values, "r": int(reverse)}, separators=(",", ":"))
+        encoded = base64.urlsafe_b64encode(token.encode("ascii")).decode("ascii")
+        url = remove_query_param(self.base_url, self.mode_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")).decode("ascii"))
+            if cursor["o"] != self.ordering or len(cursor["v"]) != len(self.ordering):
+                raise ValueError
+            cursor["v"] = [self._load(model, field.lstrip("-"), value) for field, value in zip(self.ordering, cursor["v"])]
+        except (TypeError, ValueError, KeyError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    # Keyset filtering
+
+    @staticmethod
+    def _is_nullable(queryset, name):
+        try:
+            return queryset.model._meta.get_field(name).null
+        except FieldDoesNotExist:
+            pass
+        # Annotations: F() of a column knows its field, computed values may be NULL
+        target = getattr(queryset.query.annotations.get(name), "target", None)
+        return target.null if target is not None else True
+
+    def _order_by(self, field, reverse):
+        descending = field.startswith("-") != reverse
+        name = field.lstrip("-")
+        if name not in self.nullable:
+            return f"-{name}" if descending else name
+        # NULLs last going forward, so first when walking back from a previous cursor
+        nulls = {"nulls_first": True} if reverse else {"nulls_last": True}
+        return F(name).desc(**nulls) if descending else F(name).asc(**nulls)
+
+    def _after(self, values, reverse):
+        # (a, b, c) > (va, vb, vc) expanded as a lexicographic OR of ANDs
+        condition = Q(pk__in=[])
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            descending = field.startswith("-") != reverse
+            name = field.lstrip("-")
+            if value is None:
+                # Inside the trailing NULL block: nothing follows it, everything precedes it
+                beyond = Q(**{f"{name}__isnull": False}) if reverse else Q(pk__in=[])
+                same = Q(**{f"{name}__isnull": True})
+            else:
+                beyond = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+                if name in self.nullable and not reverse:
+                    beyond |= Q(**{f"{name}__isnull": True})
+                same = Q(**{name: value})
+            condition |= equal & beyond
+            equal &= same
+        return condition
+
+    @staticmethod
+    def _load(model, name, value):
+        if value is None:
+            return None
+        try:
+            return model._meta.get_field(name).to_python(value)
+        except FieldDoesNotExist:
+            # Annotations such as `distance` are plain JSON numbers
+            return value
+
+    @staticmethod
+    def _dump(value):
+        if value is None:
+            return None
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return force_str(value) if not isinstance(value, (int, float)) else value
@@ -0,0 +1,106 @@
+"""
+Versioned response cache for the property endpoints.
+
+Cached payloads are keyed on the normalized request plus version counters;
+signals bump the counters (see properties.signals), which makes every entry
+built under the old version unreachable at once instead of waiting for a TTL:
+
+- catalog:   any property or child row changed (list, facets, clusters)
+- property:  that one property or its children changed (retrieve)
+- reference: developers, amenities or locations changed (list and retrieve)
+
+Counters are only shared between workers through a shared backend (Redis
+in production); with the local-memory fallback each process has its own.
+"""
+
+import hashlib
+import time
+
+from django.core.cache import cache
+
+RESPONSE_CACHE_TTL = 60 * 60
+RESPONSE_CACHE_PREFIX = "properties:response"
+
+CATALOG_VERSION_KEY = "properties:version:catalog"
+REFERENCE_VERSION_KEY = "properties:version:reference"
+PROPERTY_VERSION_KEY = "properties:version:property:{pk}"
+CATALOG_MODIFIED_KEY = "properties:modified:catalog"
+REFERENCE_MODIFIED_KEY = "properties:modified:reference"
+PROPERTY_MODIFIED_KEY = "properties:modified:property:{pk}"
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a lost counter never reuses an old version
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def get_modified(key, default=time.time):
+    """Unix time of the last bump of a counter (seeded with `default()`, now)."""
+    modified = cache.get(key)
+    if modified is None:
+        cache.add(key, default(), None)
+        modified = cache.get(key)
+    return modified
+
+
+def seed_property_modified(pk, updated_at):
+    """Seed a property's bump time from its `updated_at`, unless one is cached."""
+    cache.add(PROPERTY_MODIFIED_KEY.format(pk=pk), updated_at.timestamp(), None)
+
+
+def bump_catalog():
+    bump_version(CATALOG_VERSION_KEY)
+    cache.set(CATALOG_MODIFIED_KEY, time.time(), None)
+
+
+def bump_property(pk):
+    bump_version(PROPERTY_VERSION_KEY.format(pk=pk))
+    cache.set(PROPERTY_MODIFIED_KEY.format(pk=pk), time.time(), None)
+    bump_catalog()
+
+
+def bump_reference():
+    bump_version(REFERENCE_VERSION_KEY)
+    cache.set(REFERENCE_MODIFIED_KEY, time.time(), None)
+    bump_catalog()
+
+
+def catalog_version():
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def normalized_request(request):
+    """Host, path and sorted query string: the parts a cached payload depends on."""
+    params = sorted((name, sorted(values)) for name, values in request.query_params.lists())
+    query = "&".join(f"{name}={','.join(values)}" for name, values in params)
+    return f"{request.get_host()}{request.path}?{query}"
+
+
+def list_cache_key(request):
+    raw = f"{normalized_request(request)}|c{catalog_version()}|r{get_version(REFERENCE_VERSION_KEY)}"
+    return f"{RESPONSE_CACHE_PREFIX}:list:{hashlib.md5(raw.encode('utf-8')).hexdigest()}"
+
+
+def detail_cache_key(request, pk):
+    property_version = get_version(PROPERTY_VERSION_KEY.format(pk=pk))
+    raw = f"{normalized_request(request)}|p{pk}.{property_version}|r{get_version(REFERENCE_VERSION_KEY)}"
+    return f"{RESPONSE_CACHE_PREFIX}:detail:{hashlib.md5(raw.encode('utf-8')).hexdigest()}"
+
+
+def get_cached(key):
+    return cache.get(key)
+
+
+def set_cached(key, data, pagination=None):
+    cache.set(key, {"data": data, "pagination": pagination}, RESPONSE_CACHE_TTL)
@@ -0,0 +1,117 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .models import Property
+
+SEARCH_CONFIG = "english"
+FTS_TABLE = "properties_property_fts"
+
+
+def search_document(prop):
+    """
+    Weighted text of a property: title (A) > area/developer (B) > description/address (C).
+    """
+    return {
+        "A": " ".join(filter(None, [prop.title, prop.slug])),
+        "B": " ".join(filter(None, [
+            prop.area.name if prop.area_id else None,
+            prop.developer.name if prop.developer_id else None,
+        ])),
+        "C": " ".join(filter(None, [
+            prop.description, prop.address_line1, prop.address_line2, prop.pincode,
+        ])),
+    }
+
+
+def update_search_index(property_ids):
+    """
+    Refresh the search document of the given properties.
+
+    Postgres keeps it in `Property.search_vector` (GIN indexed), SQLite in an
+    FTS5 table keyed by property id. Writes go through `bulk_update()`/raw SQL,
+    one statement for all the ids, so no save signals fire again.
+    """
+    properties = list(Property.objects.filter(pk__in=list(property_ids)).select_related("area", "developer"))
+
+    if connection.vendor == "postgresql":
+        for prop in properties:
+            doc = search_document(prop)
+            prop.search_vector = (
+                SearchVector(Value(doc["A"]), weight="A", config=SEARCH_CONFIG)
+                + SearchVector(Value(doc["B"]), weight="B", config=SEARCH_CONFIG)
+                + SearchVector(Value(doc["C"]), weight="C", config=SEARCH_CONFIG)
+            )
+        Property.objects.bulk_update(properties, ["search_vector"], batch_size=500)
+
+    elif connection.vendor == "sqlite" and properties:
+        rows = []
+        for prop in properties:
+            doc = search_document(prop)
+            rows.append([prop.pk, doc["A"], doc["B"], doc["C"]])
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, places, body) VALUES (%s, %s, %s, %s)", rows
+            )
+
+
+def remove_from_search_index(property_id):
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [property_id])
+
+
+def fts5_match_expression(terms):
+    # Quote every term so user input can't inject FTS5 syntax; prefix-match each one
+    return " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+def tsquery_prefix_expression(terms):
+    # to_tsquery twin of fts5_match_expression: every term quoted and prefix-matched
+    return " & ".join("'{}':*".format(term.replace("\\", "\\\\").replace("'", "''")) for term in terms)
+
+
+class PropertySearchFilter(filters.SearchFilter):
+    """
+    Full-text drop-in for DRF's SearchFilter behind the same `?search=` parameter.
+
+    Ranks matches by relevance unless the client asked for an explicit
+    `?ordering=`. Other database backends fall back to the icontains search
+    over `search_fields`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        if connection.vendor == "postgresql":
+            query = SearchQuery(tsquery_prefix_expression(terms), search_type="raw", config=SEARCH_CONFIG)
+            # ts_rank is a float4; as double precision it survives a round trip
+            # through a keyset cursor exactly
+            queryset = queryset.filter(search_vector=query).annotate(
+                search_rank=Cast(SearchRank(F("search_vector"), query), FloatField())
+            )
+        elif connection.vendor == "sqlite":
+            match = fts5_match_expression(terms)
+            table = queryset.model._meta.db_table
+            queryset = queryset.filter(
+                pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+            ).annotate(
+                search_rank=RawSQL(
+                    f"SELECT -bm25({FTS_TABLE}, 10.0, 5.0, 1.0) FROM {FTS_TABLE} "
+                    f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {table}.id",
+                    (match,),
+                    output_field=FloatField(),
+                )
+            )
+        else:
+            return super().filter_queryset(request, queryset, view)
+
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return queryset
+        return queryset.order_by("-search_rank", *getattr(view, "ordering", []))
@@ -1,5 +1,97 @@
-from rest_framework import serializers
-from .models import Developer, NearbyPlace, Property, PropertyDetails, PropertyMedia, RateCard, UnitPlan, Amenity, Specification
+from django.db import models, transaction
+from rest_framework import permissions, serializers
+from core.renditions import RENDITION_FIELDS, refresh_renditions
+from core.storage import is_staged
+from .cards import refresh_primary_images, refresh_property_cards
+from .media_queue import STAGED_FIELDS, enqueue, mark_pending
+from .response_cache import bump_property
+from .models import Developer, NearbyPlace, Property, PropertyCard, PropertyDetails, PropertyMedia, RateCard, UnitPlan, Amenity, Specification
+
+ALL_FIELDS = "*"
+PLAIN_FIELDS = "+"  # every field that isn't a nested serializer
+
+
+def field_spec(query_params):
+    """
+    Parse `?fields=` / `?expand=` into a tree of wanted fields, or None for everything.
+
+    `fields` picks fields (dotted paths reach into nested serializers, e.g.
+    `developer.name`); `expand` adds whole nested relations to that selection,
+    e.g. `?fields=id,title&expand=units,developer`. `expand` on its own makes
+    relations opt-in: the plain fields plus only the expanded relations.
+    """
+    fields = query_params.get("fields")
+    expand = query_params.get("expand")
+    if not fields and not expand:
+        return None
+    spec = {} if fields else {PLAIN_FIELDS: {}}
+    for path in (fields or "").split(",") + (expand or "").split(","):
+        parts = [part for part in path.strip().split(".") if part]
+        if not parts:
+            continue
+        node = spec
+        for part in parts:
+            node = node.setdefault(part, {})
+        node[ALL_FIELDS] = {}
+    return spec
+
+
+def prune_fields(fields, spec):
+    """Drop every field (recursively into nested serializers) not in `spec`."""
+    if spec is None or ALL_FIELDS in spec:
+        return fields
+    for name in list(fields):
+        nested = getattr(fields[name], "child", fields[name])
+        is_relation = isinstance(nested, serializers.BaseSerializer)
+        if name not in spec:
+            if is_relation or PLAIN_FIELDS not in spec:
+                del fields[name]
+            continue
+        if is_relation:
+            prune_fields(nested.fields, spec[name])
+    return fields
+
+
+class SparseFieldsetMixin:
+    """
+    Lets clients trim the payload with `?fields=` / `?expand=` (see field_spec).
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return fields
+        return prune_fields(fields, field_spec(request.query_params))
+
+
+class StagedFileMixin:
+    """
+    Reads as null while the upload waits in local staging (see
+    properties.media_queue): that directory isn't served, so its URL would
+    be a broken link.
+    """
+
+    def to_representation(self, value):
+        if value and is_staged(value.name):
+            return None
+        return super().to_representation(value)
+
+
+class StagedFileField(StagedFileMixin, serializers.FileField):
+    pass
+
+
+class StagedImageField(StagedFileMixin, serializers.ImageField):
+    pass
+
+
+STAGED_FIELD_MAPPING = {
+    **serializers.ModelSerializer.serializer_field_mapping,
+    models.FileField: StagedFileField,
+    models.ImageField: StagedImageField,
+}
+
 
 class AmenitySerializer(serializers.ModelSerializer):
     class Meta:
@@ -7,11 +99,13 @@ class AmenitySerializer(serializers.ModelSerializer):
         fields = ("id", "name", "icon", "category")
 
 class PropertyMediaSerializer(serializers.ModelSerializer):
+    serializer_field_mapping = STAGED_FIELD_MAPPING
+
     class Meta:
         model = PropertyMedia
         fields = [
             "id", "media_type", "file", "video_url", "virtual_tour_url", 
-            "is_primary", "property"
+            "is_primary", "renditions", "processing_state", "width", "height", "blurhash", "property"
         ]
 
 class UnitPlanSerializer(serializers.ModelSerializer):
@@ -20,7 +114,7 @@ class UnitPlanSerializer(serializers.ModelSerializer):
         fields = (
             "id", "unit_type", "rooms", "bathrooms", "balconies",
             "carpet_area_sqft", "builtup_area_sqft", "super_builtup_area_sqft",
-            "price", "price_per_sqft", "floor_plan_image", "property"
+            "price", "price_per_sqft", "floor_plan_image", "renditions", "property"
         )
 
 class SpecificationSerializer(serializers.ModelSerializer):
@@ -51,43 +145,27 @@ class NearbyPlaceSerializer(serializers.ModelSerializer):
 class DeveloperSerializer(serializers.ModelSerializer):
     class Meta:
         model = Developer
-        fields = ("id", "name", "about", "logo", "website", "contact_number")
-
-class PropertyDetailsListSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = PropertyDetails
-        fields = (
-            "total_towers",
-            "total_units",
-            "floors",
-            "current_status",
-        )
+        fields = ("id", "name", "about", "logo", "renditions", "website", "contact_number")
 
-class PropertyMediaListSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = PropertyMedia
-        fields = [
-            "id", "media_type", "file","is_primary"
-        ]
-
-class UnitPlanListSerializer(serializers.ModelSerializer):
+class MatchedUnitSerializer(serializers.ModelSerializer):
     class Meta:
         model = UnitPlan
-        fields = (
-            "id", "unit_type",
-        )
+        fields = ("id", "unit_type", "rooms", "carpet_area_sqft", "price", "price_per_sqft")
 
-class PropertyListSerializer(serializers.ModelSerializer):
-    developer = DeveloperSerializer(read_only=True)
-    area_name = serializers.CharField(source="area.name", read_only=True)
-    property_details = PropertyDetailsListSerializer(source="details", read_only=True)
-    # property_media = PropertyMediaListSerializer(source="media", many=True, read_only=True)
-    property_media = serializers.SerializerMethodField()
-    units = UnitPlanListSerializer(many=True, required=False)
-    amenities_count = serializers.SerializerMethodField()
+class PropertyCardSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    List payload read straight from the PropertyCard read model: the listing
+    fields plus city/state names and unit price range.
+    """
+    id = serializers.IntegerField(source="property_id", read_only=True)
+    area = serializers.IntegerField(source="area_id", read_only=True)
+    primary_image = serializers.JSONField(source="primary_media", read_only=True)
+    property_details = serializers.JSONField(source="details", read_only=True)
+    distance_km = serializers.SerializerMethodField()
+    matched_units = serializers.SerializerMethodField()
 
     class Meta:
-        model = Property
+        model = PropertyCard
         fields = (
             "id",
             "title",
@@ -99,8 +177,14 @@ class PropertyListSerializer(serializers.ModelSerializer):
             "is_featured",
             "area",
             "area_name",
+            "city_name",
+            "state_name",
             "units",
-            "property_media",
+            "unit_types",
+            "unit_price_min",
+            "unit_price_max",
+            "primary_image",
+            "image_count",
             "property_details",
             "amenities_count",
             "address_line1",
@@ -108,92 +192,176 @@ class PropertyListSerializer(serializers.ModelSerializer):
             "pincode",
             "possession_date",
             "developer",
+            "latitude",
+            "longitude",
+            "distance_km",
+            "matched_units",
+        )
+
+    def get_distance_km(self, obj):
+        # Carried over from the Property row by cards_for_page
+        distance = getattr(obj, "distance", None)
+        return round(distance, 3) if distance is not None else None
+
+    def get_matched_units(self, obj):
+        # Set by PropertyViewSet.list when unit-level filters are given
+        units = getattr(obj, "matched_units", None)
+        return MatchedUnitSerializer(units, many=True).data if units is not None else None
+
+
+def nested_child(serializer_class):
+    """
+    Variant of a child serializer for nesting under PropertySerializer: `id`
+    is writable so incoming rows can be matched to existing ones, and
+    `property` is set from the parent.
+    """
+    meta = type("Meta", (serializer_class.Meta,), {"read_only_fields": ("property",)})
+    return type(
+        f"Nested{serializer_class.__name__}",
+        (serializer_class,),
+        {"id": serializers.IntegerField(required=False), "Meta": meta},
+    )
+
+
+def sync_children(instance, related_name, items):
+    """
+    Make `instance.<related_name>` match `items`, diffing by id: rows with a
+    known id are bulk-updated (only when something changed), rows without one
+    are bulk-created and rows left out are deleted. At most one query of each
+    kind per child table, whatever the number of rows.
+    """
+    manager = getattr(instance, related_name)
+    model = manager.model
+    existing = {obj.pk: obj for obj in manager.all()}
+
+    unknown = sorted({item["id"] for item in items if "id" in item} - set(existing))
+    if unknown:
+        raise serializers.ValidationError(
+            {related_name: [f"Unknown ids for this property: {unknown}."]}
         )
-        
-    def get_amenities_count(self, obj):
-        return obj.amenities.count()
-    
-    def get_property_media(self, obj):
-        images = obj.media.filter(media_type="IMAGE")
-        return PropertyMediaListSerializer(images, many=True).data
-    
-
-class PropertySerializer(serializers.ModelSerializer):
+
+    to_create, to_update, update_fields, keep = [], [], set(), set()
+    for item in items:
+        item = dict(item)
+        pk = item.pop("id", None)
+        if pk is None:
+            to_create.append(model(property=instance, **item))
+            continue
+        keep.add(pk)
+        obj = existing[pk]
+        changed = {name for name, value in item.items() if getattr(obj, name) != value}
+        if changed:
+            for name in changed:
+                setattr(obj, name, item[name])
+            update_fields |= changed
+            to_update.append(obj)
+
+    # Bulk writes skip the upload-staging signals as well
+    uploads = []
+    if model._meta.label in STAGED_FIELDS:
+        field_name, state_field = STAGED_FIELDS[model._meta.label]
+        uploads = [obj for obj in to_update + to_create if mark_pending(obj)]
+        for obj in uploads:
+            if obj.pk:
+                # bulk_update doesn't commit files the way save() does
+                model._meta.get_field(field_name).pre_save(obj, add=False)
+                update_fields.add(state_field)
+
+    # Saves skip the child signals (they would cost queries per row); the
+    # caller refreshes the property's card and cache versions once instead.
+    # Deletes go through delete(): its signals and cascades also drop queued
+    # uploads and clear Property.primary_image.
+    stale = [pk for pk in existing if pk not in keep]
+    if stale:
+        model.objects.filter(pk__in=stale).delete()
+    if to_update:
+        model.objects.bulk_update(to_update, sorted(update_fields))
+    if to_create:
+        model.objects.bulk_create(to_create)
+    for obj in uploads:
+        enqueue(obj)
+    if model._meta.label in RENDITION_FIELDS:
+        for obj in to_update + to_create:
+            refresh_renditions(obj)  # no-op unless the image changed
+
+
+class PropertySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Child tables written through the nested fields, diffed by id on update
+    nested_children = ("media", "units", "specifications", "rate_cards", "nearby_places")
+    serializer_field_mapping = STAGED_FIELD_MAPPING
+
     amenities = AmenitySerializer(many=True, required=False)
-    media = PropertyMediaSerializer(many=True, required=False)
-    units = UnitPlanSerializer(many=True, required=False)
-    specifications = SpecificationSerializer(many=True, required=False)
+    media = nested_child(PropertyMediaSerializer)(many=True, required=False)
+    units = nested_child(UnitPlanSerializer)(many=True, required=False)
+    specifications = nested_child(SpecificationSerializer)(many=True, required=False)
     details = PropertyDetailsSerializer(required=False)
-    rate_cards = RateCardSerializer(many=True, required=False)
-    nearby_places = NearbyPlaceSerializer(many=True, required=False)
+    rate_cards = nested_child(RateCardSerializer)(many=True, required=False)
+    nearby_places = nested_child(NearbyPlaceSerializer)(many=True, required=False)
     developer = DeveloperSerializer(read_only=True)
 
     class Meta:
         model = Property
-        fields = "__all__"
-        read_only_fields = ("listed_by", "created_at")
+        exclude = ("search_vector",)
+        read_only_fields = ("listed_by", "created_at", "updated_at")
 
     def create(self, validated_data):
         # Assign the logged-in user
         validated_data["listed_by"] = self.context["request"].user
 
         # Pop nested related data
-        media_data = validated_data.pop("media", [])
-        units_data = validated_data.pop("units", [])
-        specifications_data = validated_data.pop("specifications", [])
+        children = {name: validated_data.pop(name, []) for name in self.nested_children}
         amenities_data = validated_data.pop("amenities", [])
         details_data = validated_data.pop("details", None)
-        rate_cards_data = validated_data.pop("rate_cards", [])
-        nearby_places_data = validated_data.pop("nearby_places", [])
-
-
-        # Create Property
-        property_obj = Property.objects.create(**validated_data)
-
-        # Related nested objects
-        for m in media_data:
-            PropertyMedia.objects.create(property=property_obj, **m)
-        for u in units_data:
-            UnitPlan.objects.create(property=property_obj, **u)
-        for s in specifications_data:
-            Specification.objects.create(property=property_obj, **s)
-        for r in rate_cards_data:
-            RateCard.objects.create(property=property_obj, **r)
-        for np in nearby_places_data:
-            NearbyPlace.objects.create(property=property_obj, **np)
-        
-        if details_data:
-            PropertyDetails.objects.create(property=property_obj, **details_data)
-
-        # property_obj.amenities.set(amenities_data)
-        property_obj.amenities.set([a["id"] for a in amenities_data] if amenities_data else [])
 
+        with transaction.atomic():
+            # Create Property
+            property_obj = Property.objects.create(**validated_data)
+
+            # Related nested objects, one bulk insert per table
+            for related_name, items in children.items():
+                sync_children(property_obj, related_name, items)
+
+            if details_data:
+                PropertyDetails.objects.create(property=property_obj, **details_data)
+
+            # property_obj.amenities.set(amenities_data)
+            property_obj.amenities.set([a["id"] for a in amenities_data] if amenities_data else [])
+
+            self.children_changed(property_obj)
         return property_obj
-    
 
     def update(self, instance, validated_data):
-        # Nested updates
+        # Nested updates; a list that is left out keeps its rows untouched
+        children = {
+            name: validated_data.pop(name) for name in self.nested_children if name in validated_data
+        }
         amenities_data = validated_data.pop("amenities", None)
-        media_data = validated_data.pop("media", None)
-        units_data = validated_data.pop("units", None)
-        specifications_data = validated_data.pop("specifications", None)
         details_data = validated_data.pop("details", None)
-        rate_cards_data = validated_data.pop("rate_cards", None)
-        nearby_places_data = validated_data.pop("nearby_places", None)
 
-        # Update property fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        with transaction.atomic():
+            # Update property fields
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+
+            for related_name, items in children.items():
+                sync_children(instance, related_name, items)
 
-        if amenities_data is not None:
-            # instance.amenities.set(amenities_data)
-            instance.amenities.set([a["id"] for a in amenities_data])
+            if amenities_data is not None:
+                # instance.amenities.set(amenities_data)
+                instance.amenities.set([a["id"] for a in amenities_data])
 
+            if details_data:
+                PropertyDetails.objects.update_or_create(
+                    property=instance, defaults=details_data
+                )
 
-        if details_data:
-            PropertyDetails.objects.update_or_create(
-                property=instance, defaults=details_data
-            )
+            if children:
+                self.children_changed(instance)
+        return instance
 
-        return instance
\ No newline at end of file
+    def children_changed(self, instance):
+        # sync_children skips the per-row child signals (see properties.signals)
+        refresh_primary_images([instance.pk])
+        refresh_property_cards([instance.pk])
+        bump_property(instance.pk)
\ No newline at end of file
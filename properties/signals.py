@@ -0,0 +1,254 @@
+from django.db import transaction
+from django.utils import timezone
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.renditions import discard_renditions, refresh_renditions
+from locations.models import Area, City, State
+from .cards import refresh_primary_images, refresh_property_cards
+from .models import (
+    Amenity, Developer, NearbyPlace, Property, PropertyDetails, PropertyMedia, RateCard, Specification, UnitPlan,
+)
+from .lookup import forget_lookups, remember_lookups
+from .media_queue import cancel, enqueue, mark_pending
+from .response_cache import bump_property, bump_reference
+from .search import remove_from_search_index, update_search_index
+from .suggest import prefix_cache
+
+
+@receiver(post_save, sender=Property)
+def index_property(sender, instance, **kwargs):
+    update_search_index([instance.pk])
+
+
+@receiver(post_delete, sender=Property)
+def unindex_property(sender, instance, **kwargs):
+    remove_from_search_index(instance.pk)
+
+
+# Area and developer names are part of the search document
+@receiver(post_save, sender=Area)
+def reindex_area_properties(sender, instance, created, **kwargs):
+    if not created:
+        update_search_index(instance.properties.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Developer)
+def reindex_developer_properties(sender, instance, created, **kwargs):
+    if not created:
+        update_search_index(instance.projects.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+@receiver(post_save, sender=Area)
+@receiver(post_delete, sender=Area)
+@receiver(post_save, sender=Developer)
+@receiver(post_delete, sender=Developer)
+def clear_suggestions(sender, **kwargs):
+    prefix_cache.clear()
+
+
+# ----- Staged uploads (before renditions and cards, which need the final file) -----
+
+@receiver(pre_save, sender=PropertyMedia)
+@receiver(pre_save, sender=Property)
+def mark_upload_pending(sender, instance, **kwargs):
+    if mark_pending(instance):
+        instance._upload_staged = True
+
+
+@receiver(post_save, sender=PropertyMedia)
+@receiver(post_save, sender=Property)
+def queue_staged_upload(sender, instance, **kwargs):
+    # Only for the save that staged it: later saves of a pending row queue nothing
+    if instance.__dict__.pop("_upload_staged", False):
+        enqueue(instance)
+
+
+@receiver(post_delete, sender=PropertyMedia)
+@receiver(post_delete, sender=Property)
+def cancel_staged_upload(sender, instance, **kwargs):
+    cancel(instance)
+
+
+# ----- Image renditions (before the cards, which embed them) -----
+
+@receiver(post_save, sender=PropertyMedia)
+@receiver(post_save, sender=UnitPlan)
+@receiver(post_save, sender=Developer)
+@receiver(post_save, sender=City)
+def build_renditions(sender, instance, **kwargs):
+    refresh_renditions(instance)
+
+
+@receiver(post_delete, sender=PropertyMedia)
+@receiver(post_delete, sender=UnitPlan)
+@receiver(post_delete, sender=Developer)
+@receiver(post_delete, sender=City)
+def delete_renditions(sender, instance, **kwargs):
+    discard_renditions(instance)
+
+
+# ----- Primary image / image count on Property (before the cards, which copy them) -----
+
+@receiver(post_save, sender=PropertyMedia)
+def refresh_primary_image(sender, instance, **kwargs):
+    refresh_primary_images([instance.property_id])
+
+
+@receiver(post_delete, sender=PropertyMedia)
+def refresh_primary_image_after_delete(sender, instance, **kwargs):
+    # Deferred like the card refresh below: the property may be going too
+    property_id = instance.property_id
+    transaction.on_commit(lambda: refresh_primary_images([property_id]))
+
+
+# ----- PropertyCard read model -----
+
+@receiver(post_save, sender=Property)
+def refresh_card(sender, instance, **kwargs):
+    refresh_property_cards([instance.pk])
+
+
+@receiver(post_save, sender=PropertyMedia)
+@receiver(post_save, sender=UnitPlan)
+@receiver(post_save, sender=PropertyDetails)
+def refresh_card_for_child(sender, instance, **kwargs):
+    refresh_property_cards([instance.property_id])
+
+
+@receiver(post_delete, sender=PropertyMedia)
+@receiver(post_delete, sender=UnitPlan)
+@receiver(post_delete, sender=PropertyDetails)
+def refresh_card_after_child_delete(sender, instance, **kwargs):
+    # Deferred: when the whole property is being deleted there is nothing left to refresh
+    property_id = instance.property_id
+    transaction.on_commit(lambda: refresh_property_cards([property_id]))
+
+
+@receiver(m2m_changed, sender=Property.amenities.through)
+def refresh_card_for_amenities(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # amenity.properties.add()/remove()/clear(): pk_set holds property ids
+        if action == "pre_clear":
+            instance._card_property_ids = list(instance.properties.values_list("pk", flat=True))
+        elif action == "post_clear":
+            refresh_property_cards(instance._card_property_ids)
+        elif action in ("post_add", "post_remove"):
+            refresh_property_cards(pk_set)
+    elif action in ("post_add", "post_remove", "post_clear"):
+        refresh_property_cards([instance.pk])
+
+
+# Deleting an amenity, developer or area changes linked properties without
+# saving them (m2m rows cascade, FKs are SET_NULL): remember who to refresh.
+@receiver(pre_delete, sender=Amenity)
+@receiver(pre_delete, sender=Developer)
+@receiver(pre_delete, sender=Area)
+def remember_card_properties(sender, instance, **kwargs):
+    related = instance.projects if sender is Developer else instance.properties
+    instance._card_property_ids = list(related.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Amenity)
+@receiver(post_delete, sender=Developer)
+@receiver(post_delete, sender=Area)
+def refresh_cards_after_delete(sender, instance, **kwargs):
+    property_ids = getattr(instance, "_card_property_ids", [])
+    transaction.on_commit(lambda: refresh_property_cards(property_ids))
+
+
+@receiver(post_save, sender=Developer)
+def refresh_developer_cards(sender, instance, created, **kwargs):
+    if not created:
+        refresh_property_cards(instance.projects.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Area)
+def refresh_area_cards(sender, instance, created, **kwargs):
+    if not created:
+        refresh_property_cards(instance.properties.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=City)
+def refresh_city_cards(sender, instance, created, **kwargs):
+    if not created:
+        refresh_property_cards(Property.objects.filter(area__city=instance).values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=State)
+def refresh_state_cards(sender, instance, created, **kwargs):
+    if not created:
+        refresh_property_cards(Property.objects.filter(area__city__state=instance).values_list("pk", flat=True))
+
+
+# ----- Response cache versions -----
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+def bump_property_version(sender, instance, **kwargs):
+    bump_property(instance.pk)
+
+
+@receiver(post_save, sender=PropertyMedia)
+@receiver(post_delete, sender=PropertyMedia)
+@receiver(post_save, sender=UnitPlan)
+@receiver(post_delete, sender=UnitPlan)
+@receiver(post_save, sender=Specification)
+@receiver(post_delete, sender=Specification)
+@receiver(post_save, sender=RateCard)
+@receiver(post_delete, sender=RateCard)
+@receiver(post_save, sender=NearbyPlace)
+@receiver(post_delete, sender=NearbyPlace)
+@receiver(post_save, sender=PropertyDetails)
+@receiver(post_delete, sender=PropertyDetails)
+def bump_child_version(sender, instance, **kwargs):
+    # Child edits also move the parent's Last-Modified (no save signals fire)
+    Property.objects.filter(pk=instance.property_id).update(updated_at=timezone.now())
+    bump_property(instance.property_id)
+
+
+@receiver(m2m_changed, sender=Property.amenities.through)
+def bump_amenities_version(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if reverse:
+        if pk_set:
+            Property.objects.filter(pk__in=pk_set).update(updated_at=timezone.now())
+        bump_reference()
+    else:
+        Property.objects.filter(pk=instance.pk).update(updated_at=timezone.now())
+        bump_property(instance.pk)
+
+
+@receiver(post_save, sender=Developer)
+@receiver(post_delete, sender=Developer)
+@receiver(post_save, sender=Amenity)
+@receiver(post_delete, sender=Amenity)
+@receiver(post_save, sender=Area)
+@receiver(post_delete, sender=Area)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+@receiver(post_save, sender=State)
+@receiver(post_delete, sender=State)
+def bump_reference_version(sender, **kwargs):
+    bump_reference()
+
+
+# ----- slug/id -> pk lookup map -----
+
+@receiver(pre_save, sender=Property)
+def remember_old_slug(sender, instance, **kwargs):
+    if instance.pk:
+        instance._old_slug = Property.objects.filter(pk=instance.pk).values_list("slug", flat=True).first()
+
+
+@receiver(post_save, sender=Property)
+def update_lookups(sender, instance, **kwargs):
+    remember_lookups(instance, getattr(instance, "_old_slug", None))
+
+
+@receiver(post_delete, sender=Property)
+def remove_lookups(sender, instance, **kwargs):
+    forget_lookups(instance)
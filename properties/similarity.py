@@ -0,0 +1,141 @@
+"""
+"Similar properties": a feature vector per property, cosine top-k
+neighbours computed in one vectorized batch and stored in SimilarProperty,
+so /properties/{id}/similar/ is a single indexed lookup.
+
+Rebuild periodically (e.g. nightly cron) with `manage.py rebuild_similar_properties`.
+"""
+
+import math
+
+import numpy as np
+from django.db import transaction
+
+from .models import Property, SimilarProperty, UnitPlan
+
+SIMILAR_TOP_K = SimilarProperty.TOP_K
+SIMILARITY_CHUNK_SIZE = 512  # rows scored per matrix product; bounds memory at chunk x catalog
+
+# Relative weight of each feature block in the cosine similarity
+FEATURE_WEIGHTS = {
+    "property_type": 2.0,
+    "status": 1.0,
+    "price": 2.0,
+    "area": 1.5,
+    "city": 1.0,
+    "amenities": 1.0,
+    "units": 1.5,
+    "geo": 2.0,
+}
+
+UNIT_ROOM_BUCKETS = 5  # 1..4 rooms, 5+ in the last bucket
+# Geo closeness as shared geohash cells: ~39 km and ~5 km wide
+GEO_PRECISIONS = (4, 5)
+
+
+def _one_hot(codes, weight):
+    """One-hot columns set to `weight` for a list of category codes (None sets no column)."""
+    categories = {code: i for i, code in enumerate(sorted({c for c in codes if c is not None}))}
+    block = np.zeros((len(codes), len(categories)), dtype=np.float32)
+    for row, code in enumerate(codes):
+        if code is not None:
+            block[row, categories[code]] = weight
+    return block
+
+
+def _normalize_rows(block, weight):
+    norms = np.linalg.norm(block, axis=1, keepdims=True)
+    return np.divide(block, norms, out=np.zeros_like(block), where=norms > 0) * weight
+
+
+def load_features():
+    """
+    (ids, matrix): one L2-normalized row per property, built from three
+    queries (properties, amenity links, units).
+    """
+    rows = list(
+        Property.objects.order_by("pk").values_list(
+            "pk", "property_type", "status", "price_min", "price_max", "area_id", "area__city_id", "geohash",
+        )
+    )
+    ids = [row[0] for row in rows]
+    index = {pk: i for i, pk in enumerate(ids)}
+    n = len(ids)
+
+    amenities = np.zeros((n, 0), dtype=np.float32)
+    links = list(Property.amenities.through.objects.values_list("property_id", "amenity_id"))
+    if links:
+        amenity_ids = {pk: i for i, pk in enumerate(sorted({amenity for _, amenity in links}))}
+        amenities = np.zeros((n, len(amenity_ids)), dtype=np.float32)
+        for property_id, amenity_id in links:
+            amenities[index[property_id], amenity_ids[amenity_id]] = 1.0
+
+    units = np.zeros((n, UNIT_ROOM_BUCKETS), dtype=np.float32)
+    for property_id, rooms in UnitPlan.objects.values_list("property_id", "rooms"):
+        bucket = min(max(rooms or 1, 1), UNIT_ROOM_BUCKETS) - 1
+        units[index[property_id], bucket] += 1.0
+
+    # Price: log of the mid price, standardized, as a single column
+    prices = np.array(
+        [math.log(float(row[3] + row[4]) / 2) if row[3] and row[4] else np.nan for row in rows],
+        dtype=np.float32,
+    )
+    price = np.zeros((n, 1), dtype=np.float32)
+    if n and not np.isnan(prices).all():
+        mean, std = np.nanmean(prices), np.nanstd(prices) or 1.0
+        price[:, 0] = np.nan_to_num((prices - mean) / std)
+
+    blocks = [
+        _one_hot([row[1] for row in rows], FEATURE_WEIGHTS["property_type"]),
+        _one_hot([row[2] for row in rows], FEATURE_WEIGHTS["status"]),
+        price * FEATURE_WEIGHTS["price"] / (np.abs(price).max() or 1.0),
+        _one_hot([row[5] for row in rows], FEATURE_WEIGHTS["area"]),
+        _one_hot([row[6] for row in rows], FEATURE_WEIGHTS["city"]),
+        _normalize_rows(amenities, FEATURE_WEIGHTS["amenities"]),
+        _normalize_rows(units, FEATURE_WEIGHTS["units"]),
+        *[
+            _one_hot([row[7][:precision] if row[7] else None for row in rows], FEATURE_WEIGHTS["geo"])
+            for precision in GEO_PRECISIONS
+        ],
+    ]
+    matrix = np.hstack(blocks) if n else np.zeros((0, 0), dtype=np.float32)
+    return ids, _normalize_rows(matrix, 1.0)
+
+
+def top_k_neighbours(matrix, k=SIMILAR_TOP_K, chunk_size=SIMILARITY_CHUNK_SIZE):
+    """
+    For every row, the indices and cosine scores of its k most similar other
+    rows, best first. Scores a chunk of rows against the whole matrix at a time.
+    """
+    n = matrix.shape[0]
+    k = min(k, n - 1)
+    if k <= 0:
+        return np.zeros((n, 0), dtype=np.int64), np.zeros((n, 0), dtype=np.float32)
+
+    neighbours = np.empty((n, k), dtype=np.int64)
+    scores = np.empty((n, k), dtype=np.float32)
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        similarity = matrix[start:stop] @ matrix.T
+        similarity[np.arange(stop - start), np.arange(start, stop)] = -np.inf  # never yourself
+        top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        neighbours[start:stop] = np.take_along_axis(top, order, axis=1)
+        scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+    return neighbours, scores
+
+
+def rebuild_similar_properties(k=SIMILAR_TOP_K):
+    """Recompute and replace every stored neighbour list. Returns the number of links."""
+    ids, matrix = load_features()
+    neighbours, scores = top_k_neighbours(matrix, k)
+    links = [
+        SimilarProperty(property_id=ids[row], similar_id=ids[col], rank=rank, score=float(score))
+        for row in range(len(ids))
+        for rank, (col, score) in enumerate(zip(neighbours[row], scores[row]), 1)
+    ]
+    with transaction.atomic():
+        SimilarProperty.objects.all().delete()
+        SimilarProperty.objects.bulk_create(links, batch_size=2000)
+    return len(links)
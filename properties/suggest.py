@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Length
+
+from locations.models import Area
+from .models import Developer, Property
+
+SUGGEST_LIMIT = 8
+SUGGEST_MAX_LIMIT = 20
+SUGGEST_MIN_LENGTH = 2
+
+
+class PrefixCache:
+    """
+    Small per-process LRU of hot typeahead prefixes with a TTL.
+
+    Saves on properties, areas and developers clear it (see properties.signals);
+    the TTL bounds staleness across worker processes.
+    """
+
+    def __init__(self, maxsize=2048, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+prefix_cache = PrefixCache()
+
+
+def normalize_term(term):
+    return " ".join((term or "").lower().split())
+
+
+def _ranked(queryset, field, term, limit):
+    """
+    Top `limit` rows of `queryset` whose `field` matches `term`, best first.
+
+    Postgres uses the trigram GIN indexes (typo tolerant word similarity);
+    other backends fall back to prefix matching on the label or any word in it.
+    The lookup is used as an expression because `__trigram_word_similar` is only
+    registered when django.contrib.postgres is installed.
+    """
+    prefix_boost = Case(When(**{f"{field}__istartswith": term}, then=Value(1.0)), default=Value(0.0),
+                        output_field=FloatField())
+    if connection.vendor == "postgresql":
+        queryset = queryset.filter(TrigramWordSimilar(F(field), term)).annotate(
+            score=TrigramWordSimilarity(term, field) + prefix_boost
+        )
+    else:
+        queryset = queryset.filter(
+            Q(**{f"{field}__istartswith": term}) | Q(**{f"{field}__icontains": f" {term}"})
+        ).annotate(score=prefix_boost)
+    return queryset.annotate(label_length=Length(field)).order_by("-score", "label_length", "pk")[:limit]
+
+
+def suggest(term, limit=SUGGEST_LIMIT):
+    """
+    Mixed property / area / developer suggestions for a search box prefix.
+
+    Each suggestion is {"type", "id", "label", "slug"}; only properties have a slug.
+    """
+    term = normalize_term(term)
+    if len(term) < SUGGEST_MIN_LENGTH:
+        return []
+
+    key = (term, limit)
+    cached = prefix_cache.get(key)
+    if cached is not None:
+        return cached
+
+    candidates = []
+    for row in _ranked(Property.objects.values("id", "title", "slug"), "title", term, limit):
+        candidates.append((row["score"], "property", row["id"], row["title"], row["slug"]))
+    for row in _ranked(Area.objects.values("id", "name"), "name", term, limit):
+        candidates.append((row["score"], "area", row["id"], row["name"], None))
+    for row in _ranked(Developer.objects.values("id", "name"), "name", term, limit):
+        candidates.append((row["score"], "developer", row["id"], row["name"], None))
+
+    candidates.sort(key=lambda c: (-c[0], len(c[3])))
+    suggestions = [
+        {"type": kind, "id": pk, "label": label, "slug": slug}
+        for _, kind, pk, label, slug in candidates[:limit]
+    ]
+    prefix_cache.set(key, suggestions)
+    return suggestions
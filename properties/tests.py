@@ -1,3 +1,1501 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+import cloudinary
+import numpy as np
+from PIL import Image
+
+from django.conf import settings
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core import renditions
+from core.placeholders import blurhash_encode
+from core.renderers import ORJSONRenderer
+from locations.models import Area, City, State
+from .filters import PropertyFilter
+from .ingest import PropertyImporter
+from .similarity import top_k_neighbours
+from .search import PropertySearchFilter, tsquery_prefix_expression
+from .suggest import _ranked
+from .management.commands.benchmark_renderers import synthetic_detail
+from . import media_queue
+from .models import (
+    Amenity, Developer, MediaTask, Property, PropertyCard, PropertyDetails, PropertyMedia, RateCard, UnitPlan,
+)
+from .response_cache import PROPERTY_MODIFIED_KEY, REFERENCE_MODIFIED_KEY, catalog_version
+from .serializers import PropertySerializer
+
+
+def make_catalog(count, user=None):
+    """
+    Seed `count` fully-populated properties (details, images, units, amenities).
+    """
+    if user is None:
+        user, _ = User.objects.get_or_create(username="lister")
+    state, _ = State.objects.get_or_create(name="Gujarat")
+    city, _ = City.objects.get_or_create(name="Ahmedabad", state=state)
+    area, _ = Area.objects.get_or_create(name="Satellite", city=city)
+    developer, _ = Developer.objects.get_or_create(name="Shivalik Group")
+    amenities = [Amenity.objects.get_or_create(name=f"Amenity {i}", category="Leisure")[0] for i in range(3)]
+
+    properties = []
+    for i in range(count):
+        prop = Property.objects.create(
+            title=f"Project {Property.objects.count() + 1}",
+            description="Spacious homes",
+            developer=developer,
+            area=area,
+            property_type="APARTMENT",
+            status="READY",
+            listed_by=user,
+            price_min=Decimal("4500000.00") + i,
+            price_max=Decimal("9000000.00") + i,
+        )
+        PropertyDetails.objects.create(property=prop, total_towers=2, total_units=120, floors=14)
+        PropertyMedia.objects.create(property=prop, media_type="IMAGE", is_primary=True)
+        PropertyMedia.objects.create(property=prop, media_type="IMAGE")
+        PropertyMedia.objects.create(property=prop, media_type="VIDEO", video_url="https://example.com/v")
+        UnitPlan.objects.create(property=prop, unit_type="2BHK", rooms=2, price=Decimal("4500000.00"))
+        UnitPlan.objects.create(property=prop, unit_type="3BHK", rooms=3, price=Decimal("6500000.00"))
+        prop.amenities.set(amenities)
+        properties.append(prop)
+    return properties
+
+
+class PropertyAPITestCase(TestCase):
+    def setUp(self):
+        # Throttle history and response caches live in the cache backend
+        cache.clear()
+        self.client = APIClient()
+
+
+class PropertyListQueryBudgetTests(PropertyAPITestCase):
+    """
+    The list endpoint must cost a fixed number of queries per page:
+    COUNT + page rows joined to their PropertyCard.
+    """
+
+    LIST_URL = "/api/properties/"
+    QUERY_BUDGET = 2
+
+    def list_queries(self, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.LIST_URL, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_page_stays_within_budget(self):
+        make_catalog(3)
+        response, queries = self.list_queries()
+        self.assertLessEqual(queries, self.QUERY_BUDGET)
+        self.assertEqual(len(response.data["data"]), 3)
+
+    def test_budget_is_independent_of_page_size(self):
+        make_catalog(2)
+        _, small_page = self.list_queries()
+        make_catalog(8)
+        response, full_page = self.list_queries()
+        self.assertEqual(len(response.data["data"]), 10)
+        self.assertEqual(small_page, full_page)
+        self.assertLessEqual(full_page, self.QUERY_BUDGET)
+
+    def test_budget_holds_with_search_and_filters(self):
+        make_catalog(5)
+        _, queries = self.list_queries({"search": "Project", "status": "ready", "ordering": "price_min"})
+        self.assertLessEqual(queries, self.QUERY_BUDGET)
+
+    def test_card_payload_reads_the_read_model(self):
+        make_catalog(1)
+        response, _ = self.list_queries()
+        card = response.data["data"][0]
+        self.assertEqual(card["amenities_count"], 3)
+        self.assertEqual(card["image_count"], 2)
+        self.assertTrue(card["primary_image"]["id"])
+        self.assertEqual([u["unit_type"] for u in card["units"]], ["2BHK", "3BHK"])
+        self.assertEqual(card["property_details"]["total_towers"], 2)
+        self.assertEqual((card["city_name"], card["state_name"]), ("Ahmedabad", "Gujarat"))
+        self.assertEqual(card["developer"]["name"], "Shivalik Group")
+        self.assertEqual(card["unit_price_min"], "4500000.00")
+        self.assertEqual(card["unit_price_max"], "6500000.00")
+
+    def test_missing_cards_are_built_on_read(self):
+        make_catalog(3)
+        PropertyCard.objects.all().delete()
+        response, _ = self.list_queries()
+        self.assertEqual(len(response.data["data"]), 3)
+        self.assertEqual(PropertyCard.objects.count(), 3)
+
+
+class PropertyCardMaintenanceTests(PropertyAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.prop = make_catalog(1)[0]
+
+    def card(self):
+        return PropertyCard.objects.get(pk=self.prop.pk)
+
+    def test_child_edits_refresh_the_card(self):
+        UnitPlan.objects.create(property=self.prop, unit_type="4BHK", rooms=4, price=Decimal("9900000.00"))
+        self.assertEqual(self.card().unit_types, ["2BHK", "3BHK", "4BHK"])
+        self.assertEqual(self.card().unit_price_max, Decimal("9900000.00"))
+
+        self.prop.amenities.remove(Amenity.objects.first())
+        self.assertEqual(self.card().amenities_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.prop.media.filter(media_type="IMAGE").first().delete()
+        self.assertEqual(self.card().image_count, 1)
+
+    def test_primary_image_follows_the_flag_then_falls_back_to_the_first(self):
+        flagged, other = self.prop.media.filter(media_type="IMAGE").order_by("pk")
+        self.prop.refresh_from_db()
+        self.assertEqual((self.prop.primary_image_id, self.prop.image_count), (flagged.pk, 2))
+
+        flagged.is_primary = False
+        flagged.save()
+        other.is_primary = True
+        other.save()
+        self.assertEqual(self.card().primary_media["id"], other.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.prop.refresh_from_db()
+        self.assertEqual((self.prop.primary_image_id, self.prop.image_count), (flagged.pk, 1))
+        self.assertEqual(self.card().primary_media["id"], flagged.pk)
+
+    def test_saving_an_old_copy_keeps_the_primary_image(self):
+        stale = Property.objects.get(pk=self.prop.pk)  # two images
+        first, _ = self.prop.media.filter(media_type="IMAGE").order_by("pk")
+        first.is_primary = False
+        first.save()
+        newest = PropertyMedia.objects.create(property=self.prop, media_type="IMAGE", is_primary=True)
+
+        stale.title = "Renamed"
+        stale.save()
+
+        self.prop.refresh_from_db()
+        self.assertEqual(self.prop.title, "Renamed")
+        self.assertEqual((self.prop.primary_image_id, self.prop.image_count), (newest.pk, 3))
+        self.assertEqual((self.card().primary_media["id"], self.card().image_count), (newest.pk, 3))
+
+    def test_cards_are_built_without_reading_the_media_table(self):
+        with CaptureQueriesContext(connection) as ctx:
+            call_command("rebuild_property_cards", stdout=StringIO())
+        self.assertFalse(any('FROM "properties_propertymedia"' in q["sql"] for q in ctx.captured_queries))
+
+    def test_renames_refresh_the_card(self):
+        city = self.prop.area.city
+        city.name = "Amdavad"
+        city.save()
+        self.assertEqual(self.card().city_name, "Amdavad")
+
+    def test_rebuild_command(self):
+        PropertyCard.objects.all().delete()
+        version = catalog_version()
+        call_command("rebuild_property_cards", stdout=StringIO())
+        self.assertEqual(self.card().title, self.prop.title)
+        self.assertNotEqual(catalog_version(), version)
+
+
+class PropertySearchTests(PropertyAPITestCase):
+    """
+    `?search=` goes through the full-text index (FTS5 locally, tsvector on Postgres).
+    """
+
+    LIST_URL = "/api/properties/"
+
+    def setUp(self):
+        super().setUp()
+        self.first, self.second, self.third = make_catalog(3)
+        self.first.title = "Skyline Residency"
+        self.first.save()
+        self.second.description = "Close to the skyline promenade"
+        self.second.save()
+
+    def search(self, term, **params):
+        response = self.client.get(self.LIST_URL, {"search": term, **params})
+        self.assertEqual(response.status_code, 200)
+        return [card["id"] for card in response.data["data"]]
+
+    def test_title_matches_rank_above_description_matches(self):
+        self.assertEqual(self.search("skyline"), [self.first.id, self.second.id])
+
+    def test_prefix_and_related_names_match(self):
+        self.assertEqual(self.search("skyl resid"), [self.first.id])
+        self.assertEqual(len(self.search("shivalik")), 3)
+
+    def test_postgres_query_prefix_matches_like_fts5(self):
+        self.assertEqual(tsquery_prefix_expression(["skyl", "o'neil\\"]), "'skyl':* & 'o''neil\\\\':*")
+        # Compiling the tsquery needs psycopg; check what the filter asks for
+        with mock.patch("properties.search.connection.vendor", "postgresql"), \
+                mock.patch("properties.search.SearchQuery") as search_query, \
+                mock.patch("properties.search.SearchRank"):
+            PropertySearchFilter().filter_queryset(
+                mock.Mock(query_params={"search": "skyl resid"}), mock.MagicMock(), mock.Mock(ordering=[]),
+            )
+        search_query.assert_called_once_with("'skyl':* & 'resid':*", search_type="raw", config="english")
+
+    def test_explicit_ordering_wins_over_rank(self):
+        self.assertEqual(self.search("skyline", ordering="-price_min"), [self.second.id, self.first.id])
+
+    def test_index_follows_renames_and_deletes(self):
+        developer = self.first.developer
+        developer.name = "Goyal Infra"
+        developer.save()
+        self.assertEqual(len(self.search("goyal")), 3)
+        self.third.delete()
+        self.assertEqual(len(self.search("goyal")), 2)
+
+    def test_fts_syntax_in_input_is_treated_as_text(self):
+        self.assertEqual(self.search('sky" OR "x'), [])
+
+
+class PropertySuggestTests(PropertyAPITestCase):
+    SUGGEST_URL = "/api/properties/suggest/"
+
+    def setUp(self):
+        super().setUp()
+        self.first, self.second = make_catalog(2)
+        self.first.title = "Shaligram Heights"
+        self.first.save()
+
+    def suggest(self, q, **params):
+        response = self.client.get(self.SUGGEST_URL, {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data["data"]
+
+    def test_mixes_properties_areas_and_developers(self):
+        suggestions = self.suggest("sha")
+        self.assertEqual([(s["type"], s["label"]) for s in suggestions], [("property", "Shaligram Heights")])
+        self.assertEqual(suggestions[0]["slug"], self.first.slug)
+        self.assertEqual(set(suggestions[0]), {"type", "id", "label", "slug"})
+        self.assertEqual([s["type"] for s in self.suggest("sat")], ["area"])
+        self.assertEqual([s["type"] for s in self.suggest("shiv")], ["developer"])
+
+    def test_short_terms_and_limit(self):
+        self.assertEqual(self.suggest("s"), [])
+        self.assertEqual(len(self.suggest("project", limit=1)), 1)
+
+    def test_cache_is_cleared_on_save(self):
+        self.assertEqual(self.suggest("skyline"), [])
+        self.second.title = "Skyline Towers"
+        self.second.save()
+        self.assertEqual([s["id"] for s in self.suggest("skyline")], [self.second.id])
+
+    def test_postgres_branch_resolves_trigram_lookup(self):
+        # Built, not run: building fails with FieldError if the lookup can't be resolved
+        with mock.patch("properties.suggest.connection") as pg:
+            pg.vendor = "postgresql"
+            for queryset, field in (
+                (Property.objects.values("id", "title"), "title"),
+                (Area.objects.values("id", "name"), "name"),
+                (Developer.objects.values("id", "name"), "name"),
+            ):
+                query = _ranked(queryset, field, "sha", 5).query
+                self.assertIn("score", query.annotations)
+                self.assertIsInstance(query.where.children[0], TrigramWordSimilar)
+
+
+class PropertyCursorPaginationTests(PropertyAPITestCase):
+    LIST_URL = "/api/properties/"
+
+    def setUp(self):
+        super().setUp()
+        self.properties = make_catalog(7)
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def walk(self, **params):
+        body = self.get(self.LIST_URL, {"pagination": "cursor", "page_size": 3, **params})
+        pages = [[card["id"] for card in body["data"]]]
+        while body["meta"]["pagination"]["next"]:
+            body = self.get(body["meta"]["pagination"]["next"])
+            pages.append([card["id"] for card in body["data"]])
+        return pages, body
+
+    def test_walks_default_ordering_without_gaps_or_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.get(self.LIST_URL, {"pagination": "cursor"})
+        self.assertFalse(any(q["sql"].startswith("SELECT COUNT(*)") for q in ctx.captured_queries))
+
+        pages, last = self.walk()
+        expected = list(Property.objects.order_by("-created_at", "id").values_list("id", flat=True))
+        self.assertEqual([len(p) for p in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual(last["meta"]["pagination"]["mode"], "cursor")
+
+    def test_previous_link_returns_the_earlier_page(self):
+        pages, _ = self.walk()
+        body = self.get(self.LIST_URL, {"pagination": "cursor", "page_size": 3})
+        second = self.get(body["meta"]["pagination"]["next"])
+        self.assertIsNone(body["meta"]["pagination"]["previous"])
+        back = self.get(second["meta"]["pagination"]["previous"])
+        self.assertEqual([card["id"] for card in back["data"]], pages[0])
+
+    def test_custom_ordering_and_ties(self):
+        Property.objects.update(price_min=Decimal("5000000.00"))
+        pages, _ = self.walk(ordering="-price_min")
+        self.assertEqual(sum(pages, []), sorted(p.id for p in self.properties))
+
+    def test_nullable_keys_walk_with_nulls_last(self):
+        # Only three properties get a unit with a carpet area; the rest have NULL aggregates
+        for prop, carpet in zip(self.properties[:3], (900, 600, 900)):
+            UnitPlan.objects.create(property=prop, unit_type="1BHK", rooms=1, carpet_area_sqft=carpet,
+                                    price=Decimal("3000000"), price_per_sqft=Decimal(3000000 / carpet).quantize(1))
+        ids = [p.id for p in self.properties]
+        nulls = sorted(ids[3:])
+        for ordering, expected in (
+            ("price_per_sqft", [ids[0], ids[2], ids[1], *nulls]),
+            ("-carpet_area", [ids[0], ids[2], ids[1], *nulls]),
+            ("distance", sorted(ids)),
+        ):
+            pages, _ = self.walk(ordering=ordering)
+            self.assertEqual(sum(pages, []), expected, ordering)
+
+        # Walk back from the NULL block into the non-NULL rows
+        body = self.get(self.LIST_URL, {"pagination": "cursor", "page_size": 3, "ordering": "-carpet_area"})
+        second = self.get(body["meta"]["pagination"]["next"])
+        third = self.get(second["meta"]["pagination"]["next"])
+        back = self.get(third["meta"]["pagination"]["previous"])
+        self.assertEqual([card["id"] for card in back["data"]], nulls[:3])
+        back = self.get(back["meta"]["pagination"]["previous"])
+        self.assertEqual([card["id"] for card in back["data"]], [ids[0], ids[2], ids[1]])
+
+    def test_search_keeps_rank_order(self):
+        # The title match is older, so the default -created_at order would put it second
+        self.properties[1].title = "Skyline Residency"
+        self.properties[1].save()
+        self.properties[4].description = "Close to the skyline promenade"
+        self.properties[4].save()
+        pages, _ = self.walk(search="skyline", page_size=1)
+        self.assertEqual(pages, [[self.properties[1].id], [self.properties[4].id]])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(self.LIST_URL, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+
+class PropertyFacetsTests(PropertyAPITestCase):
+    FACETS_URL = "/api/properties/facets/"
+
+    def setUp(self):
+        super().setUp()
+        self.properties = make_catalog(4)
+        villa = self.properties[0]
+        villa.property_type = "VILLA"
+        villa.status = "UPCOMING"
+        villa.price_min = Decimal("12000000.00")
+        villa.price_max = Decimal("16000000.00")
+        villa.save()
+
+    def facets(self, params=None):
+        response = self.client.get(self.FACETS_URL, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response.data["data"]
+
+    def test_counts_every_facet_in_one_grouped_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            facets = self.facets()
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(facets["total"], 4)
+        self.assertEqual({f["value"]: f["count"] for f in facets["property_type"]}, {"APARTMENT": 3, "VILLA": 1})
+        self.assertEqual({f["value"]: f["count"] for f in facets["status"]}, {"READY": 3, "UPCOMING": 1})
+        self.assertEqual([(f["name"], f["count"]) for f in facets["area"]], [("Satellite", 4)])
+        self.assertEqual([(f["name"], f["count"]) for f in facets["developer"]], [("Shivalik Group", 4)])
+        histogram = {f["min"]: f["count"] for f in facets["price"] if f["count"]}
+        # apartments span 45L-90L, the villa 1.2Cr-1.6Cr
+        self.assertEqual(histogram, {2_500_000: 3, 5_000_000: 3, 7_500_000: 3, 10_000_000: 1, 15_000_000: 1})
+
+    def test_applies_property_filter_and_caches_by_normalized_params(self):
+        facets = self.facets({"property_type": "villa", "page": 2})
+        self.assertEqual(facets["total"], 1)
+        with CaptureQueriesContext(connection) as ctx:
+            again = self.facets({"property_type": "VILLA"})
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(again, facets)
+
+
+class PropertyGeoFilterTests(PropertyAPITestCase):
+    LIST_URL = "/api/properties/"
+
+    def setUp(self):
+        super().setUp()
+        # Satellite, Bopal (~8 km west) and Gandhinagar (~25 km north)
+        self.satellite, self.bopal, self.gandhinagar, self.unlocated = make_catalog(4)
+        for prop, (lat, lng) in [
+            (self.satellite, (23.0300, 72.5176)),
+            (self.bopal, (23.0339, 72.4636)),
+            (self.gandhinagar, (23.2156, 72.6369)),
+        ]:
+            prop.latitude, prop.longitude = lat, lng
+            prop.save()
+
+    def ids(self, params):
+        response = self.client.get(self.LIST_URL, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [card["id"] for card in response.data["data"]], response.data["data"]
+
+    def test_geohash_is_maintained_on_save(self):
+        self.satellite.refresh_from_db()
+        self.assertEqual(self.satellite.geohash[:5], "ts5e4")
+        self.assertIsNone(Property.objects.get(pk=self.unlocated.pk).geohash)
+
+    def test_near_with_radius_and_distance_ordering(self):
+        ids, cards = self.ids({"near": "23.0300,72.5176", "radius_km": 10, "ordering": "distance"})
+        self.assertEqual(ids, [self.satellite.id, self.bopal.id])
+        self.assertEqual(cards[0]["distance_km"], 0.0)
+        self.assertAlmostEqual(cards[1]["distance_km"], 5.5, delta=0.5)
+
+        ids, _ = self.ids({"near": "23.0300,72.5176", "radius_km": 40, "ordering": "-distance"})
+        self.assertEqual(ids, [self.gandhinagar.id, self.bopal.id, self.satellite.id])
+
+    def test_bbox(self):
+        ids, cards = self.ids({"bbox": "72.45,23.0,72.55,23.1", "ordering": "price_min"})
+        self.assertEqual(ids, [self.satellite.id, self.bopal.id])
+        self.assertIsNone(cards[0]["distance_km"])
+
+    def test_invalid_coordinates(self):
+        self.assertEqual(self.client.get(self.LIST_URL, {"near": "abc"}).status_code, 400)
+        self.assertEqual(self.client.get(self.LIST_URL, {"bbox": "1,2,3"}).status_code, 400)
+
+
+class PropertyClustersTests(PropertyAPITestCase):
+    CLUSTERS_URL = "/api/properties/clusters/"
+
+    def setUp(self):
+        super().setUp()
+        self.properties = make_catalog(6)
+        for index, prop in enumerate(self.properties):
+            # three around Satellite, three around Gandhinagar
+            prop.latitude, prop.longitude = (23.03, 72.51) if index < 3 else (23.21, 72.63)
+            prop.latitude += index * 0.001
+            prop.save()
+
+    def clusters(self, **params):
+        response = self.client.get(self.CLUSTERS_URL, {"bbox": "72.0,22.5,73.0,23.5", **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data["data"]
+
+    def test_small_result_returns_markers(self):
+        data = self.clusters(zoom=12)
+        self.assertEqual(data["mode"], "markers")
+        self.assertEqual(len(data["markers"]), 6)
+        self.assertEqual(set(data["markers"][0]), {"id", "slug", "latitude", "longitude", "price_min"})
+
+    def test_large_result_is_grouped_in_sql(self):
+        from properties import clusters
+
+        original, clusters.MARKER_THRESHOLD = clusters.MARKER_THRESHOLD, 3
+        try:
+            data = self.clusters(zoom=8)
+        finally:
+            clusters.MARKER_THRESHOLD = original
+        self.assertEqual(data["mode"], "clusters")
+        self.assertEqual([c["count"] for c in data["clusters"]], [3, 3])
+        self.assertEqual(sorted(c["price_min"] for c in data["clusters"]), [Decimal("4500000.00"), Decimal("4500003.00")])
+
+    def test_requires_bbox_and_zoom(self):
+        self.assertEqual(self.client.get(self.CLUSTERS_URL, {"zoom": 3}).status_code, 400)
+        self.assertEqual(self.client.get(self.CLUSTERS_URL, {"bbox": "72.0,22.5,73.0,23.5"}).status_code, 400)
+
+
+class PropertyResponseCacheTests(PropertyAPITestCase):
+    LIST_URL = "/api/properties/"
+
+    def setUp(self):
+        super().setUp()
+        self.prop, self.other = make_catalog(2)
+
+    def get(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(ctx.captured_queries)
+
+    def test_list_is_served_from_cache_until_a_child_changes(self):
+        first, _ = self.get(self.LIST_URL, {"ordering": "price_min", "page": 1})
+        again, queries = self.get(self.LIST_URL, {"page": 1, "ordering": "price_min"})
+        self.assertEqual(queries, 0)
+        self.assertEqual(again["data"], first["data"])
+        self.assertNotEqual(again["meta"]["request_id"], first["meta"]["request_id"])
+
+        UnitPlan.objects.create(property=self.prop, unit_type="Penthouse", price=Decimal("1.00"))
+        fresh, queries = self.get(self.LIST_URL, {"ordering": "price_min", "page": 1})
+        self.assertGreater(queries, 0)
+        self.assertIn("Penthouse", [u["unit_type"] for u in fresh["data"][0]["units"]])
+
+    def test_detail_versions_are_per_property(self):
+        url = f"{self.LIST_URL}{self.prop.slug}/"
+        other_url = f"{self.LIST_URL}{self.other.pk}/"
+        self.get(url)
+        self.get(other_url)
+
+        self.prop.specifications.create(category="Flooring", detail="Vitrified tiles")
+        data, _ = self.get(url)
+        self.assertEqual([s["category"] for s in data["data"]["specifications"]], ["Flooring"])
+        _, cached_queries = self.get(other_url)
+        self.assertEqual(cached_queries, 0)
+
+    def test_reference_changes_invalidate_details(self):
+        url = f"{self.LIST_URL}{self.prop.slug}/"
+        self.get(url)
+        developer = self.prop.developer
+        developer.name = "Renamed Developer"
+        developer.save()
+        data, _ = self.get(url)
+        self.assertEqual(data["data"]["developer"]["name"], "Renamed Developer")
+
+
+class PropertyConditionalGetTests(PropertyAPITestCase):
+    LIST_URL = "/api/properties/"
+
+    def setUp(self):
+        super().setUp()
+        self.prop = make_catalog(1)[0]
+        self.url = f"{self.LIST_URL}{self.prop.slug}/"
+
+    def test_detail_revalidates_with_etag_and_last_modified(self):
+        response = self.client.get(self.url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        with CaptureQueriesContext(connection) as ctx:
+            cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached["ETag"], etag)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        self.prop.rate_cards.create(name="Stamp Duty", amount=Decimal("4.90"), unit="percent")
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+
+    def test_detail_last_modified_falls_back_to_updated_at(self):
+        # A flushed cache (or another worker's local one) has no bump time for the property
+        updated_at = datetime(2026, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc)
+        Property.objects.filter(pk=self.prop.pk).update(updated_at=updated_at)
+        cache.clear()
+        cache.set(REFERENCE_MODIFIED_KEY, 0, None)
+        expected = http_date(updated_at.timestamp())
+        self.assertEqual(self.client.get(self.url)["Last-Modified"], expected)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=expected).status_code, 304)
+
+        # Slug still cached, bump time evicted
+        cache.delete(PROPERTY_MODIFIED_KEY.format(pk=self.prop.pk))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=expected).status_code, 304)
+
+    def test_child_edits_touch_updated_at(self):
+        before = Property.objects.get(pk=self.prop.pk).updated_at
+        self.prop.nearby_places.create(name="Metro Station", distance_km=Decimal("1.20"))
+        self.assertGreater(Property.objects.get(pk=self.prop.pk).updated_at, before)
+
+    def test_list_revalidates_without_queries(self):
+        etag = self.client.get(self.LIST_URL, {"status": "ready"})["ETag"]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.LIST_URL, {"status": "ready"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        make_catalog(1)
+        self.assertEqual(self.client.get(self.LIST_URL, {"status": "ready"}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class PropertyLookupTests(PropertyAPITestCase):
+    LIST_URL = "/api/properties/"
+
+    def setUp(self):
+        super().setUp()
+        self.prop, self.other = make_catalog(2)
+
+    def retrieve(self, lookup):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f"{self.LIST_URL}{lookup}/")
+        return response, ctx.captured_queries
+
+    def test_heavy_queryset_runs_once(self):
+        cache.clear()  # cold lookup map and response cache
+        response, queries = self.retrieve(self.prop.slug)
+        self.assertEqual(response.data["data"]["id"], self.prop.pk)
+        # lookup + property row + media, units, amenities, specifications, rate cards, nearby places
+        self.assertEqual(len(queries), 8)
+        self.assertEqual(sum('FROM "properties_property"' in q["sql"] for q in queries), 2)
+
+    def test_numeric_slug_wins_over_id(self):
+        self.other.slug = str(self.prop.pk)
+        self.other.save()
+        response, _ = self.retrieve(self.prop.pk)
+        self.assertEqual(response.data["data"]["id"], self.other.pk)
+
+    def test_renamed_slug_is_remapped(self):
+        old_slug = self.prop.slug
+        self.retrieve(old_slug)
+        self.prop.slug = "renamed-project"
+        self.prop.save()
+        self.assertEqual(self.retrieve(old_slug)[0].status_code, 404)
+        self.assertEqual(self.retrieve("renamed-project")[0].data["data"]["id"], self.prop.pk)
+
+    def test_unknown_lookup_is_not_found(self):
+        self.assertEqual(self.retrieve("no-such-project")[0].status_code, 404)
+        self.prop.delete()
+        self.assertEqual(self.retrieve(self.prop.slug)[0].status_code, 404)
+
+
+class PropertySparseFieldsetTests(PropertyAPITestCase):
+    LIST_URL = "/api/properties/"
+
+    def setUp(self):
+        super().setUp()
+        self.prop = make_catalog(1)[0]
+        self.prop.rate_cards.create(name="PLC", amount=Decimal("100.00"), unit="per sq.ft")
+        self.url = f"{self.LIST_URL}{self.prop.slug}/"
+
+    def retrieve(self, params):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data["data"], ctx.captured_queries
+
+    def test_fields_prune_payload_and_prefetches(self):
+        data, queries = self.retrieve({"fields": "id,title,slug"})
+        self.assertEqual(set(data), {"id", "title", "slug"})
+        # lookup + the property row, no relation queries
+        self.assertEqual(len(queries), 2)
+
+    def test_expand_and_dotted_fields(self):
+        data, queries = self.retrieve({"fields": "id,developer.name,units.unit_type", "expand": "rate_cards"})
+        self.assertEqual(set(data), {"id", "developer", "units", "rate_cards"})
+        self.assertEqual(data["developer"], {"name": "Shivalik Group"})
+        self.assertEqual(data["units"], [{"unit_type": "2BHK"}, {"unit_type": "3BHK"}])
+        self.assertEqual(data["rate_cards"][0]["name"], "PLC")
+        self.assertEqual(len(queries), 4)  # lookup + row (with developer) + units + rate cards
+
+    def test_expand_alone_makes_relations_opt_in(self):
+        data, queries = self.retrieve({"expand": "units"})
+        self.assertIn("description", data)
+        self.assertIn("area", data)
+        self.assertEqual([unit["unit_type"] for unit in data["units"]], ["2BHK", "3BHK"])
+        for relation in ("developer", "details", "media", "amenities", "specifications", "rate_cards", "nearby_places"):
+            self.assertNotIn(relation, data)
+        self.assertEqual(len(queries), 3)  # lookup + row + units
+
+    def test_list_cards_accept_fields(self):
+        response = self.client.get(self.LIST_URL, {"fields": "id,slug,units"})
+        self.assertEqual(set(response.data["data"][0]), {"id", "slug", "units"})
+
+    def test_no_params_renders_everything(self):
+        data, _ = self.retrieve({})
+        self.assertIn("nearby_places", data)
+        self.assertIn("description", data)
+
+
+class PropertyExportTests(PropertyAPITestCase):
+    URL = "/api/properties/export/"
+
+    def setUp(self):
+        super().setUp()
+        self.properties = make_catalog(5)
+        self.client.force_authenticate(User.objects.get(username="lister"))
+
+    def export(self, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.URL, params or {})
+            body = b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return response, body, len(ctx.captured_queries)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.URL).status_code, 401)
+
+    def test_ndjson_streams_every_card_in_chunks(self):
+        with mock.patch("properties.export.EXPORT_CHUNK_SIZE", 2):
+            response, body, queries = self.export()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual([u["unit_type"] for u in rows[0]["units"]], ["2BHK", "3BHK"])
+        self.assertEqual(len({row["id"] for row in rows}), 5)
+        self.assertEqual(queries, 1)  # one streamed Property + card query, whatever the chunk size
+
+    def test_csv_applies_filters(self):
+        self.properties[0].title = "Skyline Residency"
+        self.properties[0].save()
+        response, body, _ = self.export({"export_format": "csv", "search": "skyline"})
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+        lines = body.decode().splitlines()
+        self.assertTrue(lines[0].startswith("id,title,slug"))
+        self.assertEqual(len(lines), 2)
+        self.assertIn("Skyline Residency", lines[1])
+        self.assertIn("2BHK|3BHK", lines[1])
+
+    def test_unknown_format(self):
+        response = self.client.get(self.URL, {"export_format": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+
+class PropertyImportTests(PropertyAPITestCase):
+    URL = "/api/properties/import/"
+
+    def setUp(self):
+        super().setUp()
+        make_catalog(1)
+        self.user = User.objects.get(username="lister")
+        self.area = Area.objects.get()
+        self.amenity = Amenity.objects.first()
+
+    def document(self, title, **extra):
+        return {
+            "title": title,
+            "description": "Imported",
+            "property_type": "APARTMENT",
+            "status": "UPCOMING",
+            "price_min": "5000000",
+            "price_max": "7000000",
+            "area": self.area.pk,
+            "latitude": 23.03,
+            "longitude": 72.51,
+            "amenities": [self.amenity.pk],
+            "units": [{"unit_type": "2BHK", "rooms": 2, "price": "5000000"}],
+            "media": [{"media_type": "VIDEO", "video_url": "https://example.com/tour"}],
+            "rate_cards": [{"name": "PLC", "amount": "150.00"}],
+            "details": {"total_towers": 3},
+            **extra,
+        }
+
+    def ndjson(self, documents):
+        return "\n".join(json.dumps(d) if isinstance(d, dict) else d for d in documents)
+
+    def import_lines(self, lines):
+        return PropertyImporter(self.user).run(lines)
+
+    def test_query_count_is_per_batch_not_per_row(self):
+        def queries(count, offset):
+            lines = [json.dumps(self.document(f"Imported {offset + i}")) for i in range(count)]
+            with CaptureQueriesContext(connection) as ctx:
+                self.import_lines(lines)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries(2, 0), queries(6, 10))
+
+    def test_nested_rows_cards_and_search_are_written(self):
+        report = self.import_lines([json.dumps(self.document("Skyline Towers"))])
+        self.assertEqual((report["created"], report["failed"]), (1, 0))
+        prop = Property.objects.get(slug="skyline-towers")
+        self.assertEqual(prop.units.get().unit_type, "2BHK")
+        self.assertEqual(prop.details.total_towers, 3)
+        self.assertEqual(list(prop.amenities.all()), [self.amenity])
+        self.assertEqual(prop.geohash[:5], "ts5e4")
+        self.assertEqual(prop.card.unit_types, ["2BHK"])
+
+        response = self.client.get("/api/properties/", {"search": "skyline"})
+        self.assertEqual([row["slug"] for row in response.data["data"]], ["skyline-towers"])
+        self.assertEqual(self.client.get("/api/properties/skyline-towers/").status_code, 200)
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        lines = [
+            json.dumps(self.document("Good One")),
+            "{not json",
+            json.dumps(self.document("Project 1")),  # slug taken by make_catalog
+            json.dumps(self.document("Bad Area", area=999999)),
+            json.dumps(self.document("Good One")),  # duplicate within the batch
+            json.dumps({"title": "No price"}),
+        ]
+        report = self.import_lines(lines)
+        self.assertEqual((report["created"], report["failed"]), (1, 5))
+        self.assertEqual([e["line"] for e in report["errors"]], [2, 3, 4, 5, 6])
+        self.assertIn("slug", report["errors"][1]["errors"])
+        self.assertIn("area", report["errors"][2]["errors"])
+
+    def test_slug_longer_than_the_column_is_a_row_error(self):
+        report = self.import_lines([
+            json.dumps(self.document("Long Slug", slug="a" * 80)),
+            json.dumps(self.document("Short Slug")),
+        ])
+        self.assertEqual((report["created"], report["failed"]), (1, 1))
+        self.assertEqual(report["errors"][0]["line"], 1)
+        self.assertIn("slug", report["errors"][0]["errors"])
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "inventory.ndjson")
+            with open(path, "w") as handle:
+                handle.write(self.ndjson([self.document("From File"), self.document("Project 1")]))
+            out, err = StringIO(), StringIO()
+            call_command("import_properties", path, user="lister", stdout=out, stderr=err)
+        self.assertIn("Imported 1 properties (1 failed)", out.getvalue())
+        self.assertIn("line 2", err.getvalue())
+        self.assertTrue(Property.objects.filter(slug="from-file").exists())
+
+    def test_api_is_admin_only(self):
+        body = self.ndjson([self.document("Via Api")])
+        self.client.force_authenticate(self.user)
+        response = self.client.post(self.URL, body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.post(self.URL, body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["data"]["created"], 1)
+
+
+class PropertyUnitFilterTests(PropertyAPITestCase):
+    LIST_URL = "/api/properties/"
+
+    def setUp(self):
+        super().setUp()
+        self.small, self.large, self.no_units = make_catalog(3)
+        self.small.units.all().delete()
+        self.large.units.all().delete()
+        self.no_units.units.all().delete()
+        UnitPlan.objects.create(property=self.small, unit_type="1BHK", rooms=1, carpet_area_sqft=450,
+                                price=Decimal("3000000"), price_per_sqft=Decimal("6666.67"))
+        UnitPlan.objects.create(property=self.small, unit_type="2BHK", rooms=2, carpet_area_sqft=650,
+                                price=Decimal("4000000"), price_per_sqft=Decimal("6153.85"))
+        UnitPlan.objects.create(property=self.large, unit_type="3BHK", rooms=3, carpet_area_sqft=1200,
+                                price=Decimal("9000000"), price_per_sqft=Decimal("7500.00"))
+        UnitPlan.objects.create(property=self.large, unit_type="4BHK", rooms=4, carpet_area_sqft=1800,
+                                price=Decimal("14000000"), price_per_sqft=Decimal("7777.78"))
+
+    def slugs(self, params):
+        response = self.client.get(self.LIST_URL, params)
+        self.assertEqual(response.status_code, 200)
+        return [row["slug"] for row in response.data["data"]], response.data["data"]
+
+    def test_card_keeps_unit_aggregates(self):
+        card = PropertyCard.objects.get(pk=self.large.pk)
+        self.assertEqual((card.rooms_min, card.rooms_max), (3, 4))
+        self.assertEqual((card.carpet_min, card.carpet_max), (1200, 1800))
+        self.assertEqual(card.ppsf_max, Decimal("7777.78"))
+
+    def test_rooms_in(self):
+        slugs, _ = self.slugs({"rooms_in": "2,3"})
+        self.assertCountEqual(slugs, [self.small.slug, self.large.slug])
+        slugs, _ = self.slugs({"rooms_in": "4"})
+        self.assertEqual(slugs, [self.large.slug])
+
+    def test_conditions_must_hold_for_the_same_unit(self):
+        # small has a 2-room unit and a 450 sqft unit, but not one that is both
+        slugs, _ = self.slugs({"rooms_in": "2", "carpet_max": "500"})
+        self.assertEqual(slugs, [])
+        slugs, _ = self.slugs({"rooms_in": "2", "carpet_max": "700"})
+        self.assertEqual(slugs, [self.small.slug])
+
+    def test_ppsf_range_and_matched_units(self):
+        slugs, rows = self.slugs({"ppsf_min": "7000", "carpet_min": "1500"})
+        self.assertEqual(slugs, [self.large.slug])
+        self.assertEqual([u["unit_type"] for u in rows[0]["matched_units"]], ["4BHK"])
+        self.assertEqual(rows[0]["matched_units"][0]["price_per_sqft"], "7777.78")
+
+    def test_matched_units_only_with_unit_filters(self):
+        _, rows = self.slugs({})
+        self.assertTrue(all(row["matched_units"] is None for row in rows))
+
+    def test_unit_ordering(self):
+        slugs, _ = self.slugs({"ordering": "-carpet_area"})
+        self.assertEqual(slugs[:2], [self.large.slug, self.small.slug])
+        slugs, _ = self.slugs({"ordering": "price_per_sqft", "rooms_in": "1,2,3,4"})
+        self.assertEqual(slugs, [self.small.slug, self.large.slug])
+
+    def test_card_is_joined_only_for_unit_filters_and_ordering(self):
+        def joins_card(params):
+            return "properties_propertycard" in str(PropertyFilter(params, queryset=Property.objects.all()).qs.query)
+
+        self.assertFalse(joins_card({"status": "ready", "ordering": "-price_min"}))
+        self.assertTrue(joins_card({"carpet_min": "500"}))
+        self.assertTrue(joins_card({"ordering": "title,-bhk"}))
+
+    def test_one_extra_query_for_matched_units(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.LIST_URL, {"rooms_in": "1,2,3,4"})
+        self.assertLessEqual(len(ctx.captured_queries), PropertyListQueryBudgetTests.QUERY_BUDGET + 1)
+        self.assertNotIn("DISTINCT", ctx.captured_queries[-1]["sql"])
+
+    def test_bad_rooms(self):
+        response = self.client.get(self.LIST_URL, {"rooms_in": "two"})
+        self.assertEqual(response.status_code, 400)
+
+
+class PropertyQueryPlanTests(TestCase):
+    """
+    EXPLAIN the list endpoint's hot filter/order paths over a large synthetic
+    catalog and pin the index each one must use (see Property.Meta.indexes).
+    The catalog is big enough, and analyzed, for the planner to prefer each
+    index over a full scan on its own, so a plan that stops picking it fails.
+    """
+
+    CATALOG_SIZE = 20000
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username="planner")
+        state = State.objects.create(name="Gujarat")
+        city = City.objects.create(name="Ahmedabad", state=state)
+        areas = [Area.objects.create(name=f"Area {i}", city=city) for i in range(20)]
+        types = [code for code, _ in Property.PROPERTY_TYPES]
+        statuses = [code for code, _ in Property.STATUS_CHOICES]
+        Property.objects.bulk_create(
+            [
+                Property(
+                    title=f"Synthetic {i}",
+                    slug=f"synthetic-{i}",
+                    description="",
+                    area=areas[i % len(areas)],
+                    property_type=types[i % len(types)],
+                    status=statuses[i % len(statuses)],
+                    listed_by=user,
+                    is_featured=i % 50 == 0,
+                    price_min=Decimal(1_000_000 + i * 1000),
+                    price_max=Decimal(2_000_000 + i * 1000),
+                )
+                for i in range(cls.CATALOG_SIZE)
+            ],
+            batch_size=2000,
+        )
+        cls.area = areas[3]
+        with connection.cursor() as cursor:
+            # Fresh statistics, as autovacuum (or sqlite_stat1) would have in production
+            cursor.execute("ANALYZE")
+
+    def plan(self, params, ordering=("-created_at", "id")):
+        base = Property.objects.select_related("card").defer("description", "highlights", "search_vector")
+        queryset = PropertyFilter(params, queryset=base).qs.order_by(*ordering)[:10]
+        return queryset.explain()
+
+    def assertUsesIndex(self, index_name, params, **kwargs):
+        plan = self.plan(params, **kwargs)
+        self.assertIn(index_name, plan, f"{params} did not use {index_name}:\n{plan}")
+
+    def test_default_ordering(self):
+        self.assertUsesIndex("property_recent_idx", {})
+
+    def test_type_and_status(self):
+        self.assertUsesIndex("property_type_status_idx", {"property_type": "villa", "status": "ready"})
+
+    def test_status(self):
+        self.assertUsesIndex("property_status_idx", {"status": "ready"})
+
+    def test_area(self):
+        self.assertUsesIndex("property_area_recent_idx", {"area": self.area.pk})
+
+    def test_featured(self):
+        self.assertUsesIndex("property_featured_idx", {"is_featured": "true"})
+
+    def test_price_ordering(self):
+        self.assertUsesIndex("property_price_min_idx", {}, ordering=("price_min", "id"))
+        self.assertUsesIndex("property_price_max_idx", {"price_max": "2500000"}, ordering=("price_max", "id"))
+
+
+class PropertySimilarTests(PropertyAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.apartments = make_catalog(3)
+        city = City.objects.get()
+        far_area = Area.objects.create(name="Gota", city=city)
+        user = User.objects.get(username="lister")
+        self.villas = [
+            Property.objects.create(
+                title=f"Villa {i}", description="", property_type="VILLA", status="UPCOMING", area=far_area,
+                listed_by=user, price_min=Decimal("30000000") + i, price_max=Decimal("45000000"),
+                latitude=23.10, longitude=72.54,
+            )
+            for i in range(2)
+        ]
+        call_command("rebuild_similar_properties", stdout=StringIO())
+
+    def test_top_k_is_vectorized_and_excludes_self(self):
+        matrix = np.array([[1, 0], [0.9, 0.1], [0, 1], [0.1, 0.9]], dtype=np.float32)
+        neighbours, scores = top_k_neighbours(matrix, k=2, chunk_size=3)
+        self.assertEqual(neighbours[:, 0].tolist(), [1, 0, 3, 2])
+        self.assertTrue((scores[:, 0] >= scores[:, 1]).all())
+
+    def test_nearest_neighbour_is_the_comparable_project(self):
+        response = self.client.get(f"/api/properties/{self.villas[0].slug}/similar/")
+        self.assertEqual(response.status_code, 200)
+        rows = response.data["data"]
+        self.assertEqual(rows[0]["id"], self.villas[1].pk)
+        self.assertEqual(len(rows), 4)  # everyone else
+        self.assertNotIn(self.villas[0].pk, [row["id"] for row in rows])
+        self.assertGreater(rows[0]["similarity"], rows[-1]["similarity"])
+
+    def test_one_indexed_lookup(self):
+        url = f"/api/properties/{self.apartments[0].pk}/similar/"
+        self.client.get(url)  # warm the slug/id lookup map
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {"limit": 2})
+        self.assertEqual(len(response.data["data"]), 2)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_unknown_property(self):
+        self.assertEqual(self.client.get("/api/properties/missing/similar/").status_code, 404)
+
+
+def image_upload(name="photo.jpg", size=(1200, 900), mode="RGB", fmt="JPEG"):
+    buffer = BytesIO()
+    Image.new(mode, size, "teal").save(buffer, format=fmt)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f"image/{fmt.lower()}")
+
+
+class TempMediaTestCase(PropertyAPITestCase):
+    """Uploads go to a throwaway MEDIA_ROOT (on local disk, not Cloudinary) and staging dir."""
+    media_queue = "inline"
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = override_settings(
+            MEDIA_ROOT=media_root.name, MEDIA_STAGING_ROOT=os.path.join(media_root.name, "staging"),
+            MEDIA_QUEUE=self.media_queue,
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+            },
+        )
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.media_root = media_root.name
+        self.prop = make_catalog(1)[0]
+        self.prop.media.all().delete()  # uploads below become the listing image
+
+    def path(self, url):
+        return os.path.join(self.media_root, url.removeprefix(settings.MEDIA_URL))
+
+
+class PropertyRenditionTests(TempMediaTestCase):
+    def test_upload_builds_every_size_and_format(self):
+        media = PropertyMedia.objects.create(property=self.prop, media_type="IMAGE", file=image_upload())
+        media.refresh_from_db()
+        self.assertEqual(media.renditions["source"], media.file.name)
+        for size, (width, height) in renditions.PRESETS["photo"].items():
+            rendition = media.renditions[size]
+            self.assertEqual((rendition["width"], rendition["height"]), (width, height))
+            for fmt in renditions.FORMATS:
+                self.assertTrue(os.path.exists(self.path(rendition[fmt])))
+
+        response = self.client.get("/api/properties/")
+        primary = response.data["data"][0]["primary_image"]
+        self.assertEqual(primary["renditions"]["thumb"]["webp"], media.renditions["thumb"]["webp"])
+
+    def test_unchanged_image_is_not_rebuilt(self):
+        media = PropertyMedia.objects.create(property=self.prop, media_type="IMAGE", file=image_upload())
+        with mock.patch("core.renditions.build_renditions") as build:
+            media.is_primary = True
+            media.save()
+        build.assert_not_called()
+
+    def test_replaced_or_deleted_images_take_their_renditions_along(self):
+        def files(media):
+            media.refresh_from_db()
+            return [os.path.join(self.media_root, name) for name in media.renditions["files"]]
+
+        media = PropertyMedia.objects.create(property=self.prop, media_type="IMAGE", file=image_upload())
+        first = files(media)
+        self.assertEqual(len(first), 6)
+        with self.captureOnCommitCallbacks(execute=True):
+            media.file = image_upload("second.jpg")
+            media.save()
+        second = files(media)
+        self.assertTrue(all(os.path.exists(path) for path in second))
+        self.assertFalse(any(os.path.exists(path) for path in first))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            media.delete()
+        self.assertFalse(any(os.path.exists(path) for path in second))
+
+    def test_transparent_logo_is_fitted_and_flattened_for_jpeg(self):
+        developer = Developer.objects.create(
+            name="Adani Realty", logo=image_upload("logo.png", size=(400, 200), mode="RGBA", fmt="PNG"),
+        )
+        developer.refresh_from_db()
+        self.assertEqual((developer.renditions["card"]["width"], developer.renditions["card"]["height"]), (240, 120))
+        with Image.open(self.path(developer.renditions["card"]["jpeg"])) as jpeg:
+            self.assertEqual(jpeg.mode, "RGB")
+
+    def test_cloudinary_renditions_are_transformation_urls(self):
+        with mock.patch.object(cloudinary.config(), "cloud_name", "demo"):
+            sizes = renditions._cloudinary_renditions("media/housingwalaa/property/media/abc", "photo")
+        self.assertEqual(
+            sizes["thumb"]["webp"],
+            "https://res.cloudinary.com/demo/image/upload/c_fill,g_auto,h_240,q_auto,w_320"
+            "/v1/media/housingwalaa/property/media/abc.webp",
+        )
+
+    def test_backfill_command(self):
+        media = PropertyMedia.objects.create(property=self.prop, media_type="IMAGE", file=image_upload())
+        PropertyMedia.objects.filter(pk=media.pk).update(renditions={})
+        call_command("rebuild_renditions", stdout=StringIO())
+        media.refresh_from_db()
+        self.assertIn("hero", media.renditions)
+        self.prop.card.refresh_from_db()
+        self.assertIn("hero", self.prop.card.primary_media["renditions"])
+
+
+class PropertyMediaQueueTests(TempMediaTestCase):
+    media_queue = "db"
+
+    def setUp(self):
+        super().setUp()
+        self.staging_root = settings.MEDIA_STAGING_ROOT
+
+    def upload(self):
+        return PropertyMedia.objects.create(property=self.prop, media_type="IMAGE", file=image_upload())
+
+    def test_upload_is_staged_then_promoted_by_the_worker(self):
+        media = self.upload()
+        self.assertEqual(media.processing_state, "PENDING")
+        self.assertTrue(media.file.name.startswith("staging/"))
+        self.assertTrue(os.path.exists(os.path.join(self.staging_root, media.file.name.removeprefix("staging/"))))
+        self.assertEqual(media.renditions, {})
+        self.assertEqual(MediaTask.objects.count(), 1)
+
+        call_command("process_media", "--once", stdout=StringIO())
+
+        media.refresh_from_db()
+        self.assertEqual(media.processing_state, "READY")
+        self.assertFalse(media.file.name.startswith("staging/"))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, media.file.name)))
+        self.assertEqual(os.listdir(os.path.join(self.staging_root, "housingwalaa/property/media")), [])
+        self.assertEqual(media.renditions["source"], media.file.name)
+        self.assertFalse(MediaTask.objects.exists())
+        self.prop.card.refresh_from_db()
+        card_image = self.prop.card.primary_media
+        self.assertEqual(card_image["processing_state"], "READY")
+        self.assertIn("thumb", card_image["renditions"])
+
+    def test_pending_uploads_have_no_url(self):
+        media = self.upload()
+        self.prop.brochure_pdf = SimpleUploadedFile("brochure.pdf", b"%PDF-1.4 brochure")
+        self.prop.save()
+
+        def payloads():
+            detail = self.client.get(f"/api/properties/{self.prop.slug}/").data["data"]
+            listed = self.client.get("/api/properties/").data["data"][0]
+            return detail["media"][0]["file"], detail["brochure_pdf"], listed["primary_image"]["file"]
+
+        self.assertEqual(payloads(), (None, None, None))
+        call_command("process_media", "--once", stdout=StringIO())
+        media.refresh_from_db()
+        media_url, brochure_url, card_url = payloads()
+        self.assertTrue(media_url.endswith(media.file.url))
+        self.assertIn("/brochures/", brochure_url)
+        self.assertEqual(card_url, media.file.url)
+
+    def test_placeholder_is_stored_and_listed_inline(self):
+        media = self.upload()
+        call_command("process_media", "--once", stdout=StringIO())
+        media.refresh_from_db()
+        self.assertEqual((media.width, media.height), (1200, 900))
+        self.assertEqual(len(media.blurhash), 28)
+
+        response = self.client.get("/api/properties/")
+        listed = response.data["data"][0]["primary_image"]
+        self.assertEqual(
+            (listed["width"], listed["height"], listed["blurhash"]), (1200, 900, media.blurhash),
+        )
+
+    def test_placeholder_backfill_command(self):
+        media = self.upload()
+        call_command("process_media", "--once", stdout=StringIO())
+        PropertyMedia.objects.filter(pk=media.pk).update(width=None, height=None, blurhash="")
+        call_command("backfill_media_placeholders", stdout=StringIO())
+        media.refresh_from_db()
+        self.assertEqual((media.width, media.height), (1200, 900))
+        self.assertTrue(media.blurhash)
+        self.prop.card.refresh_from_db()
+        self.assertEqual(self.prop.card.primary_media["blurhash"], media.blurhash)
+
+    def test_blurhash_matches_the_reference_encoder(self):
+        gradient = np.tile(np.linspace(0, 255, 32, dtype=np.uint8)[None, :, None], (24, 1, 3))
+        self.assertEqual(blurhash_encode(Image.fromarray(gradient)), "L$HetW00xuWBofWBj[fQfQfQfQfQ")
+
+    def test_later_saves_of_a_pending_row_queue_nothing(self):
+        media = self.upload()
+        media.is_primary = True
+        media.save()
+        self.assertEqual(MediaTask.objects.count(), 1)
+
+    def test_replaced_upload_only_promotes_the_newest_file(self):
+        media = self.upload()
+        first = media.file.name
+        media.file = image_upload("second.jpg")
+        media.save()
+        self.assertEqual(MediaTask.objects.count(), 2)
+
+        call_command("process_media", "--once", stdout=StringIO())
+        media.refresh_from_db()
+        self.assertIn("second", media.file.name)
+        self.assertFalse(os.path.exists(os.path.join(self.staging_root, first.removeprefix("staging/"))))
+        self.assertFalse(MediaTask.objects.exists())
+
+    def test_failing_transfer_is_retried_then_marked_failed(self):
+        media = self.upload()
+        with mock.patch("properties.media_queue.promote", side_effect=OSError("storage down")), \
+                self.assertLogs("properties.media_queue", "WARNING"):
+            for _ in range(3):
+                MediaTask.objects.update(next_attempt_at=None)  # skip the backoff
+                call_command("process_media", "--once", stdout=StringIO())
+        media.refresh_from_db()
+        self.assertEqual(media.processing_state, "FAILED")
+        task = MediaTask.objects.get()
+        self.assertEqual(task.attempts, 3)
+        self.assertIn("storage down", task.last_error)
+
+    def test_failed_task_waits_out_its_retry_delay(self):
+        media = self.upload()
+        with mock.patch("properties.media_queue.promote", side_effect=OSError("storage down")), \
+                self.assertLogs("properties.media_queue", "WARNING"):
+            call_command("process_media", "--once", stdout=StringIO())
+            call_command("process_media", "--once", stdout=StringIO())
+        task = MediaTask.objects.get()
+        self.assertEqual(task.attempts, 1)
+        self.assertGreater(task.next_attempt_at, timezone.now() + timedelta(seconds=25))
+        media.refresh_from_db()
+        self.assertEqual(media.processing_state, "PENDING")
+
+        # Due again: the next attempt succeeds
+        with mock.patch("properties.media_queue.timezone.now", return_value=task.next_attempt_at):
+            call_command("process_media", "--once", stdout=StringIO())
+        media.refresh_from_db()
+        self.assertEqual(media.processing_state, "READY")
+        self.assertEqual(media_queue.retry_delay(3), timedelta(seconds=120))
+
+    def test_nested_update_dropping_a_pending_upload_cancels_it(self):
+        media = self.upload()
+        staged_path = os.path.join(self.staging_root, media.file.name.removeprefix("staging/"))
+        self.prop.refresh_from_db()
+        self.assertEqual(self.prop.primary_image_id, media.pk)
+
+        serializer = PropertySerializer(self.prop, data={"media": []}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            serializer.save()
+
+        self.assertFalse(PropertyMedia.objects.filter(pk=media.pk).exists())
+        self.assertFalse(MediaTask.objects.exists())
+        self.assertFalse(os.path.exists(staged_path))
+        self.prop.refresh_from_db()
+        self.assertEqual((self.prop.primary_image_id, self.prop.image_count), (None, 0))
+        self.assertIsNone(self.prop.card.primary_media)
+
+    def test_thread_queue_submits_after_commit(self):
+        with override_settings(MEDIA_QUEUE="thread"), mock.patch("properties.media_queue.executor") as executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.upload()
+        task = MediaTask.objects.get()
+        executor.return_value.submit.assert_called_once_with(media_queue._run_in_thread, task.pk)
+
+    def test_thread_queue_resubmits_a_failed_task_after_its_delay(self):
+        self.upload()
+        task = MediaTask.objects.get()
+        with mock.patch("properties.media_queue.promote", side_effect=OSError("storage down")), \
+                mock.patch("properties.media_queue.close_old_connections"), \
+                mock.patch("properties.media_queue.threading.Timer") as timer, \
+                self.assertLogs("properties.media_queue", "WARNING"):
+            media_queue._run_in_thread(task.pk)
+        delay, callback = timer.call_args.args
+        self.assertAlmostEqual(delay, 30, delta=5)
+        self.assertEqual((callback, timer.call_args.kwargs["args"]), (media_queue.submit, (task.pk,)))
+        timer.return_value.start.assert_called_once_with()
+
+        # Promoted this time: nothing left to resubmit
+        MediaTask.objects.update(next_attempt_at=None)
+        with mock.patch("properties.media_queue.close_old_connections"), \
+                mock.patch("properties.media_queue.threading.Timer") as timer:
+            media_queue._run_in_thread(task.pk)
+        self.assertFalse(MediaTask.objects.exists())
+        timer.assert_not_called()
+
+    def test_brochure_upload_is_staged(self):
+        self.prop.brochure_pdf = SimpleUploadedFile("brochure.pdf", b"%PDF-1.4 brochure")
+        self.prop.save()
+        self.assertEqual(self.prop.brochure_state, "PENDING")
+        call_command("process_media", "--once", stdout=StringIO())
+        self.prop.refresh_from_db()
+        self.assertEqual(self.prop.brochure_state, "READY")
+        self.assertEqual(self.prop.brochure_pdf.read(), b"%PDF-1.4 brochure")
+
+    def test_saving_an_old_copy_keeps_the_promoted_brochure(self):
+        self.prop.brochure_pdf = SimpleUploadedFile("brochure.pdf", b"%PDF-1.4 brochure")
+        self.prop.save()
+        stale = Property.objects.get(pk=self.prop.pk)  # PENDING, staged name
+        call_command("process_media", "--once", stdout=StringIO())
+
+        stale.title = "Renamed"
+        stale.save()
+        self.prop.refresh_from_db()
+        self.assertEqual(self.prop.title, "Renamed")
+        self.assertEqual(self.prop.brochure_state, "READY")
+        self.assertFalse(self.prop.brochure_pdf.name.startswith("staging/"))
+
+        self.prop.brochure_pdf = None
+        self.prop.save()
+        self.prop.refresh_from_db()
+        self.assertFalse(self.prop.brochure_pdf)
+
+
+class PropertyBatchTests(PropertyAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.properties = make_catalog(5)
+        first, second = self.properties[:2]
+        RateCard.objects.create(property=first, name="PLC Charges", amount=Decimal("150.00"), unit="per sq.ft")
+        RateCard.objects.create(property=second, name="PLC Charges", amount=Decimal("150.00"), unit="per sq.ft")
+        RateCard.objects.create(property=second, name="Club Membership", amount=Decimal("200000.00"), unit="fixed")
+        UnitPlan.objects.create(property=second, unit_type="4BHK", rooms=4, price=Decimal("9900000.00"))
+
+    def ids(self, properties):
+        return ",".join(str(prop.pk) for prop in properties)
+
+    def test_batch_keeps_the_requested_order(self):
+        third, first = self.properties[2], self.properties[0]
+        response = self.client.get("/api/properties/batch/", {"ids": f"{third.slug},{first.pk},missing,{third.pk}"})
+        self.assertEqual(response.status_code, 200)
+        data = response.data["data"]
+        self.assertEqual([row["id"] for row in data["results"]], [third.pk, first.pk])
+        self.assertEqual(data["missing"], ["missing"])
+        self.assertEqual(len(data["results"][0]["units"]), 2)
+
+    def test_one_prefetch_pass_whatever_the_batch_size(self):
+        def queries(properties):
+            url = "/api/properties/batch/"
+            self.client.get(url, {"ids": self.ids(properties)})  # warm the slug/id lookup map
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(url, {"ids": self.ids(properties)})
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries(self.properties[:2]), queries(self.properties))
+
+    def test_compare_aligns_units_rate_cards_and_details(self):
+        first, second = self.properties[:2]
+        response = self.client.get("/api/properties/compare/", {"ids": f"{second.slug},{first.slug}"})
+        self.assertEqual(response.status_code, 200)
+        table = response.data["data"]["comparison"]
+        self.assertEqual([column["id"] for column in table["columns"]], [second.pk, first.pk])
+
+        units = {row["label"]: row for row in table["units"]}
+        self.assertEqual(list(units), ["2BHK", "3BHK", "4BHK"])
+        self.assertTrue(units["2BHK"]["same"])
+        self.assertEqual(units["4BHK"]["values"][1], None)
+        self.assertEqual(units["4BHK"]["values"][0]["rooms"], 4)
+
+        charges = {row["label"]: row for row in table["rate_cards"]}
+        self.assertTrue(charges["PLC Charges"]["same"])
+        self.assertEqual(charges["Club Membership"]["values"][1], None)
+        self.assertFalse(charges["Club Membership"]["same"])
+
+        details = {row["label"]: row["values"] for row in table["details"]}
+        self.assertEqual(details["total_towers"], [2, 2])
+        self.assertNotIn("parking_type", details)  # empty everywhere
+
+    def test_compare_with_fields_keeps_the_table(self):
+        first, second = self.properties[:2]
+        ids = self.ids([first, second])
+        self.client.get("/api/properties/compare/", {"ids": ids})  # warm the slug/id lookup map
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/properties/compare/", {"ids": ids, "fields": "title"})
+        self.assertEqual(response.status_code, 200)
+        data = response.data["data"]
+        self.assertEqual(data["results"], [{"title": first.title}, {"title": second.title}])
+        table = data["comparison"]
+        self.assertEqual(table["columns"][1], {"id": second.pk, "slug": second.slug, "title": second.title})
+        self.assertEqual([row["label"] for row in table["units"]], ["2BHK", "3BHK", "4BHK"])
+        self.assertEqual(len(table["rate_cards"]), 2)
+        # Rows (with details) + units + rate cards; media, amenities etc. are not fetched
+        self.assertEqual(len(ctx.captured_queries), 3)
+
+    def test_ids_are_validated(self):
+        self.assertEqual(self.client.get("/api/properties/batch/").status_code, 400)
+        response = self.client.get("/api/properties/compare/", {"ids": self.ids(make_catalog(1) + self.properties)})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ids", response.data["errors"])
+
+
+class PropertyNestedUpdateTests(PropertyAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.prop = make_catalog(1)[0]
+        self.two_bhk, self.three_bhk = self.prop.units.order_by("pk")
+
+    def update(self, data):
+        serializer = PropertySerializer(self.prop, data=data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as ctx:
+            serializer.save()
+        return ctx.captured_queries
+
+    def unit(self, unit_type, price="5000000.00", **extra):
+        return {"unit_type": unit_type, "price": price, **extra}
+
+    def test_units_are_diffed_by_id(self):
+        self.update({"units": [
+            self.unit("2BHK", id=self.two_bhk.pk, price="4700000.00"),
+            self.unit("4BHK", price="9000000.00"),
+        ]})
+        units = {u.unit_type: u for u in self.prop.units.all()}
+        self.assertEqual(set(units), {"2BHK", "4BHK"})
+        self.assertEqual(units["2BHK"].pk, self.two_bhk.pk)  # kept its id
+        self.assertEqual(units["2BHK"].price, Decimal("4700000.00"))
+        self.assertFalse(UnitPlan.objects.filter(pk=self.three_bhk.pk).exists())
+
+        self.prop.card.refresh_from_db()
+        self.assertEqual(self.prop.card.unit_types, ["2BHK", "4BHK"])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        few = len(self.update({"units": [self.unit(f"{i}BHK") for i in range(2)]}))
+        many = len(self.update({"units": [self.unit(f"{i}BHK") for i in range(8)]}))
+        self.assertEqual(few, many)
+
+    def test_unchanged_rows_are_not_written(self):
+        queries = self.update({"units": [
+            self.unit("2BHK", id=self.two_bhk.pk, price="4500000.00", rooms=2),
+            self.unit("3BHK", id=self.three_bhk.pk, price="6500000.00", rooms=3),
+        ]})
+        self.assertFalse(any('UPDATE "properties_unitplan"' in q["sql"] for q in queries))
+
+    def test_unknown_child_id_rolls_back(self):
+        serializer = PropertySerializer(self.prop, data={
+            "title": "Renamed",
+            "media": [],
+            "units": [self.unit("5BHK", id=999999)],
+        }, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with self.assertRaises(ValidationError):
+            serializer.save()
+        self.prop.refresh_from_db()
+        self.assertNotEqual(self.prop.title, "Renamed")
+        self.assertEqual(self.prop.media.count(), 3)
+
+    def test_omitted_lists_are_left_alone(self):
+        self.update({"title": "Renamed"})
+        self.assertEqual(self.prop.units.count(), 2)
+        self.assertEqual(self.prop.media.count(), 3)
+
+
+class ORJSONRendererTestCase(TestCase):
+    def test_matches_drf_json_renderer(self):
+        payload = {"success": True, "data": synthetic_detail(1), "note": "a\u2028b"}
+        rendered = ORJSONRenderer().render(payload)
+        self.assertNotIn("\u2028".encode(), rendered)
+        self.assertEqual(json.loads(rendered), json.loads(JSONRenderer().render(payload)))
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DeveloperViewSet, NearbyPlaceViewSet, PropertyDetailsViewSet, PropertyViewSet, PropertyMediaViewSet, RateCardViewSet, UnitPlanViewSet, AmenityViewSet, SpecificationViewSet
+from .views import DeveloperViewSet, PropertyImportView, NearbyPlaceViewSet, PropertyDetailsViewSet, PropertyViewSet, PropertyMediaViewSet, RateCardViewSet, UnitPlanViewSet, AmenityViewSet, SpecificationViewSet
 
 router = DefaultRouter()
 router.register(r"", PropertyViewSet, basename="property")
@@ -14,5 +14,7 @@ router.register(r"nearby-places", NearbyPlaceViewSet, basename="nearby-place")
 router.register(r"developers", DeveloperViewSet, basename="developer")
 
 urlpatterns = [
+    # Before the router: "import" would otherwise be taken for a property slug
+    path("import/", PropertyImportView.as_view(), name="property-import"),
     path("", include(router.urls)),
 ]
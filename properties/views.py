@@ -1,12 +1,26 @@
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
-from properties.filters import PropertyFilter
+from properties.filters import PropertyFilter, UNIT_ORDERING_ANNOTATIONS, matched_units
+from properties.cards import cards_for_page
+from properties.compare import BATCH_MAX_IDS, COMPARE_MAX_IDS, COMPARE_RELATIONS, compare_table, parse_ids
+from properties.export import EXPORT_FORMATS, csv_lines, export_rows, ndjson_lines
+from properties.clusters import CLUSTERS_CACHE_TTL, MAX_ZOOM, cached_clusters
+from properties.conditional import detail_validators, list_validators, not_modified_response, set_validators
+from properties.facets import cached_facets
+from properties.ingest import PropertyImporter
+from properties.lookup import resolve_property_pk, resolve_property_pks
+from properties.pagination import KeysetCursorPagination
+from properties.response_cache import detail_cache_key, get_cached, list_cache_key, set_cached
+from properties.search import PropertySearchFilter
+from properties.suggest import SUGGEST_LIMIT, SUGGEST_MAX_LIMIT, suggest
 from core.permissions import IsAuthenticatedOrReadOnly
-from .models import Developer, NearbyPlace, Property, PropertyDetails, PropertyMedia, RateCard, UnitPlan, Amenity, Specification
-from .serializers import DeveloperSerializer, NearbyPlaceSerializer, PropertyDetailsSerializer, PropertyListSerializer, PropertySerializer, PropertyMediaSerializer, RateCardSerializer, UnitPlanSerializer, AmenitySerializer, SpecificationSerializer
+from .models import Developer, NearbyPlace, Property, PropertyDetails, PropertyMedia, RateCard, SimilarProperty, UnitPlan, Amenity, Specification
+from .serializers import ALL_FIELDS, field_spec, DeveloperSerializer, NearbyPlaceSerializer, PropertyCardSerializer, PropertyDetailsSerializer, PropertySerializer, PropertyMediaSerializer, RateCardSerializer, UnitPlanSerializer, AmenitySerializer, SpecificationSerializer
 from rest_framework import generics, status, permissions, throttling
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
@@ -14,17 +28,26 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from core.response_utils import success_response, error_response
 
+class SuggestThrottle(throttling.UserRateThrottle):
+    scope = "suggest"  # typeahead fires per keystroke, so it gets its own budget
+
+
 class PropertyViewSet(viewsets.ModelViewSet):
+    # Relations PropertySerializer renders, named after its fields
+    detail_prefetch_related = ("media", "units", "amenities", "specifications", "rate_cards", "nearby_places")
+    detail_select_related = ("developer", "details")
+
     queryset = Property.objects.all().prefetch_related(
-        "media", "units", "amenities", "specifications", "rate_cards", "nearby_places"
-    ).select_related("developer", "area", "listed_by")
+        *detail_prefetch_related
+    ).select_related("area", "listed_by", *detail_select_related)
     
     # permission_classes = [permissions.AllowAny]
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     http_method_names = ["get", "head", "options"]
 
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # Search runs last so it can rank matches when no explicit ?ordering= is given
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, PropertySearchFilter]
     search_fields = [
         "title",
         "description",
@@ -37,49 +60,213 @@ class PropertyViewSet(viewsets.ModelViewSet):
     ]
     filterset_class = PropertyFilter
     # filterset_fields = ["property_type", "status", "area"]
-    ordering_fields = ["created_at", "title", "price_min", "price_max"]
+    ordering_fields = ["created_at", "title", "price_min", "price_max", "distance", *UNIT_ORDERING_ANNOTATIONS]
     ordering = ["-created_at", "id"]
     
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # ETag / Last-Modified set up by list() and retrieve()
+        validators = getattr(self, "conditional_validators", None)
+        if validators is not None and response.status_code == status.HTTP_200_OK:
+            set_validators(response, *validators)
+        return response
+
+    @property
+    def paginator(self):
+        # Infinite-scroll clients opt into keyset pages with ?pagination=cursor
+        if not hasattr(self, "_paginator") and self.action == "list" and KeysetCursorPagination.requested(self.request):
+            self._paginator = KeysetCursorPagination()
+        return super().paginator
+
+    def get_queryset(self):
+        if self.action in ("list", "export"):
+            # Filter/order on Property's own columns, read the payload from the
+            # flat PropertyCard row: one query per page, no joins to children.
+            return Property.objects.select_related("card").defer("description", "highlights", "search_vector")
+        spec = field_spec(self.request.query_params)
+        if self.action in ("retrieve", "batch", "compare") and spec is not None and ALL_FIELDS not in spec:
+            # ?fields= / ?expand=: only fetch the relations that will be rendered
+            # (and, for compare, the ones its table is built from)
+            wanted = set(spec) | set(COMPARE_RELATIONS if self.action == "compare" else ())
+            return Property.objects.select_related(
+                *[name for name in self.detail_select_related if name in wanted]
+            ).prefetch_related(
+                *[name for name in self.detail_prefetch_related if name in wanted]
+            )
+        return super().get_queryset()
+
     def get_serializer_class(self):
         if self.action == "list":
-            return PropertyListSerializer  # lightweight for listing
+            return PropertyCardSerializer  # flat read model for listing
         return PropertySerializer  # full details for retrieve, create, update, etc.
 
     def retrieve(self, request, *args, **kwargs):
         # Support /properties/{slug}/ or /properties/{id}/ transparently
         lookup_value = kwargs.get(self.lookup_field or "pk") or kwargs.get("pk")
-        queryset = self.get_queryset()
+        pk = resolve_property_pk(lookup_value) if lookup_value is not None else None
+        if pk is None:
+            raise NotFound()
 
-        obj = None
-        if lookup_value is not None:
-            # Try slug first (even if numeric-like)
-            obj = queryset.filter(slug=lookup_value).first()
-            # Fallback to ID if numeric
-            if obj is None and str(lookup_value).isdigit():
-                obj = queryset.filter(id=int(lookup_value)).first()
+        self.conditional_validators = detail_validators(request, pk)
+        not_modified = not_modified_response(request, *self.conditional_validators)
+        if not_modified is not None:
+            return not_modified
 
-        if obj is None:
-            # Default behavior (may 404 if not a valid pk)
-            response = super().retrieve(request, *args, **kwargs)
-            # Wrap default response if successful
-            if response.status_code == 200:
-                return success_response(data=response.data)
-            return response
+        cache_key = detail_cache_key(request, pk)
+        cached = get_cached(cache_key)
+        if cached is not None:
+            return success_response(data=cached["data"])
 
+        # The full prefetch runs once, for the single matched row
+        obj = self.get_queryset().filter(pk=pk).first()
+        if obj is None:
+            raise NotFound()
         serializer = PropertySerializer(obj, context={"request": request})
+        set_cached(cache_key, serializer.data)
         return success_response(data=serializer.data)
 
+    @action(detail=True, methods=["get"])
+    def similar(self, request, pk=None):
+        # Precomputed neighbours (manage.py rebuild_similar_properties): /properties/{id|slug}/similar/?limit=6
+        property_pk = resolve_property_pk(pk)
+        if property_pk is None:
+            raise NotFound()
+        try:
+            limit = min(int(request.query_params.get("limit", SimilarProperty.TOP_K)), SimilarProperty.TOP_K)
+        except ValueError:
+            limit = SimilarProperty.TOP_K
+        links = list(
+            SimilarProperty.objects.filter(property_id=property_pk)
+            .select_related("similar__card")
+            .order_by("rank")[:max(limit, 1)]
+        )
+        cards = cards_for_page([link.similar for link in links])
+        data = PropertyCardSerializer(cards, many=True, context=self.get_serializer_context()).data
+        for row, link in zip(data, links):
+            row["similarity"] = round(link.score, 4)
+        return success_response(data=data)
+
+    def load_batch(self, request, limit):
+        """
+        (properties in `?ids=` order, lookup values that matched nothing, error
+        response). The relations are prefetched once for the whole batch.
+        """
+        values, message = parse_ids(request.query_params.get("ids"), limit)
+        if message:
+            return None, None, error_response(
+                message="Validation failed", errors={"ids": [message]}, special_code="VALIDATION_ERROR",
+            )
+        pks = resolve_property_pks(values)
+        by_pk = self.get_queryset().in_bulk(set(pks.values()))
+        properties = [by_pk[pk] for pk in dict.fromkeys(pks[value] for value in values if value in pks) if pk in by_pk]
+        missing = [value for value in values if pks.get(value) not in by_pk]
+        return properties, missing, None
+
+    @action(detail=False, methods=["get"])
+    def batch(self, request):
+        # Several detail payloads in one round trip: /properties/batch/?ids=12,skyline-heights,40
+        properties, missing, error = self.load_batch(request, BATCH_MAX_IDS)
+        if error is not None:
+            return error
+        data = PropertySerializer(properties, many=True, context=self.get_serializer_context()).data
+        return success_response(data={"results": data, "missing": missing})
+
+    @action(detail=False, methods=["get"])
+    def compare(self, request):
+        # Batch plus a column-aligned table of details, units and rate cards: /properties/compare/?ids=12,40
+        properties, missing, error = self.load_batch(request, COMPARE_MAX_IDS)
+        if error is not None:
+            return error
+        data = PropertySerializer(properties, many=True, context=self.get_serializer_context()).data
+        return success_response(data={"results": data, "comparison": compare_table(properties), "missing": missing})
+
+    @action(detail=False, methods=["get"], throttle_classes=[SuggestThrottle])
+    def suggest(self, request):
+        # Typeahead: /properties/suggest/?q=sky&limit=8
+        try:
+            limit = min(int(request.query_params.get("limit", SUGGEST_LIMIT)), SUGGEST_MAX_LIMIT)
+        except ValueError:
+            limit = SUGGEST_LIMIT
+        return success_response(data=suggest(request.query_params.get("q", ""), max(limit, 1)))
+
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        # Sidebar counts for the same filters/search the list accepts
+        queryset = self.filter_queryset(Property.objects.all())
+        return success_response(data=cached_facets(queryset, request.query_params))
+
+    @action(detail=False, methods=["get"])
+    def clusters(self, request):
+        # Map pins for one viewport/tile: /properties/clusters/?bbox=...&zoom=12
+        try:
+            zoom = int(request.query_params.get("zoom", ""))
+        except ValueError:
+            zoom = -1
+        errors = {}
+        if not 0 <= zoom <= MAX_ZOOM:
+            errors["zoom"] = [f"Must be an integer between 0 and {MAX_ZOOM}."]
+        if not request.query_params.get("bbox"):
+            errors["bbox"] = ["This parameter is required."]
+        if errors:
+            return error_response(message="Validation failed", errors=errors, special_code="VALIDATION_ERROR")
+
+        queryset = self.filter_queryset(Property.objects.all())
+        response = success_response(data=cached_clusters(queryset, request.query_params, zoom))
+        response["Cache-Control"] = f"public, max-age={CLUSTERS_CACHE_TTL}"
+        return response
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def export(self, request):
+        # Whole (filtered) catalog in one streamed response: /properties/export/?export_format=csv
+        export_format = request.query_params.get("export_format", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            return error_response(
+                message="Validation failed",
+                errors={"export_format": [f"Must be one of: {', '.join(EXPORT_FORMATS)}."]},
+                special_code="VALIDATION_ERROR",
+            )
+
+        rows = export_rows(self.filter_queryset(self.get_queryset()))
+        lines = csv_lines(rows) if export_format == "csv" else ndjson_lines(rows)
+        content_type, filename = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def attach_matched_units(self, properties):
+        # With unit-level filters (?rooms_in=, ?carpet_min=, ...) report which units matched
+        filterset = PropertyFilter(self.request.query_params, queryset=Property.objects.none())
+        unit_q = filterset.unit_q() if filterset.is_valid() else None
+        if unit_q is None or not properties:
+            return
+        matches = matched_units([prop.pk for prop in properties], unit_q)
+        for prop in properties:
+            prop.matched_units = matches[prop.pk]
+
     def list(self, request, *args, **kwargs):
+        self.conditional_validators = list_validators(request)
+        not_modified = not_modified_response(request, *self.conditional_validators)
+        if not_modified is not None:
+            return not_modified
+
+        cache_key = list_cache_key(request)
+        cached = get_cached(cache_key)
+        if cached is not None:
+            return success_response(data=cached["data"], pagination=cached["pagination"])
+
         queryset = self.filter_queryset(self.get_queryset())
 
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
+            self.attach_matched_units(page)
+            serializer = self.get_serializer(cards_for_page(page), many=True)
 
             # Build pagination metadata if paginator is PageNumberPagination-like
             pagination_meta = None
             paginator = getattr(self, 'paginator', None)
-            if paginator is not None:
+            if isinstance(paginator, KeysetCursorPagination):
+                pagination_meta = paginator.get_pagination_meta()
+            elif paginator is not None:
                 try:
                     pagination_meta = {
                         "count": paginator.page.paginator.count,
@@ -96,11 +283,32 @@ class PropertyViewSet(viewsets.ModelViewSet):
                         "previous": paginator.get_previous_link() if hasattr(paginator, 'get_previous_link') else None,
                     }
 
+            set_cached(cache_key, serializer.data, pagination_meta)
             return success_response(data=serializer.data, pagination=pagination_meta)
 
-        serializer = self.get_serializer(queryset, many=True)
+        properties = list(queryset)
+        self.attach_matched_units(properties)
+        serializer = self.get_serializer(cards_for_page(properties), many=True)
+        set_cached(cache_key, serializer.data)
         return success_response(data=serializer.data)
 
+class PropertyImportView(APIView):
+    """
+    Bulk-create properties from an NDJSON body, one nested property document
+    per line (see properties.ingest). Returns the import report.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        # Read line by line from the body stream instead of parsing it whole
+        report = PropertyImporter(request.user).run(request.stream or [])
+        return success_response(
+            data=report,
+            message=f"Imported {report['created']} properties",
+            status_code=status.HTTP_201_CREATED if report["created"] else status.HTTP_200_OK,
+        )
+
+
 class PropertyMediaViewSet(viewsets.ModelViewSet):
     # queryset = Property.objects.all().select_related("area", "listed_by").prefetch_related("media", "units", "amenities", "specifications")
     # serializer_class = PropertySerializer
@@ -174,6 +174,7 @@ REST_FRAMEWORK = {
         'user': '1000/day',
         'otp': '5/min',
         "anon": "50/min",   # anonymous users
+        "suggest": "300/min",  # properties typeahead
     },
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": int(os.environ.get("PAGE_SIZE", 10)),
@@ -186,7 +187,7 @@ REST_FRAMEWORK = {
 
 
 if not DEBUG:
-    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = ["rest_framework.renderers.JSONRenderer"]
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = ["core.renderers.ORJSONRenderer"]
 
 REDIS_URL = os.environ.get("REDIS_URL", None)  # set this on Render
 
@@ -262,6 +263,17 @@ CLOUDINARY_STORAGE = {
     "API_SECRET": os.environ.get("CLOUDINARY_API_SECRET"),
 }
 
+# Uploads (PropertyMedia.file, Property.brochure_pdf) are staged on local disk
+# and moved to the default storage by properties.media_queue:
+#   "thread" - in-process worker pool, once the request's transaction commits
+#              (failed moves are retried by the pool after their backoff)
+#   "db"     - left in the MediaTask table for `manage.py process_media`
+#   "inline" - inside the request (development and tests)
+MEDIA_QUEUE = os.environ.get("MEDIA_QUEUE", "thread")
+MEDIA_QUEUE_WORKERS = int(os.environ.get("MEDIA_QUEUE_WORKERS", 2))
+MEDIA_STAGING_ROOT = os.environ.get("MEDIA_STAGING_ROOT", BASE_DIR / "media_staging")
+MEDIA_STAGING_URL = "/media/staging/"
+
 SITE_ID = int(os.environ.get("SITE_ID", 1))
 
 